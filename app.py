@@ -1,150 +1,440 @@
 import streamlit as st
 import cv2
-import mediapipe as mp
+import av
 import numpy as np
+import pandas as pd
+import os
 import time
 import threading
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, RTCConfiguration
-from exercise_utils import (
-    EXERCISES,
-    analyze_pushup,
-    analyze_squat,
-    analyze_curl,
-    analyze_plank,
-    analyze_pullup,
-    analyze_lunge,
-    analyze_press,
-    analyze_row,
-    analyze_goblet_squat,
-    analyze_lateral_raise,
-    analyze_tricep_extension,
-    analyze_front_raise,
-    analyze_deadlift,
-    analyze_overhead_squat
-)
-
-# Initialize MediaPipe Pose
-mp_pose = mp.solutions.pose
-mp_drawing = mp.solutions.drawing_utils
-
-class PoseTransformer(VideoTransformerBase):
-    def __init__(self):
-        self.pose = mp_pose.Pose(
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        self.exercise_state = 'ready'
-        self.last_rep_time = time.time()
-        self.rep_count = 0
-        self.total_reps = 0
+import uuid
+from functools import partial
+from streamlit_webrtc import webrtc_streamer, VideoProcessorBase, RTCConfiguration
+from exercise_registry import REGISTRY
+from exercise_utils import FrameFeatures, primary_signal
+from exercise_recognition import ExerciseRecognizer
+from rep_counter import REP_COUNTERS, FrameClock, create_rep_counter, default_rep_counter
+from frame_pool import FramePool, resize_buffer
+from frame_policy import DROP_POLICIES, FrameDropPolicy
+from pose_backends import NUM_LANDMARKS, MediaPipeBackend, draw_skeleton
+from session_recorder import RECORDING_WIDTHS, RecordingFile, SessionRecorder
+from keyframes import KeyframeCapture
+from timeseries import DownsampledSeries, apply_updates, drawn_points
+from thread_budget import ThreadBudgetManager
+from client_pose import BROWSER_MODELS, LandmarkSession, client_pose_stream
+from profiler import PROFILE_DIR, SamplingProfiler
+from memory_budget import MB, MemoryBudgetManager
+from multi_camera import MultiCameraFusion, allowed_sources
+from stream_constraints import StreamConstraintPlanner
+from landmark_predictor import LandmarkPredictor
+from event_bus import EventBus, FileSink, WebhookSink, SessionEvents
+
+# Live charts of the session and how often they fetch new points
+TREND_CHARTS = {
+    'angle': 'Joint Angle',
+    'form_score': 'Form Score'
+}
+TREND_REFRESH_SECONDS = 1.0
+
+# Memory budgets in MB (the global one defaults to 80% of the memory limit) and
+# how often a session measures itself against them
+SESSION_MEMORY_BUDGET_MB = int(os.environ.get('FITNESS_TRAINER_SESSION_MEMORY_MB', 256))
+GLOBAL_MEMORY_BUDGET_MB = os.environ.get('FITNESS_TRAINER_GLOBAL_MEMORY_MB')
+MEMORY_CHECK_SECONDS = 1.0
+
+# How often a session re-reads the planned capture size
+CAPTURE_CHECK_SECONDS = 1.0
+
+# Where rep, state, set and form events are sent: a JSON-lines file and/or a webhook URL
+EVENT_LOG_PATH = os.environ.get('FITNESS_TRAINER_EVENT_LOG')
+EVENT_WEBHOOK_URL = os.environ.get('FITNESS_TRAINER_EVENT_WEBHOOK')
+
+# Where pose estimation runs: on this server from streamed video, or in the browser
+INFERENCE_MODES = {
+    'server': 'Server (stream video)',
+    'browser': 'Browser (send landmarks only)',
+    'cameras': 'Local cameras (multi-view)'
+}
+
+# How often the local camera view is redrawn and the page refreshed with its results
+CAMERA_FRAME_SECONDS = 0.1
+CAMERA_REFRESH_SECONDS = 1.0
+
+# Local cameras and video files the operator lets users open (FITNESS_TRAINER_CAMERA_SOURCES,
+# comma separated; the multi-view mode is hidden without it), and how long cameras keep
+# running after the browser session that started them stopped refreshing
+CAMERA_SOURCES = allowed_sources()
+CAMERA_IDLE_SECONDS = 15.0
+
+class PoseTransformer(VideoProcessorBase):
+    def __init__(self, clock=None, backend=None, thread_budget=None, memory_budget=None, stream_planner=None,
+                 event_bus=None):
+        self.session_id = uuid.uuid4().hex[:8]
+        
+        # Sessions that would push the process over its memory budget are refused
+        self.memory_lease = memory_budget.acquire(self) if memory_budget else None
+        self.admitted = self.memory_lease is None or self.memory_lease.admitted
+        self.degraded = False
+        self.next_memory_check = 0.0
+        
+        # Share of the host's cores when many sessions run in one process
+        self.thread_lease = thread_budget.acquire() if thread_budget and self.admitted else None
+        self.thread_id = None
+        
+        # Pose estimation backend, MediaPipe Pose unless another one is injected
+        if backend is None and self.admitted:
+            make_backend = partial(
+                MediaPipeBackend,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+            backend = self.thread_lease.create(make_backend) if self.thread_lease else make_backend()
+        self.backend = backend
+        self.pose_confidence = 0.0
         self.form_score = 100
         self.feedback = ''
         self.selected_exercise = 'pushup'
+        self.exercise = REGISTRY[self.selected_exercise]
         self.confidence_threshold = 0.5
         self.feedback_sensitivity = 0.5
         
-        # Rep state machine variables
-        self.rep_phase = 'waiting_down'  # waiting_down or waiting_up
-        self.last_state = 'ready'
-        self.state_stable_frames = 0
-        self.last_state_change_time = time.time()
-        self.state_confidence = 0.0
-        
-        # Analysis functions mapping
-        self.analysis_funcs = {
-            'pushup': analyze_pushup,
-            'squat': analyze_squat,
-            'curl': analyze_curl,
-            'plank': analyze_plank,
-            'pullup': analyze_pullup,
-            'lunge': analyze_lunge,
-            'press': analyze_press,
-            'row': analyze_row,
-            'goblet_squat': analyze_goblet_squat,
-            'lateral_raise': analyze_lateral_raise,
-            'tricep_extension': analyze_tricep_extension,
-            'front_raise': analyze_front_raise,
-            'deadlift': analyze_deadlift,
-            'overhead_squat': analyze_overhead_squat
-        }
-
-    def transform(self, frame):
-        # Convert frame to RGB
-        img = frame.to_ndarray(format="bgr24")
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        
-        # Process with MediaPipe
-        results = self.pose.process(img_rgb)
-        
-        if results.pose_landmarks:
-            # Draw skeleton
-            mp_drawing.draw_landmarks(
-                img_rgb,
-                results.pose_landmarks,
-                mp_pose.POSE_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
-                mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=2)
-            )
+        # Frame timestamps drive the rep logic so recorded video can run faster than real time
+        self.clock = clock or FrameClock()
+        self.rep_counter_methods = {}
+        self.rep_counter_method = default_rep_counter(self.selected_exercise)
+        self.rep_counter = create_rep_counter(self.selected_exercise, self.rep_counter_method)
+        
+        # Frames larger than the planned capture size are scaled down while converting
+        self.stream_planner = stream_planner
+        self.max_input_width = None
+        self.next_capture_check = 0.0
+        self.input_size = None
+        
+        # Reusable buffers so the output path does not allocate per frame
+        self.rgb_buffer = None
+        self.output_pool = FramePool()
+        
+        # Back-pressure when frames queue up in async processing mode
+        self.frame_policy = FrameDropPolicy()
+        
+        # Geometric features shared by the analyzer and recognizer, reset every frame
+        self.features = FrameFeatures()
+        
+        # Pose inference runs on every inference_stride-th frame; the motion model carries the
+        # skeleton through the frames in between, and state_lead seconds ahead for the analyzer
+        self.predictor = LandmarkPredictor()
+        self.inference_stride = 1
+        self.state_lead = 0.0
+        self.lead_landmarks = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.frame_index = 0
+        
+        # Automatic exercise recognition
+        self.auto_detect = False
+        self.recognizer = ExerciseRecognizer()
+        
+        # Optional recording of the annotated stream
+        self.recorder = None
+        
+        # Bottom and top frame of each rep for form review
+        self.keyframes = KeyframeCapture()
+        
+        # Downsampled session history for the live charts
+        self.trends = {name: DownsampledSeries() for name in TREND_CHARTS}
+        
+        # On-demand sampling profile of the processing thread
+        self.profiler = None
+        
+        # Rep, state, set and form events for integrations
+        self.events = SessionEvents(event_bus, self.session_id) if event_bus else None
+        
+        if memory_budget:
+            memory_budget.track('transformers', self)
+            if backend is not None:
+                memory_budget.track('backends', backend)
+
+    @property
+    def exercise_state(self):
+        return self.rep_counter.exercise_state
+
+    @property
+    def rep_count(self):
+        return self.rep_counter.rep_count
+
+    @property
+    def total_reps(self):
+        return self.rep_counter.total_reps
+
+    @property
+    def state_confidence(self):
+        return self.rep_counter.state_confidence
+
+    def recv(self, frame):
+        return self.process(frame)
+
+    def process(self, frame, draw=True, infer=True):
+        """Analyze a frame and return it annotated, or None when draw is False.
+
+        Frames that are analyzed but never displayed skip the overlay, so they
+        neither draw nor take a pooled output frame. With infer False the pose
+        is extrapolated instead of estimated, as between inference intervals.
+        """
+        start = time.perf_counter()
+        current_time = self.clock(frame)
+        if not self.admitted:
+            return self.refuse(frame) if draw else None
+        
+        # Keyframes and recording are switched off while over the memory budget
+        if self.memory_lease and current_time >= self.next_memory_check:
+            self.next_memory_check = current_time + MEMORY_CHECK_SECONDS
+            self.set_degraded(self.memory_lease.check())
+        
+        # Remember the processing thread for the profiler and keep it inside this session's CPU budget
+        thread_id = threading.get_ident()
+        if thread_id != self.thread_id:
+            self.thread_id = thread_id
+            if self.thread_lease:
+                self.thread_lease.bind_current_thread()
+        
+        # Follow the planned capture size; it shrinks when the server is loaded
+        if self.stream_planner and current_time >= self.next_capture_check:
+            self.next_capture_check = current_time + CAPTURE_CHECK_SECONDS
+            recorder = self.recorder
+            recording_width = recorder.width if recorder else None
+            self.stream_planner.update(recording_width)
+            self.max_input_width = self.stream_planner.profile(recording_width)[0]
+        
+        # Convert frame to RGB into a buffer reused across frames, scaling down in the same pass
+        self.input_size = (frame.width, frame.height)
+        if self.max_input_width and frame.width > self.max_input_width:
+            height = int(round(frame.height * self.max_input_width / frame.width / 2)) * 2
+            img = frame.to_ndarray(format="bgr24", width=self.max_input_width, height=height)
+        else:
+            img = frame.to_ndarray(format="bgr24")
+        
+        # Estimate the pose, or extrapolate the last one to this frame's time between inferences
+        self.frame_index += 1
+        if not self.predictor.tracking or (infer and self.frame_index % self.inference_stride == 0):
+            self.rgb_buffer = resize_buffer(self.rgb_buffer, img.shape)
+            img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+            landmarks, self.pose_confidence = self.backend.process(img_rgb)
+            self.predictor.update(landmarks, current_time)
+        else:
+            landmarks = self.predictor.predict(current_time)
+        
+        rep_counted = False
+        if landmarks is not None:
+            # Analyze exercise, optionally on the pose expected a little later so states change sooner
+            if self.state_lead and self.predictor.tracking:
+                features = self.features.update(
+                    self.predictor.predict(current_time + self.state_lead, out=self.lead_landmarks))
+            else:
+                features = self.features.update(landmarks)
             
-            # Analyze exercise
-            landmarks = results.pose_landmarks.landmark
+            if self.auto_detect:
+                detected = self.recognizer.update(features)
+                if detected and detected != self.selected_exercise:
+                    self.switch_exercise(detected)
             
-            if self.selected_exercise in self.analysis_funcs:
-                new_state, form_score, feedback = self.analysis_funcs[self.selected_exercise](landmarks)
-                current_time = time.time()
-                
-                # Improved state detection logic
-                if new_state == self.last_state:
-                    self.state_stable_frames += 1
-                else:
-                    self.state_stable_frames = 0
-                    self.last_state = new_state
-                self.state_confidence = min(self.state_stable_frames / 3.0, 1.0)
-                min_stable_frames = 1 if new_state in ['up', 'down'] else 2
-
-                # Rep state machine for up/down exercises
-                # Only applies to exercises with up/down motion
-                updown_exercises = [
-                    'pushup', 'squat', 'goblet_squat', 'press', 'row', 'deadlift', 'overhead_squat',
-                    'lateral_raise', 'tricep_extension', 'front_raise', 'curl', 'pullup', 'lunge'
-                ]
-                if self.selected_exercise in updown_exercises:
-                    # Wait for a stable "down" before allowing a rep
-                    if self.rep_phase == 'waiting_down':
-                        if new_state == 'down' and self.state_stable_frames >= min_stable_frames:
-                            self.rep_phase = 'waiting_up'
-                    # Wait for a stable "up" to count a rep
-                    elif self.rep_phase == 'waiting_up':
-                        if new_state == 'up' and self.state_stable_frames >= min_stable_frames:
-                            if current_time - self.last_rep_time > 0.4:
-                                self.rep_count += 1
-                                self.total_reps += 1
-                                self.last_rep_time = current_time
-                            self.rep_phase = 'waiting_down'
-                    # Always update the visible state
-                    self.exercise_state = new_state
-                else:
-                    # For non-up/down exercises, just update state as before
-                    if self.state_stable_frames >= min_stable_frames:
-                        self.exercise_state = new_state
-                
-                self.form_score = form_score
-                self.feedback = feedback
+            exercise = self.exercise
+            new_state, form_score, feedback = exercise.analyze(features)
+            rep_counted = self.rep_counter.update(new_state, current_time, updown=exercise.updown, features=features)
+            if self.events:
+                self.events.observe(exercise.key, current_time, self.exercise_state, rep_counted, self.rep_counter,
+                                    form_score, feedback)
+            
+            self.form_score = form_score
+            self.feedback = feedback
+            self.trends['angle'].append(current_time, features.get(primary_signal(exercise.key)))
+            self.trends['form_score'].append(current_time, form_score)
+        
+        if not draw:
+            if self.stream_planner:
+                self.stream_planner.report(time.perf_counter() - start)
+            return None
+        
+        # Draw the overlay straight into a pooled output frame, skeleton colors are BGR
+        out_frame, out_img = self.output_pool.acquire(img.shape[1], img.shape[0])
+        np.copyto(out_img, img)
+        if landmarks is not None:
+            draw_skeleton(out_img, landmarks)
         
-        # Convert back to BGR for display
-        img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+        # Buffer the frame (skeleton, no text) and keep it if a rep just ended
+        if not self.degraded:
+            self.keyframes.push(out_img, landmarks, self.form_score, self.exercise_state, current_time)
+            if rep_counted:
+                self.keyframes.on_rep(self.rep_count)
         
         # Add exercise state indicator with confidence
-        cv2.putText(img_bgr, f"State: {self.exercise_state.upper()}", 
+        cv2.putText(out_img, f"State: {self.exercise_state.upper()}", 
                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-        cv2.putText(img_bgr, f"Reps: {self.rep_count}", 
+        cv2.putText(out_img, f"Reps: {self.rep_count}", 
                    (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-        cv2.putText(img_bgr, f"Score: {self.form_score}%", 
+        cv2.putText(out_img, f"Score: {self.form_score}%", 
                    (10, 110), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-        cv2.putText(img_bgr, f"Conf: {self.state_confidence:.1f}", 
+        cv2.putText(out_img, f"Conf: {self.state_confidence:.1f}", 
                    (10, 150), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 255), 2)
         
-        return img_bgr
+        # Hand the annotated frame to the recorder; it drops recording frames rather than block
+        recorder = self.recorder
+        if recorder:
+            recorder.submit(out_img, current_time)
+        
+        # Keep the input timing on the outgoing frame
+        out_frame.pts = frame.pts
+        if frame.time_base is not None:
+            out_frame.time_base = frame.time_base
+        if self.stream_planner:
+            self.stream_planner.report(time.perf_counter() - start)
+        return out_frame
+
+    async def recv_queued(self, frames):
+        # Every selected frame feeds the rep counter, only the newest one is drawn and displayed
+        selected = self.frame_policy.select(frames)
+        for frame in selected[:-1]:
+            self.process(frame, draw=False)
+        return [self.process(selected[-1], infer=self.frame_policy.newest_due)]
+
+    def on_ended(self):
+        self.stop_recording()
+        if self.profiler:
+            self.profiler.stop()
+        
+        # Free the model and frame buffers now rather than whenever the transformer is collected
+        if self.backend:
+            self.backend.close()
+        self.keyframes.release()
+        self.output_pool.release()
+        self.rgb_buffer = None
+        
+        # Give the cores and memory back to the remaining sessions
+        if self.thread_lease:
+            self.thread_lease.release()
+            self.thread_lease = None
+        if self.memory_lease:
+            self.memory_lease.release()
+            self.memory_lease = None
+
+    def refuse(self, frame):
+        """Pass the frame through with a notice instead of analyzing it."""
+        img = frame.to_ndarray(format="bgr24")
+        cv2.putText(img, "Server busy - please try again later",
+                   (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+        out_frame = av.VideoFrame.from_ndarray(img, format="bgr24")
+        out_frame.pts = frame.pts
+        if frame.time_base is not None:
+            out_frame.time_base = frame.time_base
+        return out_frame
+
+    def set_degraded(self, degraded):
+        """Switch the memory-hungry extras (keyframes, recording) off or back on."""
+        if degraded and not self.degraded:
+            self.stop_recording()
+            self.keyframes.release()
+        self.degraded = degraded
+
+    def memory_usage(self):
+        """Bytes of the frame buffers this session holds (the pose model is not included)."""
+        usage = self.output_pool.nbytes() + self.keyframes.nbytes()
+        if self.rgb_buffer is not None:
+            usage += self.rgb_buffer.nbytes
+        recorder = self.recorder
+        if recorder:
+            usage += recorder.nbytes()
+        return usage
+
+    def start_recording(self, path, **options):
+        """Start encoding the annotated frames to path in the background (not while degraded)."""
+        self.stop_recording()
+        if self.degraded:
+            return
+        self.recorder = SessionRecorder(path, **options)
+
+    def stop_recording(self):
+        """Finish the recording, if any, and return its path."""
+        recorder, self.recorder = self.recorder, None
+        return recorder.close() if recorder else None
+
+    def start_profiling(self, duration=10.0, output_dir=PROFILE_DIR):
+        """Sample the processing thread for duration seconds.
+
+        Returns None, without starting anything, until a frame was processed or
+        while a profile is still running.
+        """
+        if self.thread_id is None or (self.profiler and self.profiler.running):
+            return None
+        tag = f"{time.strftime('%Y%m%d-%H%M%S')}_{self.session_id}_{self.selected_exercise}"
+        self.profiler = SamplingProfiler(
+            self.thread_id,
+            duration=duration,
+            output_dir=output_dir,
+            tag=tag,
+            metadata={'session': self.session_id, 'exercise': self.selected_exercise}
+        )
+        return self.profiler.start()
+
+    def new_set(self):
+        """Close the current set and count the reps of the next one from zero."""
+        if self.events:
+            self.events.set_completed(self.selected_exercise, self.clock.last_time or 0.0, self.rep_count)
+        self.rep_counter.rep_count = 0
+        self.rep_counter.reset()
+        self.keyframes.new_set()
+
+    def set_rep_counter_methods(self, methods):
+        """Choose the counting method (a REP_COUNTERS key) per exercise; others keep their default."""
+        self.rep_counter_methods = dict(methods)
+        method = self.rep_counter_methods.get(self.selected_exercise, default_rep_counter(self.selected_exercise))
+        if method != self.rep_counter_method:
+            self.rep_counter_method = method
+            self.rep_counter = create_rep_counter(self.selected_exercise, method, previous=self.rep_counter)
+
+    def switch_exercise(self, exercise):
+        """Change the active analyzer and restart the rep counter with the exercise's method."""
+        self.exercise = REGISTRY[exercise]
+        self.selected_exercise = exercise
+        self.rep_counter_method = self.rep_counter_methods.get(exercise, default_rep_counter(exercise))
+        self.rep_counter = create_rep_counter(exercise, self.rep_counter_method, previous=self.rep_counter)
+
+def trend_frame(series, points, label):
+    """Chart rows for (time, value) points, indexed by seconds since the session started."""
+    start = series.start or 0.0
+    return pd.DataFrame(
+        {label: [value for _, value in points]},
+        index=pd.Index([t - start for t, _ in points], name="Time (s)")
+    )
+
+@st.cache_resource
+def get_thread_budget():
+    """Process-wide thread budget shared by every camera session."""
+    return ThreadBudgetManager()
+
+@st.cache_resource
+def get_memory_budget():
+    """Process-wide memory accounting shared by every camera session."""
+    return MemoryBudgetManager(
+        session_budget=SESSION_MEMORY_BUDGET_MB * MB,
+        global_budget=int(GLOBAL_MEMORY_BUDGET_MB) * MB if GLOBAL_MEMORY_BUDGET_MB else None
+    )
+
+@st.cache_resource
+def get_event_bus():
+    """Process-wide event bus, with the file and webhook sinks configured by environment variables."""
+    bus = EventBus()
+    if EVENT_LOG_PATH:
+        bus.subscribe(FileSink(EVENT_LOG_PATH), name='file')
+    if EVENT_WEBHOOK_URL:
+        bus.subscribe(WebhookSink(EVENT_WEBHOOK_URL), name='webhook')
+    return bus
+
+@st.cache_resource
+def get_stream_planner():
+    """Process-wide capture size planner shared by every camera session."""
+    return StreamConstraintPlanner()
+
+def discard_recording():
+    """Delete this browser session's finished recording, e.g. once it was downloaded."""
+    recording_file = st.session_state.pop('recording_file', None)
+    if recording_file:
+        recording_file.delete()
 
 def main():
     st.set_page_config(
@@ -184,24 +474,24 @@ def main():
     with col1:
         st.subheader("🎥 Live Camera Feed")
         
+        auto_detect = st.checkbox(
+            "🤖 Auto-detect exercise",
+            value=False,
+            help="Recognize the exercise from your movement and switch automatically"
+        )
+        
         # Exercise selection with categories
-        exercise_options = {}
-        for key, value in EXERCISES.items():
-            category = value['category']
-            if category not in exercise_options:
-                exercise_options[category] = []
-            exercise_options[category].append((key, f"{value['name']} ({category})"))
-        
-        # Create selectbox with grouped exercises
         selected_category = st.selectbox(
             "Select Exercise Category",
-            list(exercise_options.keys())
+            list(REGISTRY.categories),
+            disabled=auto_detect
         )
         
         selected_exercise = st.selectbox(
             "Select Exercise",
-            [ex[0] for ex in exercise_options[selected_category]],
-            format_func=lambda x: EXERCISES[x]['name']
+            REGISTRY.categories[selected_category],
+            format_func=lambda x: REGISTRY.specs[x].name,
+            disabled=auto_detect
         )
         
         # Settings
@@ -223,22 +513,292 @@ def main():
                 step=0.1,
                 help="Sensitivity of form feedback"
             )
+            
+            # Remembered per exercise, so each one keeps its own counting method
+            rep_counter_methods = st.session_state.setdefault('rep_counter_methods', {})
+            rep_counter_methods[selected_exercise] = st.selectbox(
+                "Rep Counting",
+                list(REP_COUNTERS),
+                index=list(REP_COUNTERS).index(default_rep_counter(selected_exercise)),
+                format_func=REP_COUNTERS.get,
+                key=f"rep_counter_{selected_exercise}",
+                help="Threshold states count a rep when the joint angle crosses fixed limits; signal peaks "
+                     "follow the angle's own turning points, so partial-range reps count too"
+            )
+            
+            drop_policy = st.selectbox(
+                "Frame Drop Policy",
+                list(DROP_POLICIES.keys()),
+                format_func=lambda x: DROP_POLICIES[x],
+                help="What to do with frames that queue up while processing falls behind"
+            )
+            
+            max_queue = st.slider(
+                "Max Queued Frames",
+                min_value=1,
+                max_value=8,
+                value=2,
+                help="Most frames processed per batch when falling behind"
+            )
+            
+            target_fps = st.slider(
+                "Decimation Frame Rate",
+                min_value=5,
+                max_value=30,
+                value=15,
+                disabled=drop_policy != 'decimate',
+                help="Frames per second processed by the decimate policy"
+            )
+            
+            inference_stride = st.slider(
+                "Pose Inference Interval",
+                min_value=1,
+                max_value=4,
+                value=1,
+                help="Estimate the pose on every Nth frame; the skeleton is extrapolated in between"
+            )
+            
+            state_lead_ms = st.slider(
+                "State Lead (ms)",
+                min_value=0,
+                max_value=200,
+                value=0,
+                step=10,
+                help="Judge the pose this far ahead of the camera, so up/down states change sooner"
+            )
+            
+            recording_width = st.selectbox(
+                "Recording Resolution",
+                list(RECORDING_WIDTHS.keys()),
+                index=2,
+                format_func=lambda x: RECORDING_WIDTHS[x],
+                help="Width of the recorded video; smaller recordings cost less CPU"
+            )
+            
+            recording_bitrate = st.slider(
+                "Recording Bitrate (kbps)",
+                min_value=250,
+                max_value=4000,
+                value=1000,
+                step=250,
+                help="Video bitrate of the recorded session"
+            )
+            
+            browser_model = st.selectbox(
+                "Browser Pose Model",
+                list(BROWSER_MODELS.keys()),
+                format_func=lambda x: BROWSER_MODELS[x],
+                help="Pose model downloaded by the browser when it estimates the pose itself"
+            )
+            
+            profile_seconds = st.slider(
+                "Profiling Duration (s)",
+                min_value=5,
+                max_value=60,
+                value=10,
+                step=5,
+                help="How long the processing thread is sampled when profiling"
+            )
+            profile_now = st.button(
+                "🔬 Profile processing",
+                help=f"Sample the live processing thread and write flame graph stacks and per-function stats to {PROFILE_DIR}"
+            )
+            memory_snapshot = st.button(
+                "🧠 Memory snapshot",
+                help="Compare Python allocations with the previous snapshot (the first one starts tracing)"
+            )
         
-        # WebRTC streamer
-        webrtc_ctx = webrtc_streamer(
-            key="pose-detection",
-            video_transformer_factory=PoseTransformer,
-            rtc_configuration=RTCConfiguration({
-                "iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]
-            }),
-            media_stream_constraints={"video": True, "audio": False},
-            async_processing=True,
+        inference = st.radio(
+            "Pose Estimation",
+            [mode for mode in INFERENCE_MODES if mode != 'cameras' or CAMERA_SOURCES],
+            format_func=lambda x: INFERENCE_MODES[x],
+            horizontal=True,
+            help="Estimating the pose in the browser sends only landmarks to the server, never the video"
         )
         
-        if webrtc_ctx.state.playing:
-            st.session_state.is_tracking = True
+        processor = None
+        client_session = None
+        fusion = st.session_state.get('multi_camera')
+        if fusion and inference != 'cameras':
+            fusion.stop()
+            fusion = st.session_state.multi_camera = None
+        if inference == 'cameras':
+            # Cameras attached to this machine, each with its own pose model, fused into one skeleton
+            sources = st.multiselect(
+                "Camera Sources",
+                CAMERA_SOURCES,
+                default=CAMERA_SOURCES[:2],
+                help="Cameras and videos allowed by the server operator; the first one is the reference view"
+            )
+            run_cameras = st.toggle("▶️ Run cameras", value=False)
+            if fusion and (not run_cameras or [w.source for w in fusion.workers] != sources or fusion.stopped):
+                fusion.stop()
+                fusion = st.session_state.multi_camera = None
+            if run_cameras and fusion is None and sources:
+                fusion = st.session_state.multi_camera = MultiCameraFusion(
+                    sources,
+                    backend_factory=partial(MediaPipeBackend, min_detection_confidence=confidence_threshold),
+                    session=LandmarkSession(selected_exercise, auto_detect, event_bus=get_event_bus()),
+                    thread_budget=get_thread_budget(),
+                    idle_timeout=CAMERA_IDLE_SECONDS
+                ).start()
+            
+            camera_view = st.empty()
+            if fusion:
+                # Every rerun of this session keeps the cameras alive; they stop once the tab is gone
+                fusion.touch()
+                if fusion.latest_image is not None:
+                    camera_view.image(fusion.latest_image, channels="BGR")
+                client_session = fusion.session
+                client_session.auto_detect = auto_detect
+                client_session.set_rep_counter_methods(rep_counter_methods)
+                if auto_detect:
+                    selected_exercise = client_session.selected_exercise
+                elif client_session.selected_exercise != selected_exercise:
+                    client_session.switch_exercise(selected_exercise)
+                
+                st.session_state.is_tracking = fusion.running
+                result = client_session.result()
+                st.session_state.rep_count = result['reps']
+                st.session_state.total_reps = result['total_reps']
+                st.session_state.exercise_state = result['state']
+                st.session_state.form_score = result['form_score']
+                st.session_state.feedback = result['feedback']
+                
+                camera_stats = fusion.stats()
+                for camera in camera_stats['cameras']:
+                    if camera['error']:
+                        st.error(f"Camera {camera['source']}: {camera['error']}")
+                st.caption(f"{len(sources)} cameras, {camera_stats['fused']} fused frames; inference "
+                           f"{camera_stats['parallel_ms']:.0f} ms in parallel vs "
+                           f"{camera_stats['serial_ms']:.0f} ms one after another")
+            else:
+                st.session_state.is_tracking = False
+        elif inference == 'browser':
+            # The browser uploads landmark batches; analyze them here like PoseTransformer would
+            if 'client_pose' not in st.session_state:
+                st.session_state.client_pose = LandmarkSession(selected_exercise, event_bus=get_event_bus())
+            client_session = st.session_state.client_pose
+            batch = client_pose_stream(
+                "client-pose",
+                result=client_session.result(),
+                model=browser_model,
+                confidence=confidence_threshold
+            )
+            client_session.auto_detect = auto_detect
+            client_session.set_rep_counter_methods(rep_counter_methods)
+            if auto_detect:
+                selected_exercise = client_session.selected_exercise
+            elif client_session.selected_exercise != selected_exercise:
+                client_session.switch_exercise(selected_exercise)
+            
+            # The component returns its last batch on every rerun; a malformed one is reported, not retried
+            batch_id = (batch.get('session'), batch.get('seq')) if batch else None
+            rejected = st.session_state.get('rejected_batch')
+            received = 0
+            if rejected and rejected[0] == batch_id:
+                st.warning(f"Ignored a malformed landmark batch from the browser: {rejected[1]}")
+            else:
+                try:
+                    received = client_session.receive(batch)
+                except ValueError as e:
+                    st.session_state.rejected_batch = (batch_id, str(e))
+                    st.warning(f"Ignored a malformed landmark batch from the browser: {e}")
+            st.session_state.is_tracking = received > 0
+            result = client_session.result()
+            st.session_state.rep_count = result['reps']
+            st.session_state.total_reps = result['total_reps']
+            st.session_state.exercise_state = result['state']
+            st.session_state.form_score = result['form_score']
+            st.session_state.feedback = result['feedback']
+            uplink = client_session.stats()
+            st.caption(f"Uplink: {uplink['frames']} landmark frames in {uplink['bytes'] / 1024:.0f} KB")
         else:
-            st.session_state.is_tracking = False
+            record_session = st.checkbox(
+                "⏺️ Record annotated session",
+                value=False,
+                help="Save the video with the pose overlay so it can be downloaded afterwards"
+            )
+            
+            # Ask the browser for no more pixels than inference (or the recording) uses and the
+            # server can afford; the browser applies them when the camera (re)starts
+            stream_planner = get_stream_planner()
+            stream_planner.update(recording_width if record_session else None)
+            
+            # WebRTC streamer
+            webrtc_ctx = webrtc_streamer(
+                key="pose-detection",
+                video_processor_factory=partial(
+                    PoseTransformer,
+                    thread_budget=get_thread_budget(),
+                    memory_budget=get_memory_budget(),
+                    stream_planner=stream_planner,
+                    event_bus=get_event_bus()
+                ),
+                rtc_configuration=RTCConfiguration({
+                    "iceServers": [{"urls": ["stun:stun.l.google.com:19302"]}]
+                }),
+                media_stream_constraints=stream_planner.constraints(recording_width if record_session else None),
+                async_processing=True,
+            )
+            
+            processor = webrtc_ctx.video_processor
+            if processor:
+                processor.frame_policy.policy = drop_policy
+                processor.frame_policy.max_queue = max_queue
+                processor.frame_policy.target_fps = target_fps
+                processor.inference_stride = inference_stride
+                processor.state_lead = state_lead_ms / 1000
+                processor.auto_detect = auto_detect
+                processor.set_rep_counter_methods(rep_counter_methods)
+                if auto_detect:
+                    selected_exercise = processor.selected_exercise
+                elif processor.selected_exercise != selected_exercise:
+                    processor.switch_exercise(selected_exercise)
+            
+                # The memory budget stops a recording; keep what was recorded until the box is ticked again
+                if record_session and processor.degraded:
+                    st.session_state.recording_interrupted = True
+                elif not record_session:
+                    st.session_state.recording_interrupted = False
+                if st.session_state.get('recording_interrupted'):
+                    st.warning("⚠️ Recording stopped: memory budget. The recording so far can be downloaded "
+                               "below; untick and tick the box to start a new one")
+                elif record_session and processor.recorder is None:
+                    # A new recording replaces the previous one
+                    discard_recording()
+                    st.session_state.recording_file = RecordingFile()
+                    processor.start_recording(
+                        st.session_state.recording_file.path,
+                        width=recording_width,
+                        bitrate=recording_bitrate * 1000
+                    )
+                elif not record_session and processor.recorder is not None:
+                    processor.stop_recording()
+                
+                if profile_now:
+                    if processor.profiler and processor.profiler.running:
+                        st.info("A profile is already running; wait for it to finish")
+                    elif processor.start_profiling(profile_seconds) is None:
+                        st.warning("Profiling starts once frames are being processed")
+            
+            # Offer the last finished recording for download
+            recording_file = st.session_state.get('recording_file')
+            recording = processor.recorder if processor else None
+            if recording_file and recording is None and recording_file.exists:
+                with open(recording_file.path, 'rb') as f:
+                    st.download_button(
+                        "⬇️ Download annotated session",
+                        f,
+                        file_name=os.path.basename(recording_file.path),
+                        mime="video/mp4",
+                        on_click=discard_recording
+                    )
+            
+            if webrtc_ctx.state.playing:
+                st.session_state.is_tracking = True
+            else:
+                st.session_state.is_tracking = False
     
     with col2:
         st.subheader("📊 Progress Tracking")
@@ -271,7 +831,61 @@ def main():
         st.subheader("📈 Session Stats")
         st.metric("Total Reps", st.session_state.total_reps)
         st.metric("Avg Rep Time", f"{st.session_state.avg_rep_time:.1f}s")
-        st.metric("Current Exercise", EXERCISES[selected_exercise]['name'])
+        st.metric("Current Exercise", REGISTRY.specs[selected_exercise].name)
+        
+        # Filled in by the live loop at the end of the page
+        if processor:
+            st.subheader("📉 Session Trends")
+            trends_area = st.container()
+        
+        # Stream health
+        if processor:
+            frame_stats = processor.frame_policy.stats()
+            st.subheader("📶 Stream Health")
+            col_e, col_f, col_g = st.columns(3)
+            with col_e:
+                st.metric("Processed", frame_stats['processed'])
+            with col_f:
+                st.metric("Dropped", frame_stats['dropped'])
+            with col_g:
+                st.metric("Late", frame_stats['late'])
+            st.caption(f"Lag: {frame_stats['last_lag'] * 1000:.0f} ms (max {frame_stats['max_lag'] * 1000:.0f} ms)")
+            
+            capture = get_stream_planner().stats()
+            input_size = processor.input_size
+            st.caption(f"Capture: {capture['width']}×{capture['height']} @ {capture['fps']} fps planned "
+                       f"at {capture['load']:.0%} load"
+                       + (f", camera sends {input_size[0]}×{input_size[1]}" if input_size else ""))
+            if input_size and processor.max_input_width and input_size[0] > processor.max_input_width:
+                st.caption("Frames are scaled down on the server until the camera restarts with the new size.")
+            
+            events = get_event_bus().stats()
+            if events['subscribers']:
+                st.caption(f"Events: {events['published']} published, {events['delivered']} delivered, "
+                           f"{events['dropped']} dropped, {events['errors']} failed deliveries")
+            
+            memory = get_memory_budget().stats()
+            budget = f" of {memory['global_budget_mb']:.0f}" if memory['global_budget_mb'] else ""
+            st.caption(f"Memory: {memory['rss_mb']:.0f}{budget} MB, {memory['sessions']} session(s), "
+                       f"{memory['degraded']} degraded, {memory['refused']} refused, "
+                       f"{memory['leak_suspects']} leak suspect(s)")
+            if not processor.admitted:
+                st.error("The server is out of memory for new sessions. Please try again later.")
+            elif processor.degraded:
+                st.warning("Keyframes and recording are paused while the server is short of memory.")
+            
+            profiler = processor.profiler
+            if profiler and profiler.running:
+                st.caption(f"🔬 Profiling for {profiler.duration:.0f}s ({profiler.samples} samples so far)")
+            elif profiler and profiler.paths:
+                st.caption(f"🔬 Profile of {profiler.samples} samples: `{profiler.paths['collapsed']}`")
+                with open(profiler.paths['collapsed'], 'rb') as f:
+                    st.download_button(
+                        "⬇️ Download flame graph stacks",
+                        f,
+                        file_name=os.path.basename(profiler.paths['collapsed']),
+                        mime="text/plain"
+                    )
         
         # Control buttons
         st.subheader("🎮 Controls")
@@ -285,6 +899,10 @@ def main():
                 st.session_state.exercise_state = 'ready'
                 st.session_state.form_score = 100
                 st.session_state.feedback = ''
+                if processor:
+                    processor.keyframes.reset()
+                if client_session:
+                    client_session.reset()
                 st.rerun()
         
         with col_d:
@@ -292,39 +910,86 @@ def main():
                 st.session_state.set_count += 1
                 st.session_state.rep_count = 0
                 st.session_state.exercise_state = 'ready'
+                if processor:
+                    processor.new_set()
+                if client_session:
+                    client_session.new_set()
                 st.rerun()
     
+    # Python allocations that grew since the previous snapshot
+    if memory_snapshot:
+        growth = get_memory_budget().snapshot()
+        with st.expander("🧠 Memory Growth", expanded=True):
+            if growth:
+                st.code("\n".join(str(stat) for stat in growth))
+            else:
+                st.info("Tracing started. Take another snapshot later to see what grew.")
+    
+    # Bottom and top frame of every rep in the current set
+    if processor:
+        rep_keyframes = processor.keyframes.gallery()
+        if rep_keyframes:
+            with st.expander(f"🖼️ Rep Keyframes (Set {processor.keyframes.set_number})", expanded=False):
+                for entry in rep_keyframes:
+                    col_bottom, col_top = st.columns(2)
+                    with col_bottom:
+                        st.image(entry['bottom']['image'], channels="BGR",
+                                 caption=f"Rep {entry['rep']} bottom - {entry['bottom']['form_score']:.0f}%")
+                    with col_top:
+                        st.image(entry['top']['image'], channels="BGR",
+                                 caption=f"Rep {entry['rep']} top - {entry['top']['form_score']:.0f}%")
+    
     # Exercise instructions
     st.subheader("📋 Exercise Instructions")
-    exercise_info = EXERCISES[selected_exercise]
-    st.info(f"**{exercise_info['name']}** - {exercise_info['category']}")
+    exercise_info = REGISTRY.specs[selected_exercise]
+    st.info(f"**{exercise_info.name}** - {exercise_info.category}")
     
     # Exercise-specific tips
-    exercise_tips = {
-        'pushup': "Keep your back straight, lower until arms are at 90 degrees",
-        'squat': "Keep knees aligned, lower until thighs are parallel to ground",
-        'curl': "Maintain even motion, full range of movement",
-        'plank': "Keep back straight and hips level",
-        'pullup': "Pull until chin is over the bar, maintain even arm movement",
-        'lunge': "Keep hips level, lower until back knee nearly touches ground",
-        'press': "Press weights straight overhead with even arm movement",
-        'row': "Maintain straight back while pulling weights toward chest",
-        'goblet_squat': "Hold dumbbell close to chest, squat until thighs are parallel",
-        'lateral_raise': "Raise arms to shoulder level, keep slight bend in elbows",
-        'tricep_extension': "Extend arms fully behind head, keep elbows close",
-        'front_raise': "Raise arms to shoulder level, control the movement",
-        'deadlift': "Hinge at hips, keep back straight, stand tall",
-        'overhead_squat': "Keep arms overhead, squat until thighs are parallel"
-    }
-    
-    if selected_exercise in exercise_tips:
-        st.write(f"💡 **Tip:** {exercise_tips[selected_exercise]}")
+    if exercise_info.tip:
+        st.write(f"💡 **Tip:** {exercise_info.tip}")
     
     # Status indicator
     if st.session_state.is_tracking:
         st.success("✅ Camera active - Pose detection running")
     else:
         st.warning("⚠️ Camera inactive - Click 'Start' to begin tracking")
+    
+    # Live view of the local cameras; the page reruns to refresh the results
+    if fusion and fusion.running:
+        refresh_at = time.monotonic() + CAMERA_REFRESH_SECONDS
+        while fusion.running and time.monotonic() < refresh_at:
+            if fusion.latest_image is not None:
+                camera_view.image(fusion.latest_image, channels="BGR")
+            time.sleep(CAMERA_FRAME_SECONDS)
+        st.rerun()
+    
+    # Live trend charts: draw the session so far once, then send only the new points
+    if processor and webrtc_ctx.state.playing:
+        slots = {}
+        charts = {}
+        cursors = {}
+        drawn = {name: {} for name in TREND_CHARTS}
+        with trends_area:
+            for name, label in TREND_CHARTS.items():
+                series = processor.trends[name]
+                updates, cursors[name] = series.new_points()
+                apply_updates(drawn[name], updates)
+                slots[name] = st.empty()
+                charts[name] = slots[name].line_chart(trend_frame(series, drawn_points(drawn[name]), label),
+                                                      height=150)
+        
+        while webrtc_ctx.state.playing:
+            time.sleep(TREND_REFRESH_SECONDS)
+            for name, label in TREND_CHARTS.items():
+                series = processor.trends[name]
+                updates, cursors[name] = series.new_points(cursors[name])
+                if apply_updates(drawn[name], updates):
+                    # A fetched bucket was merged with newer samples: redraw with the merged min/max
+                    charts[name] = slots[name].line_chart(trend_frame(series, drawn_points(drawn[name]), label),
+                                                          height=150)
+                elif updates:
+                    points = [point for _, bucket_points in updates for point in bucket_points]
+                    charts[name].add_rows(trend_frame(series, points, label))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
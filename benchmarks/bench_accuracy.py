@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Accuracy and latency regression harness over a labeled corpus.
+
+Runs every clip or landmark recording in a directory through pose
+extraction (videos only), the exercise analyzer and the rep counter, and
+reports per exercise:
+
+- rep-count error against the labeled reps
+- rep-boundary timing error: when a rep is counted versus its labeled end
+- bottom latency: when the analyzer enters the rep's bottom state versus the
+  labeled bottom (up/down exercises only)
+- per-frame cost of the analysis (and of the backend for videos)
+
+Items are processed in parallel across cores. The report can be saved and
+compared against a baseline run; the exit status is 1 if any exercise got
+worse, so threshold changes can be checked before merging:
+
+    python -m benchmarks.bench_accuracy corpus/ --output baseline.json
+    python -m benchmarks.bench_accuracy corpus/ --baseline baseline.json
+
+Without real data, --synthetic N evaluates N generated sequences per exercise.
+
+Landmarks extracted from videos are cached by content and backend
+(landmark_cache.py), so reruns after a threshold change skip inference;
+--no-cache forces it.
+
+Corpus layout: videos (.mp4, .mov, .webm, .avi, .mkv) and recordings (.npz
+with 'landmarks' and optional 'timestamps') each have a sidecar JSON label,
+e.g. squat_01.json:
+
+    {"exercise": "squat", "reps": [[1.2, 3.0], [3.6, 5.1]], "bottoms": [2.1, 4.3]}
+
+with rep start/end (and optional bottom) times in seconds. Recordings saved
+from synthetic_landmarks.generate_sequence() carry their labels inline.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from exercise_registry import REGISTRY
+from exercise_utils import EXERCISES
+from landmark_cache import LANDMARK_CACHE_DIR, LandmarkCache
+from offline_analysis import analyze_landmarks, extract_landmarks
+from pose_backends import backend_from_spec
+from synthetic_landmarks import generate_sequence
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.webm', '.avi', '.mkv')
+
+def find_items(directory):
+    """List the labeled videos and recordings in a corpus directory."""
+    items = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        stem, extension = os.path.splitext(name)
+        label_path = os.path.join(directory, stem + '.json')
+        labels = None
+        if os.path.exists(label_path):
+            with open(label_path) as f:
+                labels = json.load(f)
+        if extension.lower() in VIDEO_EXTENSIONS and labels:
+            items.append({'name': name, 'kind': 'video', 'path': path, 'labels': labels})
+        elif extension == '.npz':
+            items.append({'name': name, 'kind': 'recording', 'path': path, 'labels': labels})
+    return items
+
+def synthetic_items(count):
+    """Generation parameters for count varied sequences per exercise."""
+    items = []
+    for exercise in EXERCISES:
+        for seed in range(count):
+            rng = np.random.default_rng(seed)
+            params = {
+                'reps': 8,
+                'tempo': float(rng.uniform(1.2, 3.0)),
+                'noise': float(rng.uniform(0.002, 0.008)),
+                'asymmetry': float(rng.uniform(0.0, 0.3)),
+                'dropout': float(rng.uniform(0.0, 0.03)),
+                'seed': seed
+            }
+            items.append({'name': f'{exercise}_{seed:03d}', 'kind': 'synthetic', 'exercise': exercise,
+                          'params': params})
+    return items
+
+def rep_labels(starts, ends, bottoms, timestamps):
+    """Convert labeled frame indices to times in seconds."""
+    return ([float(timestamps[i]) for i in starts], [float(timestamps[i]) for i in ends],
+            [float(timestamps[i]) for i in bottoms])
+
+def item_exercise(item, labels, data=None):
+    """The exercise from the item's label file, else the one stored in its .npz data."""
+    if 'exercise' in labels:
+        return labels['exercise']
+    if data is not None and 'exercise' in data:
+        return str(data['exercise'])
+    raise ValueError(f"{item['path']}: no exercise in its label file or stored with its landmarks")
+
+def load_item(item, backend_spec, cache_dir=None):
+    """Landmarks, timestamps, exercise, labeled rep times and backend latencies for one item.
+
+    Video landmarks are taken from the landmark cache in cache_dir when given,
+    so only the first run over a corpus pays for inference.
+    """
+    backend_latencies = None
+    if item['kind'] == 'synthetic':
+        sequence = generate_sequence(item['exercise'], **item['params'])
+        landmarks, timestamps, exercise = sequence['landmarks'], sequence['timestamps'], item['exercise']
+        starts, ends, bottoms = rep_labels(sequence['rep_starts'], sequence['rep_ends'],
+                                           sequence['rep_bottoms'], timestamps)
+        return landmarks, timestamps, exercise, starts, ends, bottoms, backend_latencies
+
+    labels = item['labels'] or {}
+    data = None
+    if item['kind'] == 'video':
+        backend = backend_from_spec(backend_spec)
+        try:
+            if cache_dir:
+                extracted = LandmarkCache(cache_dir).extract(item['path'], backend)
+            else:
+                extracted = extract_landmarks(item['path'], backend)
+        finally:
+            backend.close()
+        landmarks, timestamps = extracted['landmarks'], extracted['timestamps']
+        backend_latencies = extracted['latencies']
+    else:
+        data = np.load(item['path'])
+        landmarks = data['landmarks']
+        fps = labels.get('fps', float(data['fps']) if 'fps' in data else 30.0)
+        timestamps = data['timestamps'] if 'timestamps' in data else np.arange(len(landmarks)) / fps
+        if 'rep_starts' in data and 'reps' not in labels:
+            starts, ends, bottoms = rep_labels(data['rep_starts'], data['rep_ends'],
+                                               data['rep_bottoms'] if 'rep_bottoms' in data else [], timestamps)
+            return (landmarks, timestamps, item_exercise(item, labels, data),
+                    starts, ends, bottoms, backend_latencies)
+
+    reps = labels.get('reps', [])
+    return (landmarks, timestamps, item_exercise(item, labels, data), [start for start, _ in reps],
+            [end for _, end in reps], labels.get('bottoms', []), backend_latencies)
+
+def match_reps(rep_times, starts, ends, tolerance):
+    """Signed count-time minus labeled-end for each labeled rep that was counted, in order."""
+    errors = []
+    i = 0
+    for start, end in zip(starts, ends):
+        # Counts before this rep started belong to no labeled rep
+        while i < len(rep_times) and rep_times[i] < start:
+            i += 1
+        if i < len(rep_times) and rep_times[i] <= end + tolerance:
+            errors.append(rep_times[i] - end)
+            i += 1
+    return errors
+
+def bottom_frames(states, timestamps, start, end, up='up', down='down'):
+    """First frame of a labeled rep in its bottom state, per row of (rows, T) states; -1 where never reached.
+
+    Which analyzer state marks the labeled bottom depends on the exercise: a
+    squat's bottom is 'down', but a curl's analyzer calls the curled arm 'up'.
+    So the bottom state is the opposite of the last up/down state at or before
+    the rep's start. Works on state names or STATE_CODES alike.
+    """
+    timestamps = np.asarray(timestamps)
+    rows = len(states)
+    window = np.flatnonzero((timestamps >= start) & (timestamps <= end))
+    if not len(window):
+        return np.full(rows, -1)
+    before = states[:, :window[0] + 1]
+    settled = (before == up) | (before == down)
+    rest = before[np.arange(rows), before.shape[1] - 1 - settled[:, ::-1].argmax(axis=1)]
+    target = np.where(rest == up, down, up)
+    hits = states[:, window] == target[:, np.newaxis]
+    found = hits.any(axis=1) & settled.any(axis=1)
+    return np.where(found, window[hits.argmax(axis=1)], -1)
+
+def bottom_latencies(states, timestamps, starts, ends, bottoms):
+    """When each labeled rep reached its bottom state relative to its labeled bottom, for the reps that did."""
+    states = np.asarray(states)[np.newaxis]
+    latencies = []
+    for start, end, bottom in zip(starts, ends, bottoms):
+        i = bottom_frames(states, timestamps, start, end)[0]
+        if i >= 0:
+            latencies.append(float(timestamps[i]) - bottom)
+    return latencies
+
+def evaluate_item(item, backend_spec='mediapipe', tolerance=0.5, cache_dir=None):
+    """Run one item through the pipeline and score it against its labels."""
+    landmarks, timestamps, exercise, starts, ends, bottoms, backend_latencies = load_item(item, backend_spec,
+                                                                                          cache_dir)
+    start_time = time.perf_counter()
+    analysis = analyze_landmarks(landmarks, timestamps, exercise)
+    wall = time.perf_counter() - start_time
+    boundary_errors = match_reps(analysis['rep_times'], starts, ends, tolerance)
+    latencies = analysis['latencies']
+    return {
+        'name': item['name'],
+        'exercise': exercise,
+        'frames': len(landmarks),
+        'labeled_reps': len(starts),
+        'counted_reps': analysis['rep_count'],
+        'rep_error': analysis['rep_count'] - len(starts),
+        'missed_reps': len(starts) - len(boundary_errors),
+        'boundary_errors': boundary_errors,
+        'bottom_latencies': (bottom_latencies(analysis['states'], timestamps, starts, ends, bottoms)
+                             if REGISTRY[exercise].updown else []),
+        'analysis_us': float(latencies.mean() * 1e6) if len(latencies) else None,
+        'analysis_p99_us': float(np.percentile(latencies, 99) * 1e6) if len(latencies) else None,
+        'analysis_fps': len(landmarks) / wall if wall else None,
+        'backend_ms': (float(np.median(backend_latencies) * 1000)
+                       if backend_latencies is not None and len(backend_latencies) else None)
+    }
+
+def mean_or_none(values):
+    values = [value for value in values if value is not None]
+    return float(np.mean(values)) if values else None
+
+def summarize(results):
+    """Aggregate item results per exercise."""
+    summary = {}
+    for exercise in sorted({result['exercise'] for result in results}):
+        items = [result for result in results if result['exercise'] == exercise]
+        boundary = [error for result in items for error in result['boundary_errors']]
+        bottom = [latency for result in items for latency in result['bottom_latencies']]
+        summary[exercise] = {
+            'items': len(items),
+            'labeled_reps': sum(result['labeled_reps'] for result in items),
+            'counted_reps': sum(result['counted_reps'] for result in items),
+            'missed_reps': sum(result['missed_reps'] for result in items),
+            'rep_mae': float(np.mean([abs(result['rep_error']) for result in items])),
+            'exact': float(np.mean([result['rep_error'] == 0 for result in items])),
+            'boundary_mae_ms': float(np.mean(np.abs(boundary)) * 1000) if boundary else None,
+            'boundary_bias_ms': float(np.mean(boundary) * 1000) if boundary else None,
+            'bottom_latency_ms': float(np.mean(bottom) * 1000) if bottom else None,
+            'analysis_us': mean_or_none([result['analysis_us'] for result in items]),
+            'analysis_p99_us': mean_or_none([result['analysis_p99_us'] for result in items]),
+            'backend_ms': mean_or_none([result['backend_ms'] for result in items])
+        }
+    return summary
+
+def format_value(value, width, spec):
+    """Right-align a number in a column, or a dash when there is no value."""
+    return (format(value, spec) if value is not None else '-').rjust(width)
+
+def delta(value, baseline, key):
+    if value is None or baseline is None or baseline.get(key) is None:
+        return None
+    return value - baseline[key]
+
+def find_regressions(summary, baseline, timing_tolerance_ms):
+    """Exercises whose rep-count or boundary error got worse than in the baseline."""
+    regressions = []
+    for exercise, stats in summary.items():
+        previous = baseline.get(exercise)
+        if not previous:
+            continue
+        if stats['rep_mae'] > previous['rep_mae'] + 1e-9:
+            regressions.append(f"{exercise}: rep-count MAE {previous['rep_mae']:.2f} -> {stats['rep_mae']:.2f}")
+        change = delta(stats['boundary_mae_ms'], previous, 'boundary_mae_ms')
+        if change is not None and change > timing_tolerance_ms:
+            regressions.append(f"{exercise}: boundary MAE {previous['boundary_mae_ms']:.0f} -> "
+                               f"{stats['boundary_mae_ms']:.0f} ms")
+    return regressions
+
+def print_summary(summary, baseline=None):
+    header = (f"{'exercise':<18}{'items':>6}{'reps':>6}{'counted':>8}{'rep MAE':>9}{'exact':>7}"
+              f"{'bound ms':>10}{'btm ms':>9}{'us/frame':>10}{'model ms':>10}")
+    if baseline:
+        header += f"{'Δrep MAE':>10}{'Δbound ms':>11}{'Δus':>8}"
+    print(header)
+    for exercise, stats in summary.items():
+        line = (f"{exercise:<18}{stats['items']:>6}{stats['labeled_reps']:>6}{stats['counted_reps']:>8}"
+                f"{stats['rep_mae']:>9.2f}{stats['exact']:>7.0%}{format_value(stats['boundary_mae_ms'], 10, '.0f')}"
+                f"{format_value(stats['bottom_latency_ms'], 9, '.0f')}{format_value(stats['analysis_us'], 10, '.1f')}"
+                f"{format_value(stats['backend_ms'], 10, '.1f')}")
+        if baseline:
+            previous = baseline.get(exercise, {})
+            line += (f"{format_value(delta(stats['rep_mae'], previous, 'rep_mae'), 10, '+.2f')}"
+                     f"{format_value(delta(stats['boundary_mae_ms'], previous, 'boundary_mae_ms'), 11, '+.0f')}"
+                     f"{format_value(delta(stats['analysis_us'], previous, 'analysis_us'), 8, '+.1f')}")
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="Directory of labeled clips and recordings")
+    parser.add_argument("--synthetic", type=int, default=0, help="Also evaluate N synthetic sequences per exercise")
+    parser.add_argument("--backend", default="mediapipe", help="Pose backend spec used for videos")
+    parser.add_argument("--cache-dir", default=LANDMARK_CACHE_DIR,
+                        help="Landmark cache for videos, so reruns skip inference")
+    parser.add_argument("--no-cache", action="store_true", help="Always run inference on videos")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Seconds after a labeled rep end that a count still matches it")
+    parser.add_argument("--timing-tolerance-ms", type=float, default=20.0,
+                        help="Boundary MAE increase allowed before flagging a regression")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--baseline", help="Report JSON from a previous run to compare against")
+    args = parser.parse_args()
+
+    items = (find_items(args.corpus) if args.corpus else []) + synthetic_items(args.synthetic)
+    if not items:
+        parser.error("nothing to evaluate: give a corpus directory or --synthetic N")
+
+    start = time.perf_counter()
+    evaluate = partial(evaluate_item, backend_spec=args.backend, tolerance=args.tolerance,
+                       cache_dir=None if args.no_cache else args.cache_dir)
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = list(executor.map(evaluate, items))
+    elapsed = time.perf_counter() - start
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['exercises']
+
+    summary = summarize(results)
+    print_summary(summary, baseline)
+    print(f"\n{len(items)} item(s), {sum(result['frames'] for result in results)} frames in {elapsed:.1f}s "
+          f"on {args.jobs or os.cpu_count()} worker(s)")
+
+    if args.output:
+        report = {'backend': args.backend, 'exercises': summary, 'items': results}
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        regressions = find_regressions(summary, baseline, args.timing_tolerance_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compare pose backends on the same video clips.
+
+For every clip and backend this reports inference latency (p50/p99),
+throughput, detection rate, rep count and how well the per-frame states and
+rep counts agree with the first (reference) backend.
+
+Backends are given as 'name:key=value,...' specs, for example:
+    python -m benchmarks.bench_backends clips/squat.mp4 --exercise squat \\
+        --backend mediapipe:model_complexity=1 \\
+        --backend mediapipe:model_complexity=0 \\
+        --backend opencv_dnn:model_path=models/pose_landmark_lite.onnx
+"""
+
+import argparse
+
+import numpy as np
+
+from exercise_registry import REGISTRY
+from offline_analysis import analyze_landmarks, extract_landmarks
+from pose_backends import backend_from_spec
+
+def state_agreement(states, reference):
+    """Fraction of frames analyzed by both runs where the states match."""
+    pairs = [(a, b) for a, b in zip(states, reference) if a is not None and b is not None]
+    if not pairs:
+        return float("nan")
+    return sum(a == b for a, b in pairs) / len(pairs)
+
+def run_backend(spec, clip, exercise, max_frames):
+    backend = backend_from_spec(spec)
+    try:
+        extracted = extract_landmarks(clip, backend, max_frames=max_frames)
+    finally:
+        backend.close()
+    analysis = analyze_landmarks(extracted["landmarks"], extracted["timestamps"], exercise)
+    latencies = extracted["latencies"]
+    detected = ~np.isnan(extracted["landmarks"]).any(axis=(1, 2))
+    return {
+        "frames": len(latencies),
+        "p50_ms": np.percentile(latencies, 50) * 1000 if len(latencies) else float("nan"),
+        "p99_ms": np.percentile(latencies, 99) * 1000 if len(latencies) else float("nan"),
+        "fps": len(latencies) / latencies.sum() if latencies.sum() else float("nan"),
+        "detected": detected.mean() if len(detected) else float("nan"),
+        "reps": analysis["rep_count"],
+        "states": analysis["states"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clips", nargs="+", help="Video files to run every backend on")
+    parser.add_argument("--exercise", required=True, choices=REGISTRY.keys)
+    parser.add_argument("--backend", action="append", dest="backends",
+                        help="Backend spec; the first one is the reference (default: mediapipe)")
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+    backends = args.backends or ["mediapipe"]
+
+    header = f"{'backend':<40}{'frames':>8}{'p50 ms':>9}{'p99 ms':>9}{'fps':>8}{'detect':>8}{'reps':>6}{'Δreps':>7}{'agree':>7}"
+    for clip in args.clips:
+        print(f"\n{clip} ({REGISTRY.specs[args.exercise].name})")
+        print(header)
+        reference = None
+        for spec in backends:
+            result = run_backend(spec, clip, args.exercise, args.max_frames)
+            if reference is None:
+                reference = result
+            rep_diff = result["reps"] - reference["reps"]
+            agreement = state_agreement(result["states"], reference["states"])
+            print(f"{spec:<40}{result['frames']:>8}{result['p50_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                  f"{result['fps']:>8.1f}{result['detected']:>8.0%}{result['reps']:>6}{rep_diff:>+7}{agreement:>7.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Load test of the landmark ingestion gateway with thousands of sessions.
+
+Starts landmark_gateway.py in its own process and opens K WebSocket sessions
+against it from this one. Each session plays a synthetic exercise sequence
+at --fps, sending the frames of every --batch-ms as one binary message, and
+waits for the reply. For each K it reports the frames per second the gateway
+absorbed, round-trip latency percentiles, the gateway's CPU use and its
+mean batch size, and it checks every session's rep count against the
+per-frame pipeline (offline_analysis) on the same frames:
+
+    python -m benchmarks.bench_gateway --sessions 250 500 1000 2000 --seconds 10
+    python -m benchmarks.bench_gateway --core --sessions 1000 4000
+
+--core skips the network and measures BatchAnalyzer.process alone.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+
+from landmark_gateway import BatchAnalyzer, encode_frames
+from offline_analysis import analyze_landmarks
+from synthetic_landmarks import generate_sequence
+
+EXERCISES = ('squat', 'pushup', 'curl', 'lunge', 'press', 'deadlift', 'pullup')
+
+def make_sequences(fps, reps):
+    """Synthetic sequences, with the frames at which the per-frame pipeline counts each rep."""
+    sequences = {}
+    for i, exercise in enumerate(EXERCISES):
+        sequence = generate_sequence(exercise, reps=reps, fps=fps, noise=0.004, dropout=0.02, seed=i)
+        rep_times = analyze_landmarks(sequence['landmarks'], sequence['timestamps'], exercise)['rep_times']
+        sequence['rep_frames'] = np.searchsorted(sequence['timestamps'], rep_times)
+        sequences[exercise] = sequence
+    return sequences
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def gateway_stats(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+        return json.load(response)
+
+async def run_session(uri, sequence, batch, fps, deadline, latencies, offset):
+    """Send one sequence in real time; returns (frames sent, last reply, expected reps)."""
+    from websockets.asyncio.client import connect
+
+    timestamps = sequence['timestamps']
+    landmarks = sequence['landmarks']
+    messages = [encode_frames(timestamps[i:i + batch], landmarks[i:i + batch])
+                for i in range(0, len(timestamps), batch)]
+    reply = None
+    sent = 0
+    async with connect(uri, compression=None, open_timeout=60) as connection:
+        # Spread the sessions over one batch interval like independent devices
+        await asyncio.sleep(offset)
+        start = time.perf_counter()
+        for i, message in enumerate(messages):
+            due = start + (i + 1) * batch / fps
+            if due > deadline:
+                break
+            await asyncio.sleep(max(due - time.perf_counter(), 0))
+            sent_at = time.perf_counter()
+            await connection.send(message)
+            reply = json.loads(await connection.recv())
+            latencies.append(time.perf_counter() - sent_at)
+            sent += min(batch, len(timestamps) - i * batch)
+    expected = int(np.searchsorted(sequence['rep_frames'], sent))
+    return sent, reply, expected
+
+async def run_step(port, sessions, sequences, args):
+    latencies = []
+    batch = max(int(round(args.fps * args.batch_ms / 1000)), 1)
+    interval = batch / args.fps
+    deadline = time.perf_counter() + args.seconds + interval
+    tasks = []
+    for k in range(sessions):
+        exercise = EXERCISES[k % len(EXERCISES)]
+        uri = f"ws://127.0.0.1:{port}/?exercise={exercise}"
+        tasks.append(run_session(uri, sequences[exercise], batch, args.fps, deadline, latencies,
+                                 interval * k / sessions))
+
+    before = gateway_stats(port)
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.perf_counter() - start
+    after = gateway_stats(port)
+
+    failed = sum(isinstance(outcome, BaseException) for outcome in outcomes)
+    finished = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+    frames = sum(sent for sent, _, _ in finished)
+    wrong = sum(reply is None or reply.get('reps') != expected for _, reply, expected in finished)
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    batches = after['batches'] - before['batches']
+    return {
+        'sessions': sessions,
+        'target_fps': args.fps * sessions,
+        'frames_per_second': frames / args.seconds,
+        'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'latency_p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'gateway_cpu_percent': (after['cpu_seconds'] - before['cpu_seconds']) / wall * 100,
+        'mean_batch_frames': (after['frames'] - before['frames']) / batches if batches else 0.0,
+        'failed_sessions': failed,
+        'wrong_rep_counts': wrong
+    }
+
+def run_core(sessions, sequences, args):
+    """Analysis cost without the network: frames per second through BatchAnalyzer.process."""
+    analyzer = BatchAnalyzer()
+    batch = max(int(round(args.fps * args.batch_ms / 1000)), 1)
+    opened = [(analyzer.open(EXERCISES[k % len(EXERCISES)]), sequences[EXERCISES[k % len(EXERCISES)]])
+              for k in range(sessions)]
+    length = min(len(sequence['timestamps']) for sequence in sequences.values())
+    frames = 0
+    start = time.perf_counter()
+    for i in range(0, length - batch + 1, batch):
+        analyzer.process([(session, sequence['timestamps'][i:i + batch], sequence['landmarks'][i:i + batch])
+                          for session, sequence in opened])
+        frames += batch * sessions
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, elapsed / (length // batch) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[250, 500, 1000, 2000], help="Session counts to try")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each step")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frames per second per session")
+    parser.add_argument("--batch-ms", type=float, default=250.0, help="Frames sent per message, in milliseconds")
+    parser.add_argument("--window-ms", type=float, default=10.0, help="Micro-batching window of the gateway")
+    parser.add_argument("--core", action="store_true", help="Measure BatchAnalyzer.process without the network")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    sequences = make_sequences(args.fps, reps=max(int(args.seconds), 10))
+
+    if args.core:
+        print(f"{'sessions':>8}{'frames/s':>14}{'ms/batch':>10}")
+        for sessions in args.sessions:
+            throughput, per_batch = run_core(sessions, sequences, args)
+            print(f"{sessions:>8}{throughput:>14,.0f}{per_batch:>10.1f}")
+        return
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, 'landmark_gateway.py', '--host', '127.0.0.1', '--port', str(port),
+         '--window-ms', str(args.window_ms)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    results = []
+    try:
+        server.stdout.readline()
+        print(f"{'sessions':>8}{'target f/s':>12}{'frames/s':>12}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'cpu %':>8}{'batch':>8}{'failed':>8}{'wrong':>7}")
+        for sessions in args.sessions:
+            result = asyncio.run(run_step(port, sessions, sequences, args))
+            results.append(result)
+            print(f"{sessions:>8}{result['target_fps']:>12,.0f}{result['frames_per_second']:>12,.0f}"
+                  f"{result['latency_p50_ms']:>9.1f}{result['latency_p99_ms']:>9.1f}"
+                  f"{result['gateway_cpu_percent']:>8.0f}{result['mean_batch_frames']:>8.0f}"
+                  f"{result['failed_sessions']:>8}{result['wrong_rep_counts']:>7}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cores': os.cpu_count(), 'batch_ms': args.batch_ms, 'steps': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
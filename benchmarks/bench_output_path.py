@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Compare allocation rate and GC pressure of the overlay output path at 30 fps.
+
+legacy: draw on an RGB copy, convert back to BGR and wrap the new ndarray
+        in a new av.VideoFrame (what VideoTransformerBase.transform did)
+pooled: draw straight into a reused frame from FramePool (PoseTransformer.recv)
+
+Run from the repository root:
+    python -m benchmarks.bench_output_path --seconds 10
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import av
+import cv2
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from frame_pool import FramePool, resize_buffer
+
+mp_pose = mp.solutions.pose
+mp_drawing = mp.solutions.drawing_utils
+
+def make_landmarks():
+    """A fixed standing pose so both paths draw the same skeleton."""
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for i in range(33):
+        landmark_list.landmark.add(x=0.3 + 0.4 * (i % 2), y=0.1 + 0.8 * i / 33, z=0.0, visibility=1.0)
+    return landmark_list
+
+def draw_overlay(img, landmark_list, connection_color):
+    mp_drawing.draw_landmarks(
+        img,
+        landmark_list,
+        mp_pose.POSE_CONNECTIONS,
+        mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=2),
+        mp_drawing.DrawingSpec(color=connection_color, thickness=2)
+    )
+    cv2.putText(img, "State: UP", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    cv2.putText(img, "Reps: 3", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
+
+class LegacyPath:
+    def __init__(self):
+        self.new_frames = 0
+
+    def __call__(self, frame, landmark_list):
+        img = frame.to_ndarray(format="bgr24")
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        draw_overlay(img_rgb, landmark_list, (255, 0, 0))
+        img_bgr = cv2.cvtColor(img_rgb, cv2.COLOR_RGB2BGR)
+        self.new_frames += 1
+        return av.VideoFrame.from_ndarray(img_bgr, format="bgr24")
+
+class PooledPath:
+    def __init__(self):
+        self.pool = FramePool()
+        self.rgb_buffer = None
+
+    @property
+    def new_frames(self):
+        return self.pool.allocations
+
+    def __call__(self, frame, landmark_list):
+        img = frame.to_ndarray(format="bgr24")
+        self.rgb_buffer = resize_buffer(self.rgb_buffer, img.shape)
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self.rgb_buffer)
+        out_frame, out_img = self.pool.acquire(frame.width, frame.height)
+        np.copyto(out_img, img)
+        draw_overlay(out_img, landmark_list, (0, 0, 255))
+        out_frame.pts = frame.pts
+        if frame.time_base is not None:
+            out_frame.time_base = frame.time_base
+        return out_frame
+
+def run(path, seconds, fps, width, height, paced):
+    frame = av.VideoFrame.from_ndarray(
+        np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8),
+        format="bgr24"
+    )
+    landmark_list = make_landmarks()
+    collections = [0, 0, 0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[info["generation"]] += 1
+
+    # Warm up so one-time pool and buffer allocations are not measured
+    for _ in range(10):
+        path(frame, landmark_list)
+    warm_frames = path.new_frames
+
+    gc.callbacks.append(on_gc)
+    tracemalloc.start()
+    transient = []
+    latencies = []
+    n_frames = int(seconds * fps)
+    start = time.perf_counter()
+    for i in range(n_frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        path(frame, landmark_list)
+        latencies.append(time.perf_counter() - t0)
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - before)
+        if paced:
+            delay = start + (i + 1) / fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    gc.callbacks.remove(on_gc)
+
+    new_frames = path.new_frames - warm_frames
+    frame_bytes = width * height * 3
+    return {
+        "traced_kb_per_frame": np.mean(transient) / 1024,
+        "new_av_frames_per_s": new_frames / elapsed,
+        "untraced_av_mb_per_s": new_frames * frame_bytes / elapsed / 1e6,
+        "gc_gen0_per_s": collections[0] / elapsed,
+        "gc_gen1_per_s": collections[1] / elapsed,
+        "gc_gen2_per_s": collections[2] / elapsed,
+        "mean_ms": np.mean(latencies) * 1000,
+        "p99_ms": np.percentile(latencies, 99) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--unpaced", action="store_true", help="Run as fast as possible instead of at --fps")
+    args = parser.parse_args()
+
+    results = {}
+    for name, path in (("legacy", LegacyPath()), ("pooled", PooledPath())):
+        results[name] = run(path, args.seconds, args.fps, args.width, args.height, not args.unpaced)
+
+    print(f"Output path at {args.fps:g} fps, {args.width}x{args.height}, {args.seconds:g}s")
+    print(f"{'metric':<24}{'legacy':>12}{'pooled':>12}")
+    for metric in results["legacy"]:
+        print(f"{metric:<24}{results['legacy'][metric]:>12.2f}{results['pooled'][metric]:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+How much of the inference delay the landmark predictor hides from the overlay.
+
+Pose inference runs on every --stride-th frame and, being pipelined, its
+result is only ready --stride frames later (plus --latency extra frames).
+Every frame is then drawn either with the newest available pose as is
+(hold) or with it extrapolated to the frame's own time by LandmarkPredictor
+(predict). Both are compared with the true pose of that frame:
+
+- delay: the time shift that best aligns the drawn skeleton with the true
+  motion, i.e. how far the overlay visibly trails the user
+- error: mean distance of the drawn landmarks from the true ones (normalized)
+
+The predictor should cut the delay by at least one inference interval
+without drawing the landmarks further from the true ones than holding
+does; the exit status is 1 when it does not:
+
+    python -m benchmarks.bench_prediction --synthetic 3 --stride 2 3
+    python -m benchmarks.bench_prediction corpus/ --stride 2
+
+Synthetic sequences are compared with the same motion generated without
+noise; recordings are compared with their own later frames.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from benchmarks.bench_accuracy import find_items, load_item, synthetic_items
+from landmark_predictor import LandmarkPredictor
+from synthetic_landmarks import generate_sequence
+
+def ground_truth(item, landmarks):
+    """Noise-free landmarks of a synthetic item, or the recorded landmarks themselves."""
+    if item['kind'] != 'synthetic':
+        return landmarks
+    params = {**item['params'], 'noise': 0.0, 'dropout': 0.0}
+    return generate_sequence(item['exercise'], **params)['landmarks']
+
+def overlay_poses(landmarks, timestamps, stride, latency, predictor=None):
+    """The pose drawn on every frame when inference results arrive latency frames late."""
+    drawn = np.full_like(landmarks, np.nan)
+    newest = None
+    fed = -1
+    for i in range(len(landmarks)):
+        available = ((i - latency) // stride) * stride
+        while fed < available:
+            fed += 1
+            if fed % stride == 0:
+                newest = None if np.isnan(landmarks[fed]).any() else fed
+                if predictor:
+                    predictor.update(landmarks[fed], timestamps[fed])
+        if newest is None:
+            continue
+        pose = predictor.predict(timestamps[i]) if predictor else landmarks[newest]
+        if pose is not None:
+            drawn[i] = pose
+    return drawn
+
+def perceived_delay(drawn, truth, max_frames=12, resolution=0.05):
+    """Shift in frames that best aligns the moving landmarks of drawn with truth."""
+    moving = np.flatnonzero(np.nanstd(truth[:, :, 1], axis=0) > 0.02)
+    valid = ~np.isnan(drawn[:, 0, 0]) & ~np.isnan(truth[:, 0, 0])
+    frames = np.arange(len(truth))
+    known = ~np.isnan(truth[:, 0, 0])
+    curves = [truth[known, j, 1] for j in moving]
+    best_error, best_shift = None, 0.0
+    for shift in np.arange(-max_frames / 3, max_frames, resolution):
+        source = frames - shift
+        rows = valid & (source >= 0) & (source <= len(truth) - 1)
+        if not rows.any():
+            continue
+        shifted = np.stack([np.interp(source[rows], frames[known], curve) for curve in curves], axis=1)
+        error = np.mean((drawn[rows][:, moving, 1] - shifted) ** 2)
+        if best_error is None or error < best_error:
+            best_error, best_shift = error, shift
+    return best_shift
+
+def landmark_error(drawn, truth):
+    """Mean distance of the visible drawn landmarks from the true ones."""
+    distance = np.linalg.norm(drawn[:, :, :2] - truth[:, :, :2], axis=2)
+    visible = truth[:, :, 3] > 0.5
+    return float(np.nanmean(distance[visible]))
+
+def evaluate_item(item, strides, latency, backend_spec='mediapipe'):
+    landmarks, timestamps, exercise, _, _, _, _ = load_item(item, backend_spec)
+    truth = ground_truth(item, landmarks)
+    frame_ms = float(np.median(np.diff(timestamps))) * 1000
+    results = []
+    for stride in strides:
+        hold = overlay_poses(landmarks, timestamps, stride, stride + latency)
+        predicted = overlay_poses(landmarks, timestamps, stride, stride + latency, LandmarkPredictor())
+        results.append({
+            'name': item['name'],
+            'exercise': exercise,
+            'stride': stride,
+            'interval_ms': stride * frame_ms,
+            'hold_delay_ms': perceived_delay(hold, truth) * frame_ms,
+            'predict_delay_ms': perceived_delay(predicted, truth) * frame_ms,
+            'hold_error': landmark_error(hold, truth),
+            'predict_error': landmark_error(predicted, truth)
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="Directory of labeled recordings (videos are skipped)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Also evaluate N synthetic sequences per exercise")
+    parser.add_argument("--stride", type=int, nargs="+", default=[2, 3], help="Frames between inferences")
+    parser.add_argument("--latency", type=int, default=0, help="Extra frames before an inference result is ready")
+    args = parser.parse_args()
+
+    items = [item for item in (find_items(args.corpus) if args.corpus else []) if item['kind'] == 'recording']
+    items += [item for item in synthetic_items(args.synthetic) if item['exercise'] != 'plank']
+    if not items:
+        parser.error("nothing to evaluate: give a directory of recordings or --synthetic N")
+
+    results = [result for item in items for result in evaluate_item(item, args.stride, args.latency)]
+    print(f"{'exercise':<18}{'stride':>7}{'interval':>10}{'hold ms':>9}{'pred ms':>9}{'hidden':>8}"
+          f"{'hold err':>10}{'pred err':>10}")
+    failures = []
+    for exercise in sorted({result['exercise'] for result in results}):
+        for stride in args.stride:
+            rows = [r for r in results if r['exercise'] == exercise and r['stride'] == stride]
+            interval = np.mean([r['interval_ms'] for r in rows])
+            hold = np.mean([r['hold_delay_ms'] for r in rows])
+            predicted = np.mean([r['predict_delay_ms'] for r in rows])
+            hold_error = np.mean([r['hold_error'] for r in rows])
+            predict_error = np.mean([r['predict_error'] for r in rows])
+            print(f"{exercise:<18}{stride:>7}{interval:>10.0f}{hold:>9.0f}{predicted:>9.0f}{hold - predicted:>8.0f}"
+                  f"{hold_error:>10.4f}{predict_error:>10.4f}")
+            if hold - predicted < interval:
+                failures.append(f"{exercise} stride {stride}: hid {hold - predicted:.0f} ms of a "
+                                f"{interval:.0f} ms inference interval")
+            if predict_error > hold_error:
+                failures.append(f"{exercise} stride {stride}: error {predict_error:.4f} predicted, "
+                                f"{hold_error:.4f} held")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("\nPASS: the overlay delay dropped by at least one inference interval everywhere, with no larger error")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Compare the rep counting methods (rep_counter.REP_COUNTERS) on the same data.
+
+Every item of a labeled corpus, plus --synthetic N generated sequences per
+exercise at each --range-of-motion, is analyzed once per method. Per
+exercise and method it reports the rep-count error, how many labeled reps
+were missed, and when reps are counted relative to their labeled end
+(negative = before the athlete is back at the start position):
+
+    python -m benchmarks.bench_rep_counters --synthetic 5
+    python -m benchmarks.bench_rep_counters corpus/ --range-of-motion 1.0
+
+Partial ranges of motion are where fixed state thresholds fail: a squat
+that stops at 100 degrees never reaches the 'down' state. The last column
+is the analysis cost per frame, analyzer included, so the difference
+between methods is the counter's own cost.
+
+Corpus layout and labels are the same as for bench_accuracy.
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from benchmarks.bench_accuracy import find_items, format_value, load_item, match_reps, synthetic_items
+from landmark_cache import LANDMARK_CACHE_DIR
+from offline_analysis import analyze_landmarks
+from rep_counter import REP_COUNTERS, rep_signal
+
+def range_items(count, ranges):
+    """synthetic_items() repeated at each range of motion, for exercises that count reps."""
+    items = []
+    for range_of_motion in ranges:
+        for item in synthetic_items(count):
+            if rep_signal(item['exercise'])[0] is None:
+                continue
+            params = {**item['params'], 'range_of_motion': range_of_motion}
+            items.append({**item, 'name': f"{item['name']}@{range_of_motion:g}", 'params': params,
+                          'range_of_motion': range_of_motion})
+    return items
+
+def evaluate_item(item, backend_spec='mediapipe', tolerance=0.5, cache_dir=None):
+    """Score every counting method on one item."""
+    landmarks, timestamps, exercise, starts, ends, _, _ = load_item(item, backend_spec, cache_dir)
+    results = []
+    for method in REP_COUNTERS:
+        start_time = time.perf_counter()
+        analysis = analyze_landmarks(landmarks, timestamps, exercise, method=method)
+        wall = time.perf_counter() - start_time
+        boundary_errors = match_reps(analysis['rep_times'], starts, ends, tolerance)
+        results.append({
+            'name': item['name'],
+            'exercise': exercise,
+            'method': method,
+            'range_of_motion': item.get('range_of_motion'),
+            'labeled_reps': len(starts),
+            'counted_reps': analysis['rep_count'],
+            'rep_error': analysis['rep_count'] - len(starts),
+            'missed_reps': len(starts) - len(boundary_errors),
+            'boundary_errors': boundary_errors,
+            'analysis_us': wall / max(len(landmarks), 1) * 1e6
+        })
+    return results
+
+def summarize(results):
+    """Aggregate item results per exercise and method."""
+    summary = {}
+    for exercise in sorted({result['exercise'] for result in results}):
+        summary[exercise] = {}
+        for method in REP_COUNTERS:
+            items = [result for result in results if result['exercise'] == exercise and result['method'] == method]
+            boundary = [error for result in items for error in result['boundary_errors']]
+            summary[exercise][method] = {
+                'items': len(items),
+                'labeled_reps': sum(result['labeled_reps'] for result in items),
+                'counted_reps': sum(result['counted_reps'] for result in items),
+                'missed_reps': sum(result['missed_reps'] for result in items),
+                'rep_mae': float(np.mean([abs(result['rep_error']) for result in items])),
+                'exact': float(np.mean([result['rep_error'] == 0 for result in items])),
+                'boundary_bias_ms': float(np.mean(boundary) * 1000) if boundary else None,
+                'boundary_mae_ms': float(np.mean(np.abs(boundary)) * 1000) if boundary else None,
+                'analysis_us': float(np.mean([result['analysis_us'] for result in items]))
+            }
+    return summary
+
+def print_summary(summary):
+    print(f"{'exercise':<18}{'method':<11}{'reps':>6}{'counted':>8}{'missed':>8}{'rep MAE':>9}{'exact':>7}"
+          f"{'bias ms':>9}{'bound ms':>10}{'us/frame':>10}")
+    for exercise, methods in summary.items():
+        for method, stats in methods.items():
+            print(f"{exercise:<18}{method:<11}{stats['labeled_reps']:>6}{stats['counted_reps']:>8}"
+                  f"{stats['missed_reps']:>8}{stats['rep_mae']:>9.2f}{stats['exact']:>7.0%}"
+                  f"{format_value(stats['boundary_bias_ms'], 9, '+.0f')}"
+                  f"{format_value(stats['boundary_mae_ms'], 10, '.0f')}{stats['analysis_us']:>10.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="Directory of labeled clips and recordings")
+    parser.add_argument("--synthetic", type=int, default=0, help="Also evaluate N synthetic sequences per exercise")
+    parser.add_argument("--range-of-motion", default="1.0,0.8,0.6",
+                        help="Comma-separated ranges of motion of the synthetic sequences")
+    parser.add_argument("--backend", default="mediapipe", help="Pose backend spec used for videos")
+    parser.add_argument("--cache-dir", default=LANDMARK_CACHE_DIR, help="Landmark cache for videos")
+    parser.add_argument("--no-cache", action="store_true", help="Always run inference on videos")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Seconds after a labeled rep end that a count still matches it")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    ranges = [float(value) for value in args.range_of_motion.split(',')]
+    items = (find_items(args.corpus) if args.corpus else []) + range_items(args.synthetic, ranges)
+    if not items:
+        parser.error("nothing to evaluate: give a corpus directory or --synthetic N")
+
+    start = time.perf_counter()
+    evaluate = partial(evaluate_item, backend_spec=args.backend, tolerance=args.tolerance,
+                       cache_dir=None if args.no_cache else args.cache_dir)
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = [result for item_results in executor.map(evaluate, items) for result in item_results]
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results)
+    print_summary(summary)
+    print(f"\n{len(items)} item(s) x {len(REP_COUNTERS)} methods in {elapsed:.1f}s")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'exercises': summary, 'items': results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Frame latency versus number of concurrent sessions, with and without the
+ThreadBudgetManager.
+
+Each simulated session runs its own MediaPipe backend in a thread and feeds
+it frames at --fps, doing the same OpenCV conversions as PoseTransformer.
+
+    python -m benchmarks.bench_thread_budget --sessions 1 2 4 8 --seconds 10
+"""
+
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from pose_backends import MediaPipeBackend
+from thread_budget import ThreadBudgetManager
+
+def run_session(lease, image, fps, seconds, latencies, start_barrier):
+    if lease:
+        backend = lease.create(MediaPipeBackend)
+        lease.bind_current_thread()
+    else:
+        backend = MediaPipeBackend()
+    rgb = np.empty_like(image)
+    start_barrier.wait()
+
+    start = time.perf_counter()
+    for i in range(int(fps * seconds)):
+        t0 = time.perf_counter()
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb)
+        backend.process(rgb)
+        latencies.append(time.perf_counter() - t0)
+        delay = start + (i + 1) / fps - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    backend.close()
+    if lease:
+        lease.release()
+
+def run(sessions, managed, image, fps, seconds):
+    manager = ThreadBudgetManager() if managed else None
+    barrier = threading.Barrier(sessions)
+    latencies = [[] for _ in range(sessions)]
+    threads = []
+    for i in range(sessions):
+        lease = manager.acquire() if manager else None
+        thread = threading.Thread(target=run_session, args=(lease, image, fps, seconds, latencies[i], barrier))
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+
+    all_latencies = np.concatenate([np.array(values) for values in latencies])
+    return np.percentile(all_latencies, 50) * 1000, np.percentile(all_latencies, 99) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    image = np.random.default_rng(0).integers(0, 255, (args.height, args.width, 3), dtype=np.uint8)
+    default_opencv_threads = cv2.getNumThreads()
+
+    print(f"{'sessions':>8}{'p50 ms':>10}{'p99 ms':>10}{'p50 ms':>12}{'p99 ms':>10}")
+    print(f"{'':>8}{'unmanaged':>20}{'managed':>22}")
+    for sessions in args.sessions:
+        cv2.setNumThreads(default_opencv_threads)
+        unmanaged = run(sessions, False, image, args.fps, args.seconds)
+        managed = run(sessions, True, image, args.fps, args.seconds)
+        print(f"{sessions:>8}{unmanaged[0]:>10.1f}{unmanaged[1]:>10.1f}{managed[0]:>12.1f}{managed[1]:>10.1f}")
+
+if __name__ == "__main__":
+    main()
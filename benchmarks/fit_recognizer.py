@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Fit and check the exercise recognizer's posture weights on synthetic sequences.
+
+ExerciseRecognizer scores every exercise as log-odds: CYCLE_WEIGHT times
+the down/up cycles of the exercise's own state rule plus POSTURE_WEIGHTS
+times the window's posture cues. This fits both by multinomial logistic
+regression on windows of synthetic sequences with varied tempo, range of
+motion, asymmetry, camera angle and noise, then runs the recognizer on
+held-out sequences:
+
+    python -m benchmarks.fit_recognizer --train 12 --test 3
+    python -m benchmarks.fit_recognizer --check      # current weights only
+
+For each exercise it reports the share of frames recognized correctly
+and wrongly once the recognizer had enough frames, and the label it ended
+on. It also shows, over held-out windows, how many classifications clear
+each confidence bar and how often those are right, which is what
+MIN_CONFIDENCE is chosen from. The fitted table is printed for pasting
+into exercise_recognition.py; the exit status is 1 when any held-out
+sequence ends on the wrong exercise.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from exercise_recognition import (
+    CYCLE_WEIGHT,
+    EXERCISE_KEYS,
+    MIN_CONFIDENCE,
+    POSTURE_FEATURES,
+    POSTURE_MATRIX,
+    ExerciseRecognizer,
+    window_cues
+)
+from synthetic_landmarks import EXERCISE_MOTIONS, generate_sequence
+
+# Confidence bars reported for choosing MIN_CONFIDENCE
+CONFIDENCE_BARS = (0.5, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+def sequence_params(count, seed):
+    """count varied generate_sequence() settings per exercise, as (exercise, kwargs) pairs."""
+    rng = np.random.default_rng(seed)
+    params = []
+    for exercise in EXERCISE_KEYS:
+        for _ in range(count):
+            params.append((exercise, {
+                'reps': 4,
+                'tempo': float(rng.uniform(1.5, 3.0)),
+                'range_of_motion': float(rng.uniform(0.75, 1.0)),
+                'asymmetry': float(rng.uniform(0.0, 0.3)),
+                'camera_angle': float(EXERCISE_MOTIONS[exercise]['camera'] + rng.uniform(-30, 30)),
+                'noise': float(rng.uniform(0.002, 0.008)),
+                'dropout': 0.02,
+                'seed': int(rng.integers(1 << 31))
+            }))
+    return params
+
+def detected_frames(exercise, params):
+    """The frames a recognizer is fed: those where somebody was detected."""
+    landmarks = generate_sequence(exercise, **params)['landmarks']
+    return landmarks[~np.isnan(landmarks).any(axis=(1, 2))]
+
+def window_samples(params, window_size, min_frames, stride):
+    """Posture cues, cycles and labels of every window the recognizer would classify."""
+    postures, cycles, labels = [], [], []
+    for exercise, kwargs in params:
+        frames = detected_frames(exercise, kwargs)
+        for end in range(min_frames, len(frames) + 1, stride):
+            posture, cycle = window_cues(frames[max(end - window_size, 0):end])
+            postures.append(posture)
+            cycles.append(cycle)
+            labels.append(EXERCISE_KEYS.index(exercise))
+    return np.array(postures), np.array(cycles), np.array(labels)
+
+def probabilities(postures, cycles, weights, cycle_weight):
+    scores = cycle_weight * cycles + postures @ weights.T
+    scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return scores / scores.sum(axis=1, keepdims=True)
+
+def fit_weights(postures, cycles, labels, l2=2e-5, iterations=20000, learning_rate=0.5):
+    """Multinomial logistic regression of the labels on the cues; returns (weights, cycle weight)."""
+    weights = np.zeros((len(EXERCISE_KEYS), postures.shape[1]))
+    cycle_weight = CYCLE_WEIGHT
+    onehot = np.eye(len(EXERCISE_KEYS))[labels]
+    for _ in range(iterations):
+        error = probabilities(postures, cycles, weights, cycle_weight) - onehot
+        weights -= learning_rate * (error.T @ postures / len(labels) + l2 * weights)
+        cycle_weight -= learning_rate * float((error * cycles).sum() / len(labels))
+    return weights, cycle_weight
+
+def evaluate(params, weights, cycle_weight, min_confidence, **recognizer_options):
+    """Run the recognizer over each sequence; per exercise, the correct and wrong frame shares and final labels."""
+    results = {}
+    for exercise, kwargs in params:
+        recognizer = ExerciseRecognizer(weights=weights, cycle_weight=cycle_weight, min_confidence=min_confidence,
+                                        **recognizer_options)
+        labels = [recognizer.update(frame) for frame in detected_frames(exercise, kwargs)]
+        scored = labels[recognizer.min_frames:]
+        result = results.setdefault(exercise, {'correct': 0, 'wrong': 0, 'frames': 0, 'final': []})
+        result['correct'] += sum(label == exercise for label in scored)
+        result['wrong'] += sum(label is not None and label != exercise for label in scored)
+        result['frames'] += len(scored)
+        result['final'].append(recognizer.exercise)
+    return results
+
+def print_evaluation(title, results):
+    print(f"{title}\n  {'':<18}{'correct':>9}{'wrong':>8}  final labels")
+    failures = 0
+    for exercise, result in results.items():
+        frames = max(result['frames'], 1)
+        failures += sum(label != exercise for label in result['final'])
+        print(f"  {exercise:<18}{result['correct'] / frames:>9.0%}{result['wrong'] / frames:>8.0%}  "
+              f"{', '.join(str(label) for label in result['final'])}")
+    return failures
+
+def print_confidence_bars(postures, cycles, labels, weights, cycle_weight):
+    probs = probabilities(postures, cycles, weights, cycle_weight)
+    best = probs.argmax(axis=1)
+    print(f"  {'bar':>6}{'accepted':>10}{'right':>8}")
+    for bar in CONFIDENCE_BARS:
+        accepted = probs.max(axis=1) >= bar
+        right = (best[accepted] == labels[accepted]).mean() if accepted.any() else float('nan')
+        print(f"  {bar:>6.2f}{accepted.mean():>10.0%}{right:>8.1%}")
+
+def format_weights(weights, cycle_weight):
+    lines = ["POSTURE_WEIGHTS = {"]
+    for i, exercise in enumerate(EXERCISE_KEYS):
+        key = f"'{exercise}':"
+        values = ', '.join(f"{value:.2f}" for value in weights[i])
+        lines.append(f"    {key:<20}({values}){',' if i < len(EXERCISE_KEYS) - 1 else ''}")
+    lines.append("}")
+    lines.append(f"CYCLE_WEIGHT = {cycle_weight:.2f}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", type=int, default=12, help="Training sequences per exercise")
+    parser.add_argument("--test", type=int, default=3, help="Held-out sequences per exercise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--l2", type=float, default=2e-5, help="Weight decay of the fit")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    parser.add_argument("--check", action="store_true", help="Only evaluate the current weights")
+    args = parser.parse_args()
+
+    recognizer = ExerciseRecognizer()
+    window = (recognizer.window_size, recognizer.min_frames, recognizer.stride)
+    test = sequence_params(args.test, args.seed + 1)
+    failures = print_evaluation("current weights", evaluate(test, POSTURE_MATRIX, CYCLE_WEIGHT, args.min_confidence))
+    if args.check:
+        sys.exit(1 if failures else 0)
+
+    postures, cycles, labels = window_samples(sequence_params(args.train, args.seed), *window)
+    print(f"\nfitting {len(POSTURE_FEATURES)} cues on {len(labels)} windows")
+    weights, cycle_weight = fit_weights(postures, cycles, labels, args.l2, args.iterations)
+    failures = print_evaluation("fitted weights", evaluate(test, weights, cycle_weight, args.min_confidence))
+    print("\nheld-out windows by confidence bar")
+    print_confidence_bars(*window_samples(test, *window), weights, cycle_weight)
+    print("\n" + format_weights(weights, cycle_weight))
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Soak test: thousands of camera sessions connecting and disconnecting in one
+process, the way a long-running server sees them.
+
+Every cycle creates a PoseTransformer through a shared MemoryBudgetManager,
+feeds it --frames frames (with a recording every --record-every cycles),
+ends it and drops it. RSS is sampled every --sample-every cycles; after the
+--warmup cycles it must neither grow by more than --max-growth-mb nor climb
+faster than --max-slope-kb per cycle, and no ended session may still be
+alive. Exits non-zero on failure:
+
+    python -m benchmarks.soak_sessions --cycles 2000
+    python -m benchmarks.soak_sessions --backend mediapipe --cycles 250 --warmup 50
+
+The replay backend (default) exercises everything except the model; with
+mediapipe each cycle also builds and closes a real pose graph.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+from fractions import Fraction
+
+import av
+import numpy as np
+
+from memory_budget import MB, MemoryBudgetManager, rss_bytes
+from pose_backends import ReplayBackend, backend_from_spec
+from synthetic_landmarks import generate_sequence
+
+TIME_BASE = Fraction(1, 90000)
+
+def make_frames(count, fps, width=320, height=240):
+    frames = []
+    for i in range(count):
+        image = np.full((height, width, 3), 40, dtype=np.uint8)
+        image[:, (i * 8) % width:(i * 8) % width + 40] = 200
+        frames.append((image, int(i / fps / TIME_BASE)))
+    return frames
+
+def run_cycle(cycle, args, manager, frames, landmarks, record_dir):
+    from app import PoseTransformer
+
+    backend = backend_from_spec(args.backend) if args.backend else ReplayBackend(landmarks, loop=True)
+    processor = PoseTransformer(backend=backend, memory_budget=manager)
+    if args.record_every and cycle % args.record_every == 0:
+        processor.start_recording(os.path.join(record_dir, 'soak.mp4'), fps=args.fps)
+    for image, pts in frames:
+        frame = av.VideoFrame.from_ndarray(image, format="bgr24")
+        frame.pts = pts
+        frame.time_base = TIME_BASE
+        processor.recv(frame)
+    processor.on_ended()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=2000, help="Sessions to create and end")
+    parser.add_argument("--frames", type=int, default=30, help="Frames per session")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate of the simulated camera")
+    parser.add_argument("--backend", help="Backend spec, e.g. 'mediapipe:model_complexity=0' (default: replay)")
+    parser.add_argument("--record-every", type=int, default=50, help="Record every Nth session (0 = never)")
+    parser.add_argument("--sample-every", type=int, default=100, help="Cycles between RSS samples")
+    parser.add_argument("--warmup", type=int, default=200, help="Cycles before RSS is judged")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0, help="Allowed RSS growth after warmup")
+    parser.add_argument("--max-slope-kb", type=float, default=20.0, help="Allowed RSS growth per cycle after warmup")
+    parser.add_argument("--output", help="Write the RSS samples to this JSON file")
+    args = parser.parse_args()
+
+    # Nothing is refused or degraded here; only accounting and leak checks run
+    manager = MemoryBudgetManager(session_budget=None, global_budget=None)
+    frames = make_frames(args.frames, args.fps)
+    landmarks = generate_sequence('squat', reps=5, fps=args.fps, seed=0)['landmarks']
+
+    # Import and initialize the backend once, so one-time module state (the
+    # first mediapipe import keeps a traceback) is not blamed on a session
+    if args.backend:
+        backend_from_spec(args.backend).close()
+
+    samples = []
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as record_dir:
+        print(f"{'cycle':>8}{'rss MB':>10}{'live':>8}{'suspects':>10}{'s':>8}")
+        for cycle in range(1, args.cycles + 1):
+            run_cycle(cycle, args, manager, frames, landmarks, record_dir)
+            if cycle % args.sample_every == 0 or cycle == args.cycles:
+                manager.check_leaks()
+                gc.collect()
+                rss = rss_bytes() / MB
+                live = manager.counts().get('transformers', 0)
+                samples.append({'cycle': cycle, 'rss_mb': rss, 'live': live,
+                                'leak_suspects': manager.leak_suspects})
+                print(f"{cycle:>8}{rss:>10.1f}{live:>8}{manager.leak_suspects:>10}"
+                      f"{time.perf_counter() - start:>8.0f}", flush=True)
+
+    judged = [sample for sample in samples if sample['cycle'] > args.warmup] or samples[-1:]
+    cycles = np.array([sample['cycle'] for sample in judged], dtype=float)
+    rss = np.array([sample['rss_mb'] for sample in judged])
+    growth = rss[-1] - rss[0]
+    slope_kb = np.polyfit(cycles, rss, 1)[0] * 1024 if len(judged) > 1 else 0.0
+
+    failures = []
+    if growth > args.max_growth_mb:
+        failures.append(f"RSS grew {growth:.1f} MB after warmup (limit {args.max_growth_mb:.0f} MB)")
+    if slope_kb > args.max_slope_kb:
+        failures.append(f"RSS climbs {slope_kb:.1f} KB per session (limit {args.max_slope_kb:.0f} KB)")
+    if manager.leak_suspects:
+        failures.append(f"{manager.leak_suspects} ended session(s) were still alive")
+
+    print(f"\nGrowth after warmup: {growth:.1f} MB, slope {slope_kb:.1f} KB/session")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'samples': samples, 'growth_mb': growth, 'slope_kb': slope_kb}, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("PASS")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Threshold tuner for the exercise state rules over labeled recordings.
+
+Each exercise's state comes from a low and a high threshold on its primary
+signal (BATCH_STATE_RULES, mirrored by the analyze_* functions), and reps
+are debounced by min_rep_interval. This sweeps those three values per
+exercise over the corpus of bench_accuracy, as a grid around the current
+values or as a random search, and reports for every exercise the current
+and the best configuration plus the trade-off between rep-count accuracy
+and how quickly reps are detected:
+
+    python -m benchmarks.tune_thresholds corpus/ --output tuned.json
+    python -m benchmarks.tune_thresholds --synthetic 5 --search random --candidates 2000
+
+A candidate is scored by rep-count MAE, then by rep-boundary MAE (how far
+from the labeled rep end the count happens). Candidates are evaluated in
+chunks across a process pool; within a chunk every candidate is one row of
+a BatchRepCounter, so each frame is one vectorized update for all of them.
+Features are computed once per recording. Form thresholds (back alignment,
+symmetry) only change the feedback, not the reps, so they are not tuned.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from benchmarks.bench_accuracy import bottom_frames, find_items, load_item, match_reps, synthetic_items
+from exercise_registry import REGISTRY
+from exercise_utils import BATCH_STATE_RULES, STATE_CODES, batch_features, rule_states
+from landmark_cache import LANDMARK_CACHE_DIR
+from rep_counter import BatchRepCounter, RepCounter
+
+# Debounce values of the grid search, in seconds
+GRID_INTERVALS = (0.2, 0.3, 0.4, 0.5, 0.6)
+
+# Features the state rules read besides their primary signal
+SECONDARY_FEATURES = ('chin_y', 'shoulder_y', 'hip_y')
+
+def prepare_item(item, backend_spec='mediapipe', cache_dir=None):
+    """Load an item and keep only what the state rules and scoring need."""
+    landmarks, timestamps, exercise, starts, ends, bottoms, _ = load_item(item, backend_spec, cache_dir)
+    if exercise not in BATCH_STATE_RULES:
+        return None
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    valid = ~np.isnan(landmarks).any(axis=(1, 2))
+    with np.errstate(invalid='ignore'):
+        features = batch_features(landmarks[valid])
+    signal = BATCH_STATE_RULES[exercise][0]
+    return {
+        'name': item['name'],
+        'exercise': exercise,
+        'features': {name: features[name] for name in (signal, *SECONDARY_FEATURES)},
+        'times': np.asarray(timestamps, dtype=np.float64)[valid],
+        'starts': starts,
+        'ends': ends,
+        'bottoms': bottoms
+    }
+
+def grid_candidates(exercise, step=5.0):
+    """Thresholds around the current rule plus the grid debounces; the current configuration comes first."""
+    _, low, _, high, _ = BATCH_STATE_RULES[exercise]
+    lows = low + np.arange(-30, 30 + step, step)
+    highs = [None] if high is None else np.unique(np.minimum(high + np.arange(-30, 15 + step, step), 180))
+    candidates = [(low, high, RepCounter().min_rep_interval)]
+    for low_value in lows:
+        for high_value in highs:
+            for interval in GRID_INTERVALS:
+                if high_value is None or low_value < high_value:
+                    candidates.append((float(low_value), None if high_value is None else float(high_value),
+                                       interval))
+    return candidates
+
+def random_candidates(exercise, count, seed=0):
+    """count random configurations near the current rule; the current configuration comes first."""
+    _, low, _, high, _ = BATCH_STATE_RULES[exercise]
+    rng = np.random.default_rng(seed)
+    candidates = [(low, high, RepCounter().min_rep_interval)]
+    while len(candidates) < count:
+        low_value = float(rng.uniform(low - 40, low + 30))
+        high_value = None if high is None else float(rng.uniform(high - 40, min(high + 20, 180)))
+        if high_value is None or low_value < high_value:
+            candidates.append((low_value, high_value, float(rng.uniform(0.15, 0.8))))
+    return candidates
+
+def score_item(item, states, counted, tolerance, updown=True):
+    """Per-candidate errors on one item, as arrays over the candidate axis."""
+    times = item['times']
+    labeled = len(item['starts'])
+    candidates = len(states)
+    boundary_sum = np.zeros(candidates)
+    boundary_abs = np.zeros(candidates)
+    boundary_count = np.zeros(candidates)
+    for k in range(candidates):
+        errors = match_reps(times[counted[k]], item['starts'], item['ends'], tolerance)
+        boundary_sum[k] = sum(errors)
+        boundary_abs[k] = sum(abs(error) for error in errors)
+        boundary_count[k] = len(errors)
+
+    # First frame of each labeled rep in its bottom state, for all candidates at once
+    bottom_sum = np.zeros(candidates)
+    bottom_count = np.zeros(candidates)
+    if updown:
+        for start, end, bottom in zip(item['starts'], item['ends'], item['bottoms']):
+            first = bottom_frames(states, times, start, end, STATE_CODES['up'], STATE_CODES['down'])
+            found = first >= 0
+            bottom_sum += np.where(found, times[first] - bottom, 0.0)
+            bottom_count += found
+
+    counts = counted.sum(axis=1)
+    return {
+        'rep_abs_error': np.abs(counts - labeled),
+        'exact': (counts == labeled).astype(np.int64),
+        'missed': labeled - boundary_count,
+        'boundary_sum': boundary_sum,
+        'boundary_abs': boundary_abs,
+        'boundary_count': boundary_count,
+        'bottom_sum': bottom_sum,
+        'bottom_count': bottom_count
+    }
+
+def evaluate_chunk(task, tolerance=0.5):
+    """Score a chunk of candidates of one exercise on all its items; returns summed errors per candidate."""
+    exercise, candidates, items = task
+    low = np.array([low for low, _, _ in candidates], dtype=np.float64)[:, np.newaxis]
+    high = np.array([np.nan if high is None else high for _, high, _ in candidates])[:, np.newaxis]
+    interval = np.array([interval for _, _, interval in candidates], dtype=np.float64)
+    updown = np.full(len(candidates), REGISTRY[exercise].updown)
+    totals = None
+    for item in items:
+        with np.errstate(invalid='ignore'):
+            states = rule_states(exercise, item['features'], low, high)
+        counter = BatchRepCounter(capacity=len(candidates))
+        rows = np.array([counter.add() for _ in candidates])
+        counted = np.zeros(states.shape, dtype=bool)
+        for t, current_time in enumerate(item['times']):
+            counted[:, t] = counter.update(rows, states[:, t], np.full(len(rows), current_time), updown, interval)
+        scores = score_item(item, states, counted, tolerance, REGISTRY[exercise].updown)
+        totals = scores if totals is None else {name: totals[name] + value for name, value in scores.items()}
+    return totals
+
+def summarize_candidates(candidates, totals, items):
+    """One metrics dict per candidate."""
+    results = []
+    for k, (low, high, interval) in enumerate(candidates):
+        boundary_count = totals['boundary_count'][k]
+        bottom_count = totals['bottom_count'][k]
+        results.append({
+            'low': low,
+            'high': high,
+            'min_rep_interval': interval,
+            'rep_mae': float(totals['rep_abs_error'][k] / items),
+            'exact': float(totals['exact'][k] / items),
+            'missed_reps': int(totals['missed'][k]),
+            'boundary_mae_ms': float(totals['boundary_abs'][k] / boundary_count * 1000) if boundary_count else None,
+            'boundary_bias_ms': float(totals['boundary_sum'][k] / boundary_count * 1000) if boundary_count else None,
+            'bottom_latency_ms': float(totals['bottom_sum'][k] / bottom_count * 1000) if bottom_count else None
+        })
+    return results
+
+def sort_key(result):
+    boundary = result['boundary_mae_ms']
+    return (result['rep_mae'], float('inf') if boundary is None else boundary)
+
+def pareto_front(results):
+    """Candidates that no other beats on both rep-count MAE and boundary MAE, most accurate first."""
+    front = []
+    best_boundary = float('inf')
+    for result in sorted(results, key=sort_key):
+        boundary = result['boundary_mae_ms']
+        if boundary is not None and boundary < best_boundary:
+            front.append(result)
+            best_boundary = boundary
+    return front
+
+def format_row(label, result):
+    high = '-' if result['high'] is None else f"{result['high']:.0f}"
+    boundary = '-' if result['boundary_mae_ms'] is None else f"{result['boundary_mae_ms']:.0f}"
+    bottom = '-' if result['bottom_latency_ms'] is None else f"{result['bottom_latency_ms']:.0f}"
+    return (f"  {label:<10}{result['low']:>6.0f}{high:>6}{result['min_rep_interval']:>7.2f}"
+            f"{result['rep_mae']:>9.2f}{result['exact']:>7.0%}{result['missed_reps']:>8}{boundary:>10}{bottom:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="Directory of labeled clips and recordings")
+    parser.add_argument("--synthetic", type=int, default=0, help="Also use N synthetic sequences per exercise")
+    parser.add_argument("--exercise", action="append", help="Only tune these exercises")
+    parser.add_argument("--search", choices=("grid", "random"), default="grid")
+    parser.add_argument("--candidates", type=int, default=1000, help="Configurations per exercise (random search)")
+    parser.add_argument("--step", type=float, default=5.0, help="Threshold step in degrees (grid search)")
+    parser.add_argument("--chunk", type=int, default=256, help="Candidates per task")
+    parser.add_argument("--backend", default="mediapipe", help="Pose backend spec used for videos")
+    parser.add_argument("--cache-dir", default=LANDMARK_CACHE_DIR, help="Landmark cache for videos")
+    parser.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Seconds after a labeled rep end that a count still matches it")
+    parser.add_argument("--top", type=int, default=8, help="Rows of each trade-off table")
+    parser.add_argument("--output", help="Write the best configurations and trade-offs to this JSON file")
+    args = parser.parse_args()
+
+    items = (find_items(args.corpus) if args.corpus else []) + synthetic_items(args.synthetic)
+    if not items:
+        parser.error("nothing to tune on: give a corpus directory or --synthetic N")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        prepared = [item for item in executor.map(
+            partial(prepare_item, backend_spec=args.backend, cache_dir=args.cache_dir), items) if item]
+        by_exercise = {}
+        for item in prepared:
+            by_exercise.setdefault(item['exercise'], []).append(item)
+        if args.exercise:
+            by_exercise = {exercise: by_exercise[exercise] for exercise in args.exercise if exercise in by_exercise}
+
+        candidates = {
+            exercise: (grid_candidates(exercise, args.step) if args.search == 'grid'
+                       else random_candidates(exercise, args.candidates))
+            for exercise in by_exercise
+        }
+        tasks = [(exercise, candidates[exercise][i:i + args.chunk], by_exercise[exercise])
+                 for exercise in by_exercise for i in range(0, len(candidates[exercise]), args.chunk)]
+        chunks = list(executor.map(partial(evaluate_chunk, tolerance=args.tolerance), tasks))
+    elapsed = time.perf_counter() - start
+
+    report = {}
+    print(f"  {'':<10}{'low':>6}{'high':>6}{'debnc':>7}{'rep MAE':>9}{'exact':>7}{'missed':>8}"
+          f"{'bound ms':>10}{'btm ms':>9}")
+    for exercise in by_exercise:
+        parts = [totals for (task_exercise, _, _), totals in zip(tasks, chunks) if task_exercise == exercise]
+        totals = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        results = summarize_candidates(candidates[exercise], totals, len(by_exercise[exercise]))
+        current, best = results[0], min(results, key=sort_key)
+        front = pareto_front(results)
+        report[exercise] = {
+            'signal': BATCH_STATE_RULES[exercise][0],
+            'items': len(by_exercise[exercise]),
+            'candidates': len(results),
+            'current': current,
+            'best': best,
+            'pareto': front
+        }
+        print(f"{exercise} ({BATCH_STATE_RULES[exercise][0]}, {len(by_exercise[exercise])} items, "
+              f"{len(results)} candidates)")
+        print(format_row('current', current))
+        print(format_row('best', best))
+        for result in front[:args.top]:
+            print(format_row('trade-off', result))
+
+    total = sum(len(exercise_candidates) for exercise_candidates in candidates.values())
+    print(f"\n{total} candidates on {len(prepared)} item(s) in {elapsed:.1f}s "
+          f"on {args.jobs or os.cpu_count()} worker(s)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'search': args.search, 'tolerance': args.tolerance, 'exercises': report}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import base64
+import os
+import uuid
+
+import numpy as np
+
+from exercise_recognition import ExerciseRecognizer
+from exercise_registry import REGISTRY
+from event_bus import SessionEvents
+from exercise_utils import FrameFeatures
+from pose_backends import NUM_LANDMARKS
+from rep_counter import create_rep_counter, default_rep_counter
+
+try:
+    import streamlit.components.v1 as components
+except ImportError:
+    components = None
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'frontend', 'client_pose')
+
+# Pose models the browser can load, by MediaPipe Tasks model name
+BROWSER_MODELS = {
+    'lite': 'Lite (fastest)',
+    'full': 'Full',
+    'heavy': 'Heavy (most accurate)'
+}
+
+# Bytes of one landmark frame on the wire: 33 x (x, y, z, visibility) float32
+FRAME_BYTES = NUM_LANDMARKS * 4 * 4
+
+def encode_batch(timestamps, landmarks, seq=0, session=''):
+    """Pack a (N, 33, 4) landmark batch into the message the browser component sends.
+
+    Landmarks travel as base64 little-endian float32 (NaN rows for frames where
+    nobody was detected) and timestamps as seconds on the browser's clock.
+    """
+    landmarks = np.ascontiguousarray(landmarks, dtype='<f4').reshape(-1, NUM_LANDMARKS, 4)
+    return {
+        'session': session,
+        'seq': seq,
+        'timestamps': [float(t) for t in timestamps],
+        'landmarks': base64.b64encode(landmarks.tobytes()).decode('ascii')
+    }
+
+def decode_batch(message):
+    """Unpack a batch message into (timestamps (N,), landmarks (N, 33, 4) float32)."""
+    timestamps = np.asarray(message.get('timestamps', ()), dtype=np.float64)
+    data = base64.b64decode(message.get('landmarks', ''))
+    if len(data) != len(timestamps) * FRAME_BYTES:
+        raise ValueError(f"Expected {len(timestamps)} landmark frames, got {len(data)} bytes")
+    landmarks = np.frombuffer(data, dtype='<f4').reshape(-1, NUM_LANDMARKS, 4)
+    return timestamps, landmarks
+
+class LandmarkSession:
+    """Exercise analysis for a session whose pose is estimated by the client.
+
+    The browser runs pose estimation and uploads only landmark frames, so this
+    runs the same analyzer, recognizer and rep counter as PoseTransformer
+    without ever seeing the video. Batches are identified by their sequence
+    number; a batch delivered twice (e.g. on a page rerun) is ignored.
+    """
+
+    def __init__(self, exercise='pushup', auto_detect=False, event_bus=None):
+        self.session_id = uuid.uuid4().hex[:8]
+        self.selected_exercise = exercise
+        self.exercise = REGISTRY[exercise]
+        self.auto_detect = auto_detect
+        self.features = FrameFeatures()
+        self.recognizer = ExerciseRecognizer()
+        self.rep_counter_methods = {}
+        self.rep_counter_method = default_rep_counter(exercise)
+        self.rep_counter = create_rep_counter(exercise, self.rep_counter_method)
+        self.form_score = 100
+        self.feedback = ''
+        self.events = SessionEvents(event_bus, self.session_id) if event_bus else None
+        self.last_time = 0.0
+        self.session = None
+        self.last_seq = -1
+        self.frames = 0
+        self.missed = 0
+        self.batches = 0
+        self.bytes = 0
+
+    def receive(self, message):
+        """Analyze a batch message from the browser; returns the number of new frames."""
+        if not message:
+            return 0
+        if message.get('session') != self.session:
+            # The component was restarted: its sequence numbers start over
+            self.session = message.get('session')
+            self.last_seq = -1
+        if message.get('seq', 0) <= self.last_seq:
+            return 0
+        # A malformed batch raises before it is counted as received
+        timestamps, landmarks = decode_batch(message)
+        self.last_seq = message.get('seq', 0)
+        self.batches += 1
+        self.bytes += len(message.get('landmarks', ''))
+        self.process(timestamps, landmarks)
+        return len(timestamps)
+
+    def process(self, timestamps, landmarks):
+        """Analyze (N,) timestamps and (N, 33, 4) landmarks; NaN frames count as missed."""
+        for current_time, frame_landmarks in zip(timestamps, landmarks):
+            self.frames += 1
+            if np.isnan(frame_landmarks).any():
+                self.missed += 1
+                continue
+            features = self.features.update(frame_landmarks)
+
+            if self.auto_detect:
+                detected = self.recognizer.update(features)
+                if detected and detected != self.selected_exercise:
+                    self.switch_exercise(detected)
+
+            exercise = self.exercise
+            new_state, self.form_score, self.feedback = exercise.analyze(features)
+            rep_counted = self.rep_counter.update(new_state, current_time, updown=exercise.updown,
+                                                  features=features)
+            self.last_time = float(current_time)
+            if self.events:
+                self.events.observe(exercise.key, self.last_time, self.rep_counter.exercise_state, rep_counted,
+                                    self.rep_counter, self.form_score, self.feedback)
+
+    def set_rep_counter_methods(self, methods):
+        """Choose the counting method (a REP_COUNTERS key) per exercise; others keep their default."""
+        self.rep_counter_methods = dict(methods)
+        method = self.rep_counter_methods.get(self.selected_exercise, default_rep_counter(self.selected_exercise))
+        if method != self.rep_counter_method:
+            self.rep_counter_method = method
+            self.rep_counter = create_rep_counter(self.selected_exercise, method, previous=self.rep_counter)
+
+    def switch_exercise(self, exercise):
+        """Change the active analyzer and restart the rep counter with the exercise's method."""
+        self.exercise = REGISTRY[exercise]
+        self.selected_exercise = exercise
+        self.rep_counter_method = self.rep_counter_methods.get(exercise, default_rep_counter(exercise))
+        self.rep_counter = create_rep_counter(exercise, self.rep_counter_method, previous=self.rep_counter)
+
+    def new_set(self):
+        """Start counting the reps of the next set."""
+        if self.events:
+            self.events.set_completed(self.selected_exercise, self.last_time, self.rep_counter.rep_count)
+        self.rep_counter.rep_count = 0
+        self.rep_counter.reset()
+
+    def reset(self):
+        """Forget every rep of the workout."""
+        self.rep_counter = create_rep_counter(self.selected_exercise, self.rep_counter_method)
+        self.form_score = 100
+        self.feedback = ''
+
+    def result(self):
+        """Current analysis as a dict, also sent back to the browser for its overlay."""
+        return {
+            'exercise': self.selected_exercise,
+            'state': self.rep_counter.exercise_state,
+            'reps': self.rep_counter.rep_count,
+            'total_reps': self.rep_counter.total_reps,
+            'form_score': self.form_score,
+            'feedback': self.feedback
+        }
+
+    def stats(self):
+        """Return the uplink counters as a dict."""
+        return {
+            'frames': self.frames,
+            'missed': self.missed,
+            'batches': self.batches,
+            'bytes': self.bytes
+        }
+
+# Declared on first use so importing this module outside a Streamlit app stays quiet
+_component = None
+
+def client_pose_stream(key, result=None, model='lite', confidence=0.5, batch_ms=250):
+    """Render the browser pose component and return its latest landmark batch (or None).
+
+    result is drawn on the browser's overlay. Every batch_ms the browser sends
+    the frames estimated since its previous batch, which reruns the script.
+    """
+    global _component
+    if components is None:
+        raise ImportError("streamlit is required for the browser pose component")
+    if _component is None:
+        _component = components.declare_component('client_pose', path=FRONTEND_DIR)
+    return _component(
+        key=key,
+        result=result or {},
+        model=model,
+        confidence=confidence,
+        batch_ms=batch_ms,
+        default=None
+    )
@@ -0,0 +1,215 @@
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import deque, namedtuple
+
+logger = logging.getLogger(__name__)
+
+# Events published by the sessions; every one carries the session id, the
+# exercise, the frame time in seconds and the wall-clock time
+RepCompleted = namedtuple('RepCompleted', ['session', 'exercise', 'timestamp', 'wall_time', 'rep', 'total_reps',
+                                           'form_score'])
+StateChanged = namedtuple('StateChanged', ['session', 'exercise', 'timestamp', 'wall_time', 'state', 'previous'])
+SetCompleted = namedtuple('SetCompleted', ['session', 'exercise', 'timestamp', 'wall_time', 'set', 'reps'])
+FormWarning = namedtuple('FormWarning', ['session', 'exercise', 'timestamp', 'wall_time', 'message', 'form_score'])
+
+EVENT_TYPES = {
+    'rep_completed': RepCompleted,
+    'state_changed': StateChanged,
+    'set_completed': SetCompleted,
+    'form_warning': FormWarning
+}
+EVENT_NAMES = {event_type: name for name, event_type in EVENT_TYPES.items()}
+
+def event_to_dict(event):
+    """JSON-ready dict of an event, with its type name under 'type'."""
+    return {'type': EVENT_NAMES[type(event)], **event._asdict()}
+
+class Subscription:
+    """One subscriber of an EventBus, with its own queue and delivery thread.
+
+    deliver(events) is called with a list of up to max_batch events every
+    interval seconds while there are any. The queue holds max_queue events;
+    when the subscriber cannot keep up the oldest ones are dropped, so a
+    slow subscriber loses events instead of slowing anyone else down.
+    """
+
+    def __init__(self, deliver, kinds=None, name=None, max_queue=1024, max_batch=256, interval=0.05):
+        self.deliver = deliver
+        self.kinds = frozenset(EVENT_TYPES[kind] for kind in kinds) if kinds else None
+        self.name = name or getattr(deliver, '__name__', type(deliver).__name__)
+        self.max_batch = max_batch
+        self.interval = interval
+        # deque appends and pops are atomic, so publishers never take a lock
+        self.queue = deque(maxlen=max_queue)
+        self.delivered = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name=f"events-{self.name}", daemon=True)
+        self.thread.start()
+
+    def offer(self, event):
+        if self.kinds is not None and type(event) not in self.kinds:
+            return
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(event)
+
+    def run(self):
+        while not self.stopping.wait(self.interval):
+            self.flush()
+        self.flush()
+        # Closed here, after the last delivery, so a close() that timed out waiting
+        # for a slow subscriber cannot close the sink under a running flush
+        close = getattr(self.deliver, 'close', None)
+        if close:
+            try:
+                close()
+            except Exception:
+                logger.exception("Event subscriber %s failed to close", self.name)
+
+    def flush(self):
+        """Deliver everything queued, in batches."""
+        while self.queue:
+            batch = []
+            while self.queue and len(batch) < self.max_batch:
+                batch.append(self.queue.popleft())
+            try:
+                self.deliver(batch)
+                self.delivered += len(batch)
+            except Exception:
+                self.errors += 1
+                logger.exception("Event subscriber %s failed on %d events", self.name, len(batch))
+            self.batches += 1
+
+    def close(self, timeout=2.0):
+        """Deliver what is left and stop the thread, which then closes the subscriber."""
+        self.stopping.set()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            logger.warning("Event subscriber %s is still delivering; it is closed once it finishes", self.name)
+
+    def stats(self):
+        """Return the subscriber counters as a dict."""
+        return {
+            'name': self.name,
+            'queued': len(self.queue),
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'batches': self.batches,
+            'errors': self.errors
+        }
+
+class EventBus:
+    """In-process publish/subscribe for rep, state, set and form events.
+
+    publish() only appends the event to each subscriber's queue, a few
+    microseconds without locks or I/O, so it is safe to call from the frame
+    path. Every subscriber is served by its own thread (see Subscription).
+    """
+
+    def __init__(self, max_queue=1024, max_batch=256, interval=0.05):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.interval = interval
+        self.lock = threading.Lock()
+        # Replaced rather than mutated, so publish() can iterate it without the lock
+        self.subscriptions = ()
+        self.published = 0
+
+    def subscribe(self, deliver, kinds=None, name=None):
+        """Call deliver(events) on a background thread with batches of events of the given kinds (default all)."""
+        subscription = Subscription(deliver, kinds, name, self.max_queue, self.max_batch, self.interval)
+        with self.lock:
+            self.subscriptions = self.subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions = tuple(s for s in self.subscriptions if s is not subscription)
+        subscription.close()
+
+    def publish(self, event):
+        self.published += 1
+        for subscription in self.subscriptions:
+            subscription.offer(event)
+
+    def close(self):
+        """Deliver the queued events and stop every subscriber."""
+        with self.lock:
+            subscriptions, self.subscriptions = self.subscriptions, ()
+        for subscription in subscriptions:
+            subscription.close()
+
+    def stats(self):
+        """Return the bus counters as a dict."""
+        subscriptions = [subscription.stats() for subscription in self.subscriptions]
+        return {
+            'published': self.published,
+            'delivered': sum(s['delivered'] for s in subscriptions),
+            'dropped': sum(s['dropped'] for s in subscriptions),
+            'errors': sum(s['errors'] for s in subscriptions),
+            'subscribers': subscriptions
+        }
+
+class FileSink:
+    """Append events to a file as JSON lines."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, events):
+        self.file.write(''.join(json.dumps(event_to_dict(event)) + '\n' for event in events))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class WebhookSink:
+    """POST batches of events as JSON ({"events": [...]}) to a URL, e.g. a local integration service."""
+
+    def __init__(self, url, timeout=2.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, events):
+        body = json.dumps({'events': [event_to_dict(event) for event in events]}).encode()
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class SessionEvents:
+    """Turns one session's per-frame analysis into events on a bus.
+
+    observe() is called after every analyzed frame; it publishes a rep when
+    one was counted, a state change, and a form warning whenever the
+    feedback comes with a form deduction and differs from the last warning.
+    """
+
+    def __init__(self, bus, session):
+        self.bus = bus
+        self.session = session
+        self.state = None
+        self.warning = ''
+        self.set = 1
+
+    def observe(self, exercise, timestamp, state, rep_counted, rep_counter, form_score, feedback):
+        if state != self.state:
+            self.bus.publish(StateChanged(self.session, exercise, timestamp, time.time(), state, self.state))
+            self.state = state
+        if rep_counted:
+            self.bus.publish(RepCompleted(self.session, exercise, timestamp, time.time(), rep_counter.rep_count,
+                                          rep_counter.total_reps, form_score))
+        warning = feedback if form_score < 100 else ''
+        if warning and warning != self.warning:
+            self.bus.publish(FormWarning(self.session, exercise, timestamp, time.time(), warning, form_score))
+        self.warning = warning
+
+    def set_completed(self, exercise, timestamp, reps):
+        self.bus.publish(SetCompleted(self.session, exercise, timestamp, time.time(), self.set, reps))
+        self.set += 1
@@ -0,0 +1,199 @@
+import numpy as np
+
+from exercise_utils import (
+    EXERCISES,
+    STATE_CODES,
+    FrameFeatures,
+    batch_features,
+    batch_states,
+    calculate_angles,
+    landmarks_to_array
+)
+
+EXERCISE_KEYS = tuple(EXERCISES)
+
+# Posture cues measured over the window, each scaled to roughly 0..1
+POSTURE_FEATURES = (
+    'arm_motion',     # range of the average elbow angle
+    'leg_motion',     # range of the average knee angle
+    'horizontal',     # shoulders and hips at the same height (prone body)
+    'overhead',       # wrists above the shoulders
+    'wide_wrists',    # wrists far apart compared to shoulder width
+    'split_stance',   # one foot far in front of the other
+    'torso_lean',     # mean lean of the torso from upright
+    'hands_at_chest', # wrists close together between shoulders and hips
+    'hands_low',      # wrists below the hips
+    'hip_flexion',    # torso folded towards the thighs
+    'lean_motion',    # range of the torso lean (hinging)
+    'elbows_high',    # elbows above the shoulders
+    'body_lift',      # range of the shoulder height (the whole body moving)
+    'wrist_lift',     # range of the wrist height relative to the shoulders
+    'bias'            # constant, for each exercise's prior
+)
+
+# How strongly each posture cue supports (or rules out) an exercise, in
+# log-odds, columns in POSTURE_FEATURES order. Fitted on synthetic sequences
+# by benchmarks/fit_recognizer.py, which prints a new table after changes to
+# the cues or to synthetic_landmarks
+POSTURE_WEIGHTS = {
+    'pushup':           (2.56, -2.02, 3.43, -1.64, -0.44, -1.10, 3.30, -0.38, 0.76, -4.73, 0.82, -0.32, 4.86, 1.69, -2.65),
+    'squat':            (-1.39, 4.73, -2.25, -2.81, -0.71, -1.58, -0.36, 2.54, 1.20, 1.96, 0.48, -0.84, 3.19, 7.09, -2.71),
+    'curl':             (8.44, -0.58, -3.03, -3.08, -0.86, -0.45, -2.19, 0.60, 0.21, -1.29, -0.34, -2.62, -2.02, 0.94, 0.73),
+    'plank':            (-5.87, -0.49, 4.43, -0.20, -0.43, 0.19, 4.51, -0.17, 2.67, -1.57, -0.59, -0.39, -3.77, -3.92, 1.44),
+    'pullup':           (2.83, -2.25, -0.69, 2.85, -2.17, 0.99, -0.94, -0.43, -2.56, -1.06, -1.11, -0.27, 6.01, 2.38, -1.61),
+    'lunge':            (-0.89, 1.14, -0.82, -0.54, -0.58, 7.16, -1.44, -0.76, 2.86, -1.27, -2.42, -0.40, 1.17, -2.59, -1.00),
+    'press':            (1.67, -0.72, -0.40, 3.80, 6.05, 6.50, -0.35, -0.18, -2.05, -0.35, -0.07, 0.71, -2.28, -3.53, 0.05),
+    'row':              (3.78, -0.12, 3.41, -0.58, -0.04, -0.65, 0.31, -0.36, 1.18, 7.29, -0.91, -0.85, -3.88, -0.50, -1.29),
+    'goblet_squat':     (-0.36, 4.43, -0.28, -1.00, 0.42, -0.77, -0.49, 2.03, -9.27, 1.06, -0.75, -3.73, 3.14, -4.02, 3.04),
+    'lateral_raise':    (-3.50, -1.75, -0.81, -1.86, 9.82, 4.21, -0.80, -2.65, -0.08, -0.66, -0.63, -1.60, -2.29, 3.19, 1.49),
+    'tricep_extension': (2.50, -1.04, -0.31, 2.49, -2.95, -7.20, -0.38, -0.21, -1.45, -0.39, -0.50, 6.66, -4.71, 2.53, -0.15),
+    'front_raise':      (-5.23, -2.86, -1.54, -0.72, -6.39, -3.50, -1.72, 3.42, 1.46, -1.50, -1.36, -0.63, -3.45, 5.28, 5.67),
+    'deadlift':         (-1.66, -0.75, -0.92, -0.65, -1.32, -3.06, 0.41, -2.73, 6.84, 1.57, 6.66, -0.51, 2.31, -6.39, -2.04),
+    'overhead_squat':   (-2.89, 2.28, -0.23, 3.91, -0.39, -0.73, 0.15, -0.72, -1.79, 0.92, 0.71, 4.80, 1.71, -2.15, -0.96)
+}
+POSTURE_MATRIX = np.array([POSTURE_WEIGHTS[key] for key in EXERCISE_KEYS], dtype=np.float32)
+
+# Weight of completed down/up cycles relative to the posture cues
+CYCLE_WEIGHT = 0.93
+
+# Probability a classification needs to count towards switching the exercise
+MIN_CONFIDENCE = 0.9
+
+def count_cycles(states):
+    """Count down/up alternations per row of an (E, T) state array, ignoring 'ready' frames."""
+    down = STATE_CODES['down']
+    up = STATE_CODES['up']
+    active = (states == down) | (states == up)
+
+    # Forward-fill the last down/up state over 'ready' frames
+    idx = np.where(active, np.arange(states.shape[1]), 0)
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = np.take_along_axis(states, idx, axis=1)
+    filled_active = np.take_along_axis(active, idx, axis=1)
+
+    changes = (filled[:, 1:] != filled[:, :-1]) & filled_active[:, :-1] & filled_active[:, 1:]
+    return changes.sum(axis=1) / 2.0
+
+def posture_features(frames, features):
+    """Summarize a (T, 33, 4) window into the POSTURE_FEATURES vector.
+
+    Distances are measured in torso lengths, so the cues do not depend on how
+    far the athlete stands from the camera.
+    """
+    shoulder_width = np.abs(frames[:, 11, 0] - frames[:, 12, 0]) + 1e-6
+    shoulders = (frames[:, 11, :2] + frames[:, 12, :2]) / 2
+    hips = (frames[:, 23, :2] + frames[:, 24, :2]) / 2
+    knees = (frames[:, 25, :2] + frames[:, 26, :2]) / 2
+    torso_length = np.median(np.linalg.norm(shoulders - hips, axis=1)) + 1e-6
+    wrist_y = (frames[:, 15, 1] + frames[:, 16, 1]) / 2
+    elbow_y = (frames[:, 13, 1] + frames[:, 14, 1]) / 2
+    wrist_spread = np.abs(frames[:, 15, 0] - frames[:, 16, 0])
+    lean = np.degrees(np.arctan2(np.abs(shoulders[:, 0] - hips[:, 0]), hips[:, 1] - shoulders[:, 1]))
+
+    return np.array([
+        np.ptp(features['avg_arm_angle']) / 120.0,
+        np.ptp(features['avg_leg_angle']) / 120.0,
+        (features['back_alignment'] < 0.15).mean(),
+        (wrist_y < features['shoulder_y']).mean(),
+        (wrist_spread > 2.5 * shoulder_width).mean(),
+        np.abs(frames[:, 27, 0] - frames[:, 28, 0]).max() / torso_length / 1.5,
+        lean.mean() / 90.0,
+        ((wrist_y > features['shoulder_y']) & (wrist_y < features['hip_y'])
+         & (wrist_spread < shoulder_width)).mean(),
+        (wrist_y > features['hip_y']).mean(),
+        (180.0 - calculate_angles(shoulders, hips, knees)).mean() / 135.0,
+        np.ptp(lean) / 90.0,
+        (elbow_y < features['shoulder_y']).mean(),
+        np.ptp(features['shoulder_y']) / torso_length,
+        np.ptp(wrist_y - features['shoulder_y']) / torso_length / 1.5,
+        1.0
+    ], dtype=np.float32).clip(0.0, 1.0)
+
+def window_cues(frames):
+    """(posture cues, down/up cycles per exercise) of a (T, 33, 4) window."""
+    features = batch_features(frames)
+    states = batch_states(frames, features)
+    return posture_features(frames, features), np.minimum(count_cycles(states), 4.0)
+
+def score_exercises(frames, weights=None, cycle_weight=CYCLE_WEIGHT):
+    """Score every exercise in EXERCISES against a (T, 33, 4) window of landmarks.
+
+    Scores are log-odds: softmax(scores) is the probability of each exercise.
+    weights (default POSTURE_MATRIX) is an (exercises, POSTURE_FEATURES) array.
+    """
+    posture, cycles = window_cues(frames)
+    return cycle_weight * cycles + (POSTURE_MATRIX if weights is None else weights) @ posture
+
+class ExerciseRecognizer:
+    """Recognize the exercise being performed from a sliding window of landmarks.
+
+    The detection only changes once the same exercise wins switch_after
+    classifications in a row, each with a probability of at least
+    min_confidence, so a few ambiguous frames never swap the analyzer mid-set.
+    """
+
+    def __init__(self, window_size=90, min_frames=45, stride=5, switch_after=3,
+                 min_confidence=MIN_CONFIDENCE, weights=None, cycle_weight=CYCLE_WEIGHT):
+        self.window = np.zeros((window_size, 33, 4), dtype=np.float32)
+        self.window_size = window_size
+        self.min_frames = min_frames
+        self.stride = stride
+        self.switch_after = switch_after
+        self.min_confidence = min_confidence
+        self.weights = weights
+        self.cycle_weight = cycle_weight
+        self.reset()
+
+    def reset(self):
+        """Forget all buffered frames and the current detection."""
+        self.frame_count = 0
+        self.exercise = None
+        self.confidence = 0.0
+        self.candidate = None
+        self.candidate_votes = 0
+
+    def update(self, landmarks):
+        """Add one frame of landmarks and return the currently recognized exercise (or None)."""
+        if isinstance(landmarks, FrameFeatures):
+            landmarks = landmarks.array
+        if not isinstance(landmarks, np.ndarray):
+            landmarks = landmarks_to_array(landmarks, out=self.window[self.frame_count % self.window_size])
+        else:
+            self.window[self.frame_count % self.window_size] = landmarks
+        self.frame_count += 1
+
+        if self.frame_count >= self.min_frames and self.frame_count % self.stride == 0:
+            self._vote(*self.classify())
+        return self.exercise
+
+    def classify(self):
+        """Classify the buffered window and return (exercise, probability)."""
+        size = min(self.frame_count, self.window_size)
+        if size == self.window_size:
+            # Oldest frame first so state transitions are counted in order
+            start = self.frame_count % self.window_size
+            order = np.arange(start, start + size) % self.window_size
+            frames = self.window[order]
+        else:
+            frames = self.window[:size]
+
+        scores = score_exercises(frames, self.weights, self.cycle_weight)
+        probabilities = np.exp(scores - scores.max())
+        probabilities /= probabilities.sum()
+        best = int(np.argmax(probabilities))
+        return EXERCISE_KEYS[best], float(probabilities[best])
+
+    def _vote(self, exercise, confidence):
+        """Only switch once the same exercise wins several confident classifications in a row."""
+        if confidence < self.min_confidence:
+            self.candidate = None
+            self.candidate_votes = 0
+            return
+        if exercise == self.candidate:
+            self.candidate_votes += 1
+        else:
+            self.candidate = exercise
+            self.candidate_votes = 1
+        if self.candidate_votes >= self.switch_after:
+            self.exercise = exercise
+            self.confidence = confidence
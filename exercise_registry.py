@@ -0,0 +1,190 @@
+import importlib
+import logging
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+try:
+    from importlib.metadata import entry_points
+except ImportError:
+    entry_points = None
+
+logger = logging.getLogger(__name__)
+
+# Entry point group that exercise plugins register under, e.g. in pyproject.toml:
+#   [project.entry-points."fitness_trainer.exercises"]
+#   kettlebell = "kettlebell_pack.exercises:EXERCISES"
+ENTRY_POINT_GROUP = 'fitness_trainer.exercises'
+
+# How reps are counted: 'updown' runs the down -> up state machine, 'hold' only tracks state
+REP_MODES = ('updown', 'hold')
+
+# An exercise as declared. analyzer is a callable or a 'module:function' path
+# that is only imported the first time the exercise is used.
+ExerciseSpec = namedtuple('ExerciseSpec', ['key', 'name', 'category', 'analyzer', 'rep_mode', 'tip', 'landmarks'])
+
+# An exercise ready for the per-frame path, with its analyzer imported
+Exercise = namedtuple('Exercise', ['key', 'name', 'category', 'analyze', 'updown', 'tip', 'landmarks'])
+
+def declare(key, name, category, analyzer, rep_mode='updown', tip='', landmarks=()):
+    """Declare an exercise: metadata, analyzer, rep mode, tip and required landmark indices."""
+    if rep_mode not in REP_MODES:
+        raise ValueError(f"Unknown rep mode: {rep_mode}")
+    return ExerciseSpec(key, name, category, analyzer, rep_mode, tip, tuple(landmarks))
+
+ARMS = (11, 12, 13, 14, 15, 16)
+LEGS = (23, 24, 25, 26, 27, 28)
+
+BUILTIN_EXERCISES = (
+    declare('pushup', 'Push-ups', 'Calisthenics', 'exercise_utils:analyze_pushup',
+            tip="Keep your back straight, lower until arms are at 90 degrees", landmarks=ARMS + (23,)),
+    declare('squat', 'Squats', 'Calisthenics', 'exercise_utils:analyze_squat',
+            tip="Keep knees aligned, lower until thighs are parallel to ground", landmarks=LEGS),
+    declare('curl', 'Bicep Curls', 'Dumbbell', 'exercise_utils:analyze_curl',
+            tip="Maintain even motion, full range of movement", landmarks=ARMS),
+    declare('plank', 'Plank Hold', 'Core', 'exercise_utils:analyze_plank', rep_mode='hold',
+            tip="Keep back straight and hips level", landmarks=(11, 12, 23, 24)),
+    declare('pullup', 'Pull-ups', 'Bar', 'exercise_utils:analyze_pullup',
+            tip="Pull until chin is over the bar, maintain even arm movement", landmarks=ARMS + (7,)),
+    declare('lunge', 'Lunges', 'Calisthenics', 'exercise_utils:analyze_lunge',
+            tip="Keep hips level, lower until back knee nearly touches ground", landmarks=LEGS),
+    declare('press', 'Shoulder Press', 'Dumbbell', 'exercise_utils:analyze_press',
+            tip="Press weights straight overhead with even arm movement", landmarks=ARMS),
+    declare('row', 'Rows', 'Dumbbell', 'exercise_utils:analyze_row',
+            tip="Maintain straight back while pulling weights toward chest", landmarks=ARMS + (23, 24)),
+    declare('goblet_squat', 'Goblet Squat', 'Dumbbell', 'exercise_utils:analyze_goblet_squat',
+            tip="Hold dumbbell close to chest, squat until thighs are parallel", landmarks=LEGS + (13,)),
+    declare('lateral_raise', 'Lateral Raise', 'Dumbbell', 'exercise_utils:analyze_lateral_raise',
+            tip="Raise arms to shoulder level, keep slight bend in elbows", landmarks=ARMS),
+    declare('tricep_extension', 'Tricep Extension', 'Dumbbell', 'exercise_utils:analyze_tricep_extension',
+            tip="Extend arms fully behind head, keep elbows close", landmarks=ARMS),
+    declare('front_raise', 'Front Raise', 'Dumbbell', 'exercise_utils:analyze_front_raise',
+            tip="Raise arms to shoulder level, control the movement", landmarks=ARMS),
+    declare('deadlift', 'Dumbbell Deadlift', 'Dumbbell', 'exercise_utils:analyze_deadlift',
+            tip="Hinge at hips, keep back straight, stand tall", landmarks=LEGS + (11, 12)),
+    declare('overhead_squat', 'Overhead Squat', 'Dumbbell', 'exercise_utils:analyze_overhead_squat',
+            tip="Keep arms overhead, squat until thighs are parallel", landmarks=LEGS + (11, 12, 15))
+)
+
+def import_object(path):
+    """Import 'module:attribute' and return the attribute."""
+    module_name, _, attribute = path.partition(':')
+    return getattr(importlib.import_module(module_name), attribute)
+
+class ExerciseRegistry:
+    """All exercises the app knows: the built-in ones plus any installed plugins.
+
+    Plugins are found through the ENTRY_POINT_GROUP entry points the first time
+    the registry is used; each entry point loads an ExerciseSpec, a sequence of
+    them or a callable returning them. Declarations are resolved once into
+    read-only lookups (specs, keys, categories, updown). An exercise's analyzer
+    is imported the first time registry[key] is called and the resulting
+    Exercise is cached, so the frame loop only reads attributes of it.
+    """
+
+    def __init__(self, specs=BUILTIN_EXERCISES, entry_point_group=ENTRY_POINT_GROUP):
+        self.builtin = tuple(specs)
+        self.entry_point_group = entry_point_group
+        self.extra = []
+        self.lock = threading.Lock()
+        self._loaded = False
+        self._resolved = {}
+
+    def register(self, spec):
+        """Add (or replace) an exercise at runtime."""
+        with self.lock:
+            self.extra.append(spec)
+            self._resolved.pop(spec.key, None)
+            if self._loaded:
+                self._build(self._declared + self.extra)
+
+    @property
+    def specs(self):
+        """Read-only mapping of exercise key to ExerciseSpec, in declaration order."""
+        self._load()
+        return self._specs
+
+    @property
+    def keys(self):
+        self._load()
+        return self._keys
+
+    @property
+    def categories(self):
+        """Read-only mapping of category to the keys of its exercises."""
+        self._load()
+        return self._categories
+
+    @property
+    def updown(self):
+        """Keys of the exercises counted with the down -> up state machine."""
+        self._load()
+        return self._updown
+
+    def __contains__(self, key):
+        return key in self.specs
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, key):
+        """The Exercise for key, importing its analyzer on first use."""
+        exercise = self._resolved.get(key)
+        if exercise is None:
+            spec = self.specs[key]
+            analyze = import_object(spec.analyzer) if isinstance(spec.analyzer, str) else spec.analyzer
+            exercise = Exercise(spec.key, spec.name, spec.category, analyze,
+                                spec.rep_mode == 'updown', spec.tip, spec.landmarks)
+            self._resolved[key] = exercise
+        return exercise
+
+    def _load(self):
+        if self._loaded:
+            return
+        with self.lock:
+            if self._loaded:
+                return
+            self._declared = list(self.builtin) + self._discover()
+            self._build(self._declared + self.extra)
+            self._loaded = True
+
+    def _discover(self):
+        """Declarations from installed plugins; broken plugins are logged and skipped."""
+        if entry_points is None or not self.entry_point_group:
+            return []
+        specs = []
+        try:
+            found = entry_points(group=self.entry_point_group)
+        except TypeError:
+            # Python < 3.10 returns a dict of groups
+            found = entry_points().get(self.entry_point_group, [])
+        for entry_point in found:
+            try:
+                declared = entry_point.load()
+                if callable(declared):
+                    declared = declared()
+                if isinstance(declared, ExerciseSpec):
+                    declared = [declared]
+                specs.extend(declared)
+            except Exception:
+                logger.warning("Failed to load exercise plugin %s", entry_point.name, exc_info=True)
+        return specs
+
+    def _build(self, specs):
+        by_key = {}
+        for spec in specs:
+            # Later declarations override earlier ones with the same key
+            by_key[spec.key] = spec
+        categories = {}
+        for spec in by_key.values():
+            categories.setdefault(spec.category, []).append(spec.key)
+        self._specs = MappingProxyType(by_key)
+        self._keys = tuple(by_key)
+        self._categories = MappingProxyType({category: tuple(keys) for category, keys in categories.items()})
+        self._updown = frozenset(spec.key for spec in by_key.values() if spec.rep_mode == 'updown')
+
+# The process-wide registry
+REGISTRY = ExerciseRegistry()
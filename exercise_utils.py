@@ -1,23 +1,42 @@
+from collections import namedtuple
+
 import numpy as np
 
-# Exercise definitions
-EXERCISES = {
-    'pushup': {'name': 'Push-ups', 'category': 'Calisthenics'},
-    'squat': {'name': 'Squats', 'category': 'Calisthenics'},
-    'curl': {'name': 'Bicep Curls', 'category': 'Dumbbell'},
-    'plank': {'name': 'Plank Hold', 'category': 'Core'},
-    'pullup': {'name': 'Pull-ups', 'category': 'Bar'},
-    'lunge': {'name': 'Lunges', 'category': 'Calisthenics'},
-    'press': {'name': 'Shoulder Press', 'category': 'Dumbbell'},
-    'row': {'name': 'Rows', 'category': 'Dumbbell'},
-    'goblet_squat': {'name': 'Goblet Squat', 'category': 'Dumbbell'},
-    'lateral_raise': {'name': 'Lateral Raise', 'category': 'Dumbbell'},
-    'tricep_extension': {'name': 'Tricep Extension', 'category': 'Dumbbell'},
-    'front_raise': {'name': 'Front Raise', 'category': 'Dumbbell'},
-    'deadlift': {'name': 'Dumbbell Deadlift', 'category': 'Dumbbell'},
-    'overhead_squat': {'name': 'Overhead Squat', 'category': 'Dumbbell'}
+from exercise_registry import BUILTIN_EXERCISES
+
+# Built-in exercise metadata, declared in exercise_registry.BUILTIN_EXERCISES
+EXERCISES = {spec.key: {'name': spec.name, 'category': spec.category} for spec in BUILTIN_EXERCISES}
+
+# A single landmark, attribute-compatible with MediaPipe's NormalizedLandmark
+Landmark = namedtuple('Landmark', ['x', 'y', 'z', 'visibility'])
+
+# Numeric codes for the states returned by the analyze_* functions
+STATES = ('ready', 'down', 'up', 'hold')
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+
+# Vectorized state rules mirroring the threshold logic of the analyze_* functions:
+# (signal, low threshold, state below it, high threshold, state above it)
+BATCH_STATE_RULES = {
+    'pushup': ('avg_arm_angle', 90, 'down', 160, 'up'),
+    'squat': ('avg_leg_angle', 90, 'down', 160, 'up'),
+    'curl': ('avg_arm_angle', 60, 'up', 150, 'down'),
+    'pullup': ('avg_arm_angle', 90, 'up', None, None),
+    'lunge': ('min_leg_angle', 90, 'down', 160, 'up'),
+    'press': ('avg_arm_angle', 90, 'down', 160, 'up'),
+    'row': ('avg_arm_angle', 60, 'up', 150, 'down'),
+    'goblet_squat': ('avg_leg_angle', 105, 'down', 150, 'up'),
+    'lateral_raise': ('avg_arm_angle', 90, 'down', 160, 'up'),
+    'tricep_extension': ('avg_arm_angle', 60, 'down', 150, 'up'),
+    'front_raise': ('avg_arm_angle', 90, 'down', 160, 'up'),
+    'deadlift': ('avg_leg_angle', 90, 'down', 160, 'up'),
+    'overhead_squat': ('avg_leg_angle', 90, 'down', 160, 'up')
 }
 
+def primary_signal(exercise):
+    """Feature that drives an exercise's states, e.g. for charts (back alignment for holds)."""
+    rule = BATCH_STATE_RULES.get(exercise)
+    return rule[0] if rule else 'back_alignment'
+
 def calculate_angle(a, b, c):
     """Calculate the angle between three points."""
     a = np.array([a.x, a.y])
@@ -32,24 +51,149 @@ def calculate_angle(a, b, c):
         
     return angle
 
+def _feature(func):
+    """Turn a FrameFeatures method into a lazily computed, per-frame cached attribute."""
+    name = func.__name__
+
+    def getter(self):
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = func(self)
+            return value
+
+    return property(getter, doc=func.__doc__)
+
+class FrameFeatures:
+    """Geometric features of one frame, computed on first access and shared by all consumers.
+
+    Call update() with the next frame's landmarks to invalidate every cached feature.
+    """
+
+    def __init__(self, landmarks=None):
+        self._cache = {}
+        self.landmarks = None
+        if landmarks is not None:
+            self.update(landmarks)
+
+    def update(self, landmarks):
+        """Start a new frame, dropping the features cached for the previous one.
+
+        Accepts MediaPipe landmarks or a (33, 4) array from a PoseBackend.
+        """
+        self._cache.clear()
+        if isinstance(landmarks, np.ndarray):
+            self._cache['array'] = landmarks
+            landmarks = array_to_landmarks(landmarks)
+        self.landmarks = landmarks
+        return self
+
+    def get(self, name):
+        """Return a feature by name."""
+        return getattr(self, name)
+
+    @_feature
+    def left_arm_angle(self):
+        """Left elbow angle (shoulder, elbow, wrist)."""
+        return calculate_angle(self.landmarks[11], self.landmarks[13], self.landmarks[15])
+
+    @_feature
+    def right_arm_angle(self):
+        """Right elbow angle (shoulder, elbow, wrist)."""
+        return calculate_angle(self.landmarks[12], self.landmarks[14], self.landmarks[16])
+
+    @_feature
+    def avg_arm_angle(self):
+        """Mean of both elbow angles."""
+        return (self.left_arm_angle + self.right_arm_angle) / 2
+
+    @_feature
+    def arm_asymmetry(self):
+        """Difference between the elbow angles."""
+        return abs(self.left_arm_angle - self.right_arm_angle)
+
+    @_feature
+    def left_leg_angle(self):
+        """Left knee angle (hip, knee, ankle)."""
+        return calculate_angle(self.landmarks[23], self.landmarks[25], self.landmarks[27])
+
+    @_feature
+    def right_leg_angle(self):
+        """Right knee angle (hip, knee, ankle)."""
+        return calculate_angle(self.landmarks[24], self.landmarks[26], self.landmarks[28])
+
+    @_feature
+    def avg_leg_angle(self):
+        """Mean of both knee angles."""
+        return (self.left_leg_angle + self.right_leg_angle) / 2
+
+    @_feature
+    def min_leg_angle(self):
+        """Angle of the more bent knee."""
+        return min(self.left_leg_angle, self.right_leg_angle)
+
+    @_feature
+    def leg_asymmetry(self):
+        """Difference between the knee angles."""
+        return abs(self.left_leg_angle - self.right_leg_angle)
+
+    @_feature
+    def shoulder_y(self):
+        """Mean shoulder height."""
+        return (self.landmarks[11].y + self.landmarks[12].y) / 2
+
+    @_feature
+    def hip_y(self):
+        """Mean hip height."""
+        return (self.landmarks[23].y + self.landmarks[24].y) / 2
+
+    @_feature
+    def back_alignment(self):
+        """Vertical offset between the mid-shoulders and mid-hips."""
+        return abs(self.hip_y - self.shoulder_y)
+
+    @_feature
+    def left_back_alignment(self):
+        """Vertical offset between the left shoulder and left hip."""
+        return abs(self.landmarks[23].y - self.landmarks[11].y)
+
+    @_feature
+    def hip_tilt(self):
+        """Vertical offset between the two hips."""
+        return abs(self.landmarks[23].y - self.landmarks[24].y)
+
+    @_feature
+    def chin_y(self):
+        """Height of the chin reference landmark."""
+        return self.landmarks[7].y
+
+    @_feature
+    def elbow_hip_angle(self):
+        """Angle at the left hip between the left elbow and the right hip."""
+        return calculate_angle(self.landmarks[13], self.landmarks[23], self.landmarks[24])
+
+    @_feature
+    def wrist_shoulder_angle(self):
+        """Angle at the left shoulder between the left wrist and the right shoulder."""
+        return calculate_angle(self.landmarks[15], self.landmarks[11], self.landmarks[12])
+
+    @_feature
+    def array(self):
+        """The frame's landmarks as a (33, 4) array."""
+        return landmarks_to_array(self.landmarks)
+
+def frame_features(landmarks):
+    """Return the FrameFeatures for landmarks, reusing it if one is passed in."""
+    if isinstance(landmarks, FrameFeatures):
+        return landmarks
+    return FrameFeatures(landmarks)
+
 def analyze_pushup(landmarks):
     """Analyze push-up form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Calculate back alignment
-    back_alignment = abs(left_hip.y - left_shoulder.y)
+    back_alignment = features.left_back_alignment
     
     # Determine state and provide feedback
     form_score = 100
@@ -57,7 +201,7 @@ def analyze_pushup(landmarks):
     state = "ready"
     
     # Check arm angles for push-up position
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
     if avg_arm_angle < 90:
         state = "down"
@@ -77,33 +221,23 @@ def analyze_pushup(landmarks):
 
 def analyze_squat(landmarks):
     """Analyze squat form and provide feedback."""
-    # Get relevant landmarks
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    left_knee = landmarks[25]
-    right_knee = landmarks[26]
-    left_ankle = landmarks[27]
-    right_ankle = landmarks[28]
-    
-    # Calculate angles
-    left_leg_angle = calculate_angle(left_hip, left_knee, left_ankle)
-    right_leg_angle = calculate_angle(right_hip, right_knee, right_ankle)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
+    avg_leg_angle = features.avg_leg_angle
     
     if avg_leg_angle < 90:
         state = "down"
-        if abs(left_leg_angle - right_leg_angle) > 15:
+        if features.leg_asymmetry > 15:
             feedback = "Keep your knees aligned"
             form_score -= 20
     elif avg_leg_angle > 160:
         state = "up"
-        if abs(left_leg_angle - right_leg_angle) > 15:
+        if features.leg_asymmetry > 15:
             feedback = "Maintain even weight distribution"
             form_score -= 20
     else:
@@ -114,33 +248,23 @@ def analyze_squat(landmarks):
 
 def analyze_curl(landmarks):
     """Analyze bicep curl form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
     if avg_arm_angle < 60:
         state = "up"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Keep both arms moving together"
             form_score -= 20
     elif avg_arm_angle > 150:
         state = "down"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Maintain even curl motion"
             form_score -= 20
     else:
@@ -151,26 +275,17 @@ def analyze_curl(landmarks):
 
 def analyze_plank(landmarks):
     """Analyze plank form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    left_ankle = landmarks[27]
-    right_ankle = landmarks[28]
-    
-    # Calculate back alignment
-    back_alignment = abs((left_hip.y + right_hip.y)/2 - (left_shoulder.y + right_shoulder.y)/2)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "hold"
     
-    if back_alignment > 0.1:
+    if features.back_alignment > 0.1:
         feedback = "Keep your back straight"
         form_score -= 30
-    elif abs(left_hip.y - right_hip.y) > 0.05:
+    elif features.hip_tilt > 0.05:
         feedback = "Keep your hips level"
         form_score -= 20
     else:
@@ -180,34 +295,23 @@ def analyze_plank(landmarks):
 
 def analyze_pullup(landmarks):
     """Analyze pull-up form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    chin = landmarks[7]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
-    if chin.y > (left_shoulder.y + right_shoulder.y)/2:
+    if features.chin_y > features.shoulder_y:
         state = "down"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Keep arms even during descent"
             form_score -= 20
     elif avg_arm_angle < 90:
         state = "up"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Pull evenly with both arms"
             form_score -= 20
     else:
@@ -218,31 +322,21 @@ def analyze_pullup(landmarks):
 
 def analyze_lunge(landmarks):
     """Analyze lunge form and provide feedback."""
-    # Get relevant landmarks
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    left_knee = landmarks[25]
-    right_knee = landmarks[26]
-    left_ankle = landmarks[27]
-    right_ankle = landmarks[28]
-    
-    # Calculate angles
-    left_leg_angle = calculate_angle(left_hip, left_knee, left_ankle)
-    right_leg_angle = calculate_angle(right_hip, right_knee, right_ankle)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    if min(left_leg_angle, right_leg_angle) < 90:
+    if features.min_leg_angle < 90:
         state = "down"
-        if abs(left_hip.y - right_hip.y) > 0.1:
+        if features.hip_tilt > 0.1:
             feedback = "Keep hips level during lunge"
             form_score -= 20
-    elif min(left_leg_angle, right_leg_angle) > 160:
+    elif features.min_leg_angle > 160:
         state = "up"
-        if abs(left_hip.y - right_hip.y) > 0.1:
+        if features.hip_tilt > 0.1:
             feedback = "Stand tall between lunges"
             form_score -= 20
     else:
@@ -253,33 +347,23 @@ def analyze_lunge(landmarks):
 
 def analyze_press(landmarks):
     """Analyze shoulder press form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
     if avg_arm_angle > 160:
         state = "up"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Press evenly with both arms"
             form_score -= 20
     elif avg_arm_angle < 90:
         state = "down"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Keep arms even during lowering"
             form_score -= 20
     else:
@@ -290,27 +374,15 @@ def analyze_press(landmarks):
 
 def analyze_row(landmarks):
     """Analyze dumbbell row form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
-    back_alignment = abs((left_shoulder.y + right_shoulder.y)/2 - (left_hip.y + right_hip.y)/2)
+    avg_arm_angle = features.avg_arm_angle
+    back_alignment = features.back_alignment
     
     if avg_arm_angle < 60:
         state = "up"
@@ -330,20 +402,10 @@ def analyze_row(landmarks):
 
 def analyze_goblet_squat(landmarks):
     """Analyze goblet squat form and provide feedback."""
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    left_knee = landmarks[25]
-    right_knee = landmarks[26]
-    left_ankle = landmarks[27]
-    right_ankle = landmarks[28]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-
-    left_leg_angle = calculate_angle(left_hip, left_knee, left_ankle)
-    right_leg_angle = calculate_angle(right_hip, right_knee, right_ankle)
-    arm_angle = calculate_angle(left_elbow, left_hip, right_hip)
-    avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
-    avg_hip_y = (left_hip.y + right_hip.y) / 2
+    features = frame_features(landmarks)
+
+    avg_leg_angle = features.avg_leg_angle
+    avg_hip_y = features.hip_y
 
     # Hysteresis: require a little more movement to switch states
     # These values can be tuned further
@@ -360,16 +422,16 @@ def analyze_goblet_squat(landmarks):
     # Down state: deep squat or hips low
     if avg_leg_angle < DOWN_THRESHOLD or avg_hip_y > HIP_DOWN_Y:
         state = "down"
-        if abs(left_leg_angle - right_leg_angle) > 15:
+        if features.leg_asymmetry > 15:
             feedback = "Keep your knees aligned"
             form_score -= 20
-        if arm_angle < 30:
+        if features.elbow_hip_angle < 30:
             feedback = "Keep dumbbell close to chest"
             form_score -= 15
     # Up state: nearly straight legs or hips high
     elif avg_leg_angle > UP_THRESHOLD or avg_hip_y < HIP_UP_Y:
         state = "up"
-        if abs(left_leg_angle - right_leg_angle) > 15:
+        if features.leg_asymmetry > 15:
             feedback = "Maintain even weight distribution"
             form_score -= 20
     else:
@@ -380,33 +442,23 @@ def analyze_goblet_squat(landmarks):
 
 def analyze_lateral_raise(landmarks):
     """Analyze lateral raise form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
     if avg_arm_angle > 160:
         state = "up"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Raise both arms evenly"
             form_score -= 20
     elif avg_arm_angle < 90:
         state = "down"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Lower both arms together"
             form_score -= 20
     else:
@@ -417,33 +469,23 @@ def analyze_lateral_raise(landmarks):
 
 def analyze_tricep_extension(landmarks):
     """Analyze tricep extension form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
     if avg_arm_angle < 60:
         state = "down"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Keep both arms moving together"
             form_score -= 20
     elif avg_arm_angle > 150:
         state = "up"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Extend arms fully and evenly"
             form_score -= 20
     else:
@@ -454,33 +496,23 @@ def analyze_tricep_extension(landmarks):
 
 def analyze_front_raise(landmarks):
     """Analyze front raise form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_elbow = landmarks[13]
-    right_elbow = landmarks[14]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    
-    # Calculate angles
-    left_arm_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-    right_arm_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_arm_angle = (left_arm_angle + right_arm_angle) / 2
+    avg_arm_angle = features.avg_arm_angle
     
     if avg_arm_angle > 160:
         state = "up"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Raise both arms evenly"
             form_score -= 20
     elif avg_arm_angle < 90:
         state = "down"
-        if abs(left_arm_angle - right_arm_angle) > 15:
+        if features.arm_asymmetry > 15:
             feedback = "Lower both arms together"
             form_score -= 20
     else:
@@ -491,27 +523,16 @@ def analyze_front_raise(landmarks):
 
 def analyze_deadlift(landmarks):
     """Analyze dumbbell deadlift form and provide feedback."""
-    # Get relevant landmarks
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    left_knee = landmarks[25]
-    right_knee = landmarks[26]
-    left_ankle = landmarks[27]
-    right_ankle = landmarks[28]
-    
-    # Calculate angles
-    left_leg_angle = calculate_angle(left_hip, left_knee, left_ankle)
-    right_leg_angle = calculate_angle(right_hip, right_knee, right_ankle)
-    back_angle = abs((left_shoulder.y + right_shoulder.y)/2 - (left_hip.y + right_hip.y)/2)
+    features = frame_features(landmarks)
+    
+    back_angle = features.back_alignment
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
+    avg_leg_angle = features.avg_leg_angle
     
     if avg_leg_angle < 90:
         state = "down"
@@ -531,45 +552,135 @@ def analyze_deadlift(landmarks):
 
 def analyze_overhead_squat(landmarks):
     """Analyze overhead squat form and provide feedback."""
-    # Get relevant landmarks
-    left_hip = landmarks[23]
-    right_hip = landmarks[24]
-    left_knee = landmarks[25]
-    right_knee = landmarks[26]
-    left_ankle = landmarks[27]
-    right_ankle = landmarks[28]
-    left_shoulder = landmarks[11]
-    right_shoulder = landmarks[12]
-    left_wrist = landmarks[15]
-    right_wrist = landmarks[16]
-    
-    # Calculate angles
-    left_leg_angle = calculate_angle(left_hip, left_knee, left_ankle)
-    right_leg_angle = calculate_angle(right_hip, right_knee, right_ankle)
-    arm_angle = calculate_angle(left_wrist, left_shoulder, right_shoulder)
+    features = frame_features(landmarks)
     
     # Determine state and provide feedback
     form_score = 100
     feedback = ""
     state = "ready"
     
-    avg_leg_angle = (left_leg_angle + right_leg_angle) / 2
+    avg_leg_angle = features.avg_leg_angle
     
     if avg_leg_angle < 90:
         state = "down"
-        if abs(left_leg_angle - right_leg_angle) > 15:
+        if features.leg_asymmetry > 15:
             feedback = "Keep your knees aligned"
             form_score -= 20
-        if arm_angle < 160:
+        if features.wrist_shoulder_angle < 160:
             feedback = "Keep arms overhead"
             form_score -= 15
     elif avg_leg_angle > 160:
         state = "up"
-        if abs(left_leg_angle - right_leg_angle) > 15:
+        if features.leg_asymmetry > 15:
             feedback = "Maintain even weight distribution"
             form_score -= 20
     else:
         state = "ready"
         feedback = "Lower until thighs are parallel to ground"
     
-    return state, form_score, feedback 
\ No newline at end of file
+    return state, form_score, feedback
+
+# Analysis functions of the built-in exercises (plugins are looked up through exercise_registry.REGISTRY);
+# keep in step with the analyzer paths in BUILTIN_EXERCISES
+ANALYZERS = {
+    'pushup': analyze_pushup,
+    'squat': analyze_squat,
+    'curl': analyze_curl,
+    'plank': analyze_plank,
+    'pullup': analyze_pullup,
+    'lunge': analyze_lunge,
+    'press': analyze_press,
+    'row': analyze_row,
+    'goblet_squat': analyze_goblet_squat,
+    'lateral_raise': analyze_lateral_raise,
+    'tricep_extension': analyze_tricep_extension,
+    'front_raise': analyze_front_raise,
+    'deadlift': analyze_deadlift,
+    'overhead_squat': analyze_overhead_squat
+}
+
+def landmarks_to_array(landmarks, out=None):
+    """Convert MediaPipe landmarks to a (33, 4) array of x, y, z, visibility."""
+    if out is None:
+        out = np.empty((len(landmarks), 4), dtype=np.float32)
+    for i, lm in enumerate(landmarks):
+        out[i, 0] = lm.x
+        out[i, 1] = lm.y
+        out[i, 2] = lm.z
+        out[i, 3] = lm.visibility
+    return out
+
+def array_to_landmarks(array):
+    """Convert a (33, 4) landmark array to a list of Landmark tuples."""
+    return [Landmark(*row) for row in array.tolist()]
+
+def calculate_angles(a, b, c):
+    """Calculate angles at b for arrays of points shaped (..., 2) or more."""
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    angle = np.abs(radians * 180.0 / np.pi)
+    return np.where(angle > 180.0, 360 - angle, angle)
+
+def batch_features(frames):
+    """Compute the joint angles and alignments used by the analyzers for (N, 33, 4) frames."""
+    left_arm_angle = calculate_angles(frames[:, 11], frames[:, 13], frames[:, 15])
+    right_arm_angle = calculate_angles(frames[:, 12], frames[:, 14], frames[:, 16])
+    left_leg_angle = calculate_angles(frames[:, 23], frames[:, 25], frames[:, 27])
+    right_leg_angle = calculate_angles(frames[:, 24], frames[:, 26], frames[:, 28])
+    shoulder_y = (frames[:, 11, 1] + frames[:, 12, 1]) / 2
+    hip_y = (frames[:, 23, 1] + frames[:, 24, 1]) / 2
+
+    return {
+        'left_arm_angle': left_arm_angle,
+        'right_arm_angle': right_arm_angle,
+        'avg_arm_angle': (left_arm_angle + right_arm_angle) / 2,
+        'left_leg_angle': left_leg_angle,
+        'right_leg_angle': right_leg_angle,
+        'avg_leg_angle': (left_leg_angle + right_leg_angle) / 2,
+        'min_leg_angle': np.minimum(left_leg_angle, right_leg_angle),
+        'shoulder_y': shoulder_y,
+        'hip_y': hip_y,
+        'back_alignment': np.abs(hip_y - shoulder_y),
+        'chin_y': frames[:, 7, 1]
+    }
+
+def rule_states(exercise, features, low=None, high=None):
+    """States of one exercise from its BATCH_STATE_RULES entry over batch_features().
+
+    low and high replace the rule's thresholds; (K, 1) arrays evaluate K
+    threshold pairs at once and give (K, N) states instead of (N,).
+    """
+    signal, rule_low, low_state, rule_high, high_state = BATCH_STATE_RULES[exercise]
+    low = rule_low if low is None else low
+    high = rule_high if high is None else high
+    values = features[signal]
+    states = np.zeros(np.broadcast(values, low).shape, dtype=np.int8)
+    if rule_high is not None:
+        states[values > high] = STATE_CODES[high_state]
+    states[values < low] = STATE_CODES[low_state]
+
+    # Secondary checks that take precedence over the angle thresholds
+    if exercise == 'pullup':
+        states[..., features['chin_y'] > features['shoulder_y']] = STATE_CODES['down']
+    elif exercise == 'goblet_squat':
+        ready = states == STATE_CODES['ready']
+        states[ready & (features['hip_y'] < 0.45)] = STATE_CODES['up']
+        states[..., features['hip_y'] > 0.55] = STATE_CODES['down']
+    return states
+
+def batch_states(frames, features=None):
+    """Evaluate every exercise in EXERCISES over (N, 33, 4) frames in one pass.
+
+    Returns an (len(EXERCISES), N) array of STATE_CODES, rows in EXERCISES order.
+    """
+    if features is None:
+        features = batch_features(frames)
+    states = np.zeros((len(EXERCISES), len(frames)), dtype=np.int8)
+
+    for row, exercise in enumerate(EXERCISES):
+        if exercise == 'plank':
+            states[row] = STATE_CODES['hold']
+        else:
+            states[row] = rule_states(exercise, features)
+
+    return states
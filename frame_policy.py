@@ -0,0 +1,121 @@
+import time
+
+# Back-pressure policies for frames queued while processing falls behind
+DROP_POLICIES = {
+    'drop_oldest': 'Drop oldest (lowest latency)',
+    'drop_newest': 'Drop newest (keep arrival order)',
+    'decimate': 'Decimate to a fixed frame rate'
+}
+
+class FrameDropPolicy:
+    """Decide which queued frames get processed when the pipeline falls behind.
+
+    At most max_queue frames are processed per batch, and frames more than
+    max_latency seconds behind the live stream are dropped as late, so latency
+    stays bounded under overload instead of growing until the stream desyncs.
+    The newest frame is always returned last so the overlay keeps moving; when
+    decimating and it is not due, newest_due is False and it should only be
+    displayed, with the pose extrapolated rather than estimated.
+    """
+
+    def __init__(self, policy='drop_oldest', max_queue=2, target_fps=15.0,
+                 max_latency=0.25, wall_clock=time.monotonic):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.policy = policy
+        self.max_queue = max_queue
+        self.target_fps = target_fps
+        self.max_latency = max_latency
+        self.wall_clock = wall_clock
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the per-session counters."""
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.late = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self._min_offset = None
+        self._last_frame_time = None
+        self._last_kept_time = None
+        self.newest_due = True
+
+    def stats(self):
+        """Return the per-session counters as a dict."""
+        return {
+            'received': self.received,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'late': self.late,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag
+        }
+
+    def select(self, frames):
+        """Return the frames to process, oldest first and ending with the newest, counting the ones left out."""
+        now = self.wall_clock()
+        newest = frames[-1]
+        kept = []
+        late = 0
+
+        for frame in frames:
+            frame_time = self._frame_time(frame, now)
+            lag = self._lag(frame_time, now)
+            if frame is not newest and lag > self.max_latency:
+                late += 1
+                continue
+            if self.policy == 'decimate':
+                if not self._due(frame_time):
+                    continue
+                self._last_kept_time = frame_time
+            kept.append(frame)
+
+        # Bound the number of frames processed per batch
+        if len(kept) > self.max_queue:
+            if self.policy == 'drop_newest':
+                # Keep arrival order but still finish on the newest frame
+                kept = kept[:self.max_queue - 1] + kept[-1:]
+            else:
+                kept = kept[-self.max_queue:]
+
+        self.received += len(frames)
+        self.processed += len(kept)
+        self.late += late
+        self.dropped += len(frames) - len(kept) - late
+
+        # A newest frame the decimation skipped is still displayed, but counts as dropped
+        self.newest_due = bool(kept) and kept[-1] is newest
+        if not self.newest_due:
+            kept.append(newest)
+        return kept
+
+    def _frame_time(self, frame, now):
+        """Presentation time of a frame in seconds, or the wall clock without timestamps."""
+        if frame.pts is None or not frame.time_base:
+            return now
+        frame_time = float(frame.pts * frame.time_base)
+        if self._last_frame_time is not None and frame_time < self._last_frame_time:
+            # Timestamps restarted, measure lag against the new stream
+            self._min_offset = None
+            self._last_kept_time = None
+        self._last_frame_time = frame_time
+        return frame_time
+
+    def _lag(self, frame_time, now):
+        """How far a frame is behind the least delayed frame seen so far."""
+        offset = now - frame_time
+        if self._min_offset is None or offset < self._min_offset:
+            self._min_offset = offset
+        lag = offset - self._min_offset
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        return lag
+
+    def _due(self, frame_time):
+        """Whether enough stream time has passed since the last kept frame when decimating."""
+        if self._last_kept_time is None:
+            return True
+        # Small tolerance so 30 fps input decimates evenly to 15 fps
+        return frame_time - self._last_kept_time >= 0.95 / self.target_fps
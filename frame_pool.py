@@ -0,0 +1,65 @@
+import av
+import numpy as np
+
+class FramePool:
+    """Round-robin pool of reusable bgr24 output frames.
+
+    Each entry is an av.VideoFrame paired with a writable ndarray view of its
+    pixels, so drawing into the view fills the frame without allocating a new
+    image or frame.
+
+    A frame is handed out again size acquire() calls later, while the WebRTC
+    track may still hold the last two frames it was given (the one queued for
+    sending and the one being encoded). Callers must therefore acquire at most
+    size - 2 frames per frame they return to the track; PoseTransformer
+    acquires exactly one.
+    """
+
+    def __init__(self, size=4):
+        self.size = size
+        self.frames = []
+        self.views = []
+        self.index = 0
+        self.shape = None
+        self.allocations = 0
+
+    def acquire(self, width, height):
+        """Return the next (frame, view) pair, reallocating when the resolution changes."""
+        if self.shape != (height, width):
+            self._allocate(width, height)
+        index = self.index
+        self.index = (index + 1) % self.size
+        return self.frames[index], self.views[index]
+
+    def release(self):
+        """Drop the pooled frames; the next acquire() allocates them again."""
+        self.frames = []
+        self.views = []
+        self.shape = None
+
+    def nbytes(self):
+        return sum(view.nbytes for view in self.views)
+
+    def _allocate(self, width, height):
+        """Create the pooled frames and their pixel views for a new resolution."""
+        self.frames = []
+        self.views = []
+        for _ in range(self.size):
+            frame = av.VideoFrame(width, height, 'bgr24')
+            plane = frame.planes[0]
+            # Rows may be padded, so view the plane with its own line size
+            view = np.ndarray(
+                (height, width, 3), dtype=np.uint8, buffer=plane,
+                strides=(plane.line_size, 3, 1)
+            )
+            self.frames.append(frame)
+            self.views.append(view)
+        self.index = 0
+        self.shape = (height, width)
+        self.allocations += self.size
+
+def resize_buffer(buffer, shape, dtype=np.uint8):
+    """Return buffer if it already has shape, otherwise a new empty array of that shape."""
+    if buffer is None or buffer.shape != shape:
+        return np.empty(shape, dtype=dtype)
+    return buffer
@@ -0,0 +1,222 @@
+// Browser-side pose estimation for the AI Fitness Trainer.
+//
+// Runs MediaPipe Pose Landmarker (Tasks API, WebAssembly/WebGL) on the local
+// camera and sends only landmark frames to the Streamlit app: 33 x (x, y, z,
+// visibility) float32 per frame, batched every batch_ms. The video never
+// leaves the browser. The Python side (client_pose.py) runs the exercise
+// analyzers and rep counter and sends its result back for the overlay.
+
+import {
+  FilesetResolver,
+  PoseLandmarker
+} from "https://cdn.jsdelivr.net/npm/@mediapipe/tasks-vision@0.10.14/vision_bundle.mjs";
+
+const WASM_URL = "https://cdn.jsdelivr.net/npm/@mediapipe/tasks-vision@0.10.14/wasm";
+const MODEL_URL = (model) =>
+  `https://storage.googleapis.com/mediapipe-models/pose_landmarker/pose_landmarker_${model}/float16/latest/pose_landmarker_${model}.task`;
+
+const NUM_LANDMARKS = 33;
+const FRAME_FLOATS = NUM_LANDMARKS * 4;
+// Most frames held between two batches; older ones are dropped if the page stalls
+const MAX_BATCH_FRAMES = 64;
+
+// Skeleton edges between the 33 BlazePose landmarks (same as pose_backends.POSE_CONNECTIONS)
+const POSE_CONNECTIONS = [
+  [0, 1], [0, 4], [1, 2], [2, 3], [3, 7], [4, 5], [5, 6], [6, 8], [9, 10],
+  [11, 12], [11, 13], [11, 23], [12, 14], [12, 24], [13, 15], [14, 16],
+  [15, 17], [15, 19], [15, 21], [16, 18], [16, 20], [16, 22], [17, 19],
+  [18, 20], [23, 24], [23, 25], [24, 26], [25, 27], [26, 28], [27, 29],
+  [27, 31], [28, 30], [28, 32], [29, 31], [30, 32]
+];
+
+const video = document.getElementById("video");
+const canvas = document.getElementById("overlay");
+const ctx = canvas.getContext("2d");
+const hud = document.getElementById("hud");
+const toggle = document.getElementById("toggle");
+const status = document.getElementById("status");
+
+// Session id so the server can tell a restarted component from a duplicate batch
+const session = Math.random().toString(36).slice(2);
+
+let args = { model: "lite", confidence: 0.5, batch_ms: 250, result: {} };
+let landmarker = null;
+let loadedModel = null;
+let stream = null;
+let running = false;
+let lastVideoTime = -1;
+
+// Frames estimated since the last batch, preallocated
+const batchLandmarks = new Float32Array(MAX_BATCH_FRAMES * FRAME_FLOATS);
+const batchTimestamps = new Array(MAX_BATCH_FRAMES);
+let batchFrames = 0;
+let seq = 0;
+let lastSent = 0;
+let sentBytes = 0;
+
+// Streamlit component protocol
+function sendMessage(type, data) {
+  window.parent.postMessage({ isStreamlitMessage: true, type, ...data }, "*");
+}
+
+function setFrameHeight() {
+  sendMessage("streamlit:setFrameHeight", { height: document.body.scrollHeight });
+}
+
+window.addEventListener("message", (event) => {
+  if (event.data.type !== "streamlit:render") return;
+  const previous = args;
+  args = { ...args, ...event.data.args };
+  drawHud(args.result || {});
+  if (args.model !== loadedModel) {
+    loadModel(args.model);
+  } else if (landmarker && args.confidence !== previous.confidence) {
+    landmarker.setOptions({
+      minPoseDetectionConfidence: args.confidence,
+      minTrackingConfidence: args.confidence
+    });
+  }
+  setFrameHeight();
+});
+
+async function loadModel(model) {
+  loadedModel = model;
+  toggle.disabled = true;
+  toggle.textContent = "Loading model...";
+  const vision = await FilesetResolver.forVisionTasks(WASM_URL);
+  const options = (delegate) => ({
+    baseOptions: { modelAssetPath: MODEL_URL(model), delegate },
+    runningMode: "VIDEO",
+    numPoses: 1,
+    minPoseDetectionConfidence: args.confidence,
+    minTrackingConfidence: args.confidence
+  });
+  const previous = landmarker;
+  try {
+    landmarker = await PoseLandmarker.createFromOptions(vision, options("GPU"));
+  } catch (error) {
+    // No WebGL: fall back to WebAssembly on the CPU
+    landmarker = await PoseLandmarker.createFromOptions(vision, options("CPU"));
+  }
+  if (previous) previous.close();
+  toggle.disabled = false;
+  toggle.textContent = running ? "Stop" : "Start";
+}
+
+toggle.addEventListener("click", () => (running ? stop() : start()));
+
+async function start() {
+  stream = await navigator.mediaDevices.getUserMedia({
+    video: { width: { ideal: 640 }, height: { ideal: 480 } },
+    audio: false
+  });
+  video.srcObject = stream;
+  await video.play();
+  canvas.width = video.videoWidth;
+  canvas.height = video.videoHeight;
+  setFrameHeight();
+  running = true;
+  toggle.textContent = "Stop";
+  requestAnimationFrame(loop);
+}
+
+function stop() {
+  running = false;
+  flush();
+  stream.getTracks().forEach((track) => track.stop());
+  stream = null;
+  toggle.textContent = "Start";
+}
+
+function loop() {
+  if (!running) return;
+  if (video.currentTime !== lastVideoTime) {
+    lastVideoTime = video.currentTime;
+    const now = performance.now();
+    const result = landmarker.detectForVideo(video, now);
+    const landmarks = result.landmarks && result.landmarks[0];
+    push(now / 1000, landmarks);
+    draw(landmarks);
+  }
+  if (performance.now() - lastSent >= args.batch_ms) flush();
+  requestAnimationFrame(loop);
+}
+
+function push(timestamp, landmarks) {
+  if (batchFrames === MAX_BATCH_FRAMES) {
+    // The page stalled: keep the newest frames
+    batchLandmarks.copyWithin(0, FRAME_FLOATS);
+    batchTimestamps.shift();
+    batchFrames -= 1;
+  }
+  const offset = batchFrames * FRAME_FLOATS;
+  for (let i = 0; i < NUM_LANDMARKS; i++) {
+    const point = landmarks && landmarks[i];
+    const o = offset + i * 4;
+    batchLandmarks[o] = point ? point.x : NaN;
+    batchLandmarks[o + 1] = point ? point.y : NaN;
+    batchLandmarks[o + 2] = point ? point.z : NaN;
+    batchLandmarks[o + 3] = point ? (point.visibility ?? 1) : NaN;
+  }
+  batchTimestamps[batchFrames] = timestamp;
+  batchFrames += 1;
+}
+
+function flush() {
+  lastSent = performance.now();
+  if (!batchFrames) return;
+  // Float32Array is little-endian on every browser platform in use
+  const bytes = new Uint8Array(batchLandmarks.buffer, 0, batchFrames * FRAME_FLOATS * 4);
+  let binary = "";
+  for (let i = 0; i < bytes.length; i += 0x8000) {
+    binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+  }
+  const landmarks = btoa(binary);
+  sendMessage("streamlit:setComponentValue", {
+    value: { session, seq: ++seq, timestamps: batchTimestamps.slice(0, batchFrames), landmarks },
+    dataType: "json"
+  });
+  sentBytes += landmarks.length;
+  status.textContent = `${seq} batches, ${(sentBytes / 1024).toFixed(0)} KB sent`;
+  batchFrames = 0;
+}
+
+function draw(landmarks) {
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  if (!landmarks) return;
+  const w = canvas.width;
+  const h = canvas.height;
+  const visible = (point) => (point.visibility ?? 1) > args.confidence;
+  ctx.strokeStyle = "#ff0000";
+  ctx.lineWidth = 2;
+  for (const [a, b] of POSE_CONNECTIONS) {
+    if (visible(landmarks[a]) && visible(landmarks[b])) {
+      ctx.beginPath();
+      ctx.moveTo(landmarks[a].x * w, landmarks[a].y * h);
+      ctx.lineTo(landmarks[b].x * w, landmarks[b].y * h);
+      ctx.stroke();
+    }
+  }
+  ctx.fillStyle = "#00ff00";
+  for (const point of landmarks) {
+    if (visible(point)) {
+      ctx.beginPath();
+      ctx.arc(point.x * w, point.y * h, 4, 0, 2 * Math.PI);
+      ctx.fill();
+    }
+  }
+}
+
+function drawHud(result) {
+  if (result.state === undefined) {
+    hud.innerHTML = "";
+    return;
+  }
+  hud.innerHTML =
+    `<div class="state">State: ${String(result.state).toUpperCase()}</div>` +
+    `<div class="reps">Reps: ${result.reps}</div>` +
+    `<div class="score">Score: ${result.form_score}%</div>`;
+}
+
+sendMessage("streamlit:componentReady", { apiVersion: 1 });
+setFrameHeight();
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict, deque
+
+import cv2
+import numpy as np
+
+from pose_backends import NUM_LANDMARKS
+
+class KeyframeCapture:
+    """Keep the bottom and top frame of every rep for form review.
+
+    Every processed frame is downscaled into a preallocated ring of the last
+    capacity frames together with its landmarks, form score and state; nothing
+    is allocated per frame. The middle frame of each 'down' phase is copied out
+    when the phase ends, and when a rep is counted it is saved with the current
+    frame into the gallery of the current set. The gallery keeps at most
+    max_reps reps for each of the last max_sets sets, so memory is bounded
+    however long the session runs. push() and on_rep() run on the frame thread
+    and reset(), new_set() and gallery() on the script thread, so the ring and
+    the gallery are only touched under the lock.
+    """
+
+    def __init__(self, capacity=30, width=160, max_reps=20, max_sets=3):
+        self.capacity = capacity
+        self.width = width
+        self.max_reps = max_reps
+        self.max_sets = max_sets
+        self.images = None
+        self.landmarks = np.full((capacity, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        self.form_scores = np.zeros(capacity, dtype=np.float32)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget the buffered frames and every set."""
+        with self.lock:
+            self.count = 0
+            self.state = None
+            self.down_start = None
+            self.bottom = None
+            self.set_number = 1
+            self.sets = OrderedDict([(1, deque(maxlen=self.max_reps))])
+
+    def push(self, image, landmarks, form_score, state, timestamp):
+        """Buffer one annotated BGR frame with its analysis."""
+        with self.lock:
+            self._push(image, landmarks, form_score, state, timestamp)
+
+    def _push(self, image, landmarks, form_score, state, timestamp):
+        if self.images is None or self.images.shape[2] != min(self.width, image.shape[1]):
+            # Allocate the ring once the frame size is known (again only if it changes)
+            out_width = min(self.width, image.shape[1])
+            out_height = max(round(image.shape[0] * out_width / image.shape[1]), 1)
+            self.images = np.zeros((self.capacity, out_height, out_width, 3), dtype=np.uint8)
+
+        # Nearest-neighbour scaling is ~4x cheaper than bilinear and fine for thumbnails
+        slot = self.count % self.capacity
+        cv2.resize(image, self.images.shape[2:0:-1], dst=self.images[slot], interpolation=cv2.INTER_NEAREST)
+        if landmarks is None:
+            self.landmarks[slot] = np.nan
+        else:
+            self.landmarks[slot] = landmarks
+        self.form_scores[slot] = form_score
+        self.timestamps[slot] = timestamp
+
+        # The middle of each run of 'down' frames is the bottom of the rep; copy
+        # it out when the run ends, before the ring overwrites it on slow reps
+        if state == 'down' and self.state != 'down':
+            self.down_start = self.count
+        elif state != 'down' and self.state == 'down':
+            self.bottom = self._snapshot(self._middle_of_down(self.count - 1))
+        self.state = state
+        self.count += 1
+
+    def on_rep(self, rep):
+        """Save the bottom and top keyframes of a rep that was just counted."""
+        with self.lock:
+            if not self.count or self.images is None:
+                return
+            top = self.count - 1
+            bottom = self.bottom
+            if self.state == 'down' or bottom is None:
+                bottom = self._snapshot(self._middle_of_down(top))
+            entry = {
+                'rep': rep,
+                'bottom': bottom,
+                'top': self._snapshot(top)
+            }
+            self.bottom = None
+            self.sets[self.set_number].append(entry)
+
+    def new_set(self):
+        """Start the gallery of the next set, dropping the oldest set beyond max_sets."""
+        with self.lock:
+            self.set_number += 1
+            self.sets[self.set_number] = deque(maxlen=self.max_reps)
+            while len(self.sets) > self.max_sets:
+                self.sets.popitem(last=False)
+            self.bottom = None
+
+    def gallery(self, set_number=None):
+        """Keyframes of one set (the current one by default), oldest rep first."""
+        with self.lock:
+            reps = self.sets.get(self.set_number if set_number is None else set_number, ())
+            return list(reps)
+
+    def release(self):
+        """Free the frame ring (kept galleries stay); push() allocates it again."""
+        with self.lock:
+            self.images = None
+
+    def nbytes(self):
+        """Bytes held by the frame ring and the saved keyframes."""
+        with self.lock:
+            saved = sum(snapshot['image'].nbytes + snapshot['landmarks'].nbytes
+                        for reps in self.sets.values() for entry in reps
+                        for snapshot in (entry['bottom'], entry['top']))
+            ring = self.images.nbytes if self.images is not None else 0
+        return ring + self.landmarks.nbytes + saved
+
+    def _middle_of_down(self, end):
+        """Middle frame of the 'down' run ending at end, or the oldest buffered frame."""
+        oldest = max(self.count - self.capacity, 0)
+        if self.down_start is None:
+            return oldest
+        return max((self.down_start + end) // 2, oldest)
+
+    def _snapshot(self, index):
+        slot = index % self.capacity
+        return {
+            'image': self.images[slot].copy(),
+            'landmarks': self.landmarks[slot].copy(),
+            'form_score': float(self.form_scores[slot]),
+            'time': float(self.timestamps[slot])
+        }
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Persistent by default so re-analysis is fast across runs
+LANDMARK_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache')), 'fitness_trainer', 'landmarks'
+)
+
+# Age after which an unfinished entry is considered abandoned
+STALE_STAGING_SECONDS = 3600
+
+# Arrays of an extract_landmarks() result, one .npy file each
+ARRAYS = ('landmarks', 'confidences', 'timestamps', 'latencies')
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class LandmarkCache:
+    """Landmarks extracted from video files, stored on disk by content.
+
+    Entries are keyed by the SHA-256 of the video plus the backend's
+    describe() and the frame limit, so renaming or copying a file still
+    hits while a different model or setting misses. Each entry is a
+    directory of .npy files that are memory-mapped on load; it is written
+    under a temporary name and renamed into place, so readers never see a
+    partial entry. When the cache grows beyond max_bytes, the least
+    recently used entries are deleted (use is recorded in the entry's mtime).
+    """
+
+    def __init__(self, directory=LANDMARK_CACHE_DIR, max_bytes=2 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Content digests by (path, size, mtime), so a file is hashed once per process
+        self.digests = {}
+
+    def digest(self, path):
+        stat = os.stat(path)
+        identity = (os.path.realpath(path), stat.st_size, stat.st_mtime_ns)
+        if identity not in self.digests:
+            self.digests[identity] = file_digest(path)
+        return self.digests[identity]
+
+    def key(self, path, backend, max_frames=None):
+        """Cache key of a video analyzed with a backend."""
+        config = json.dumps({'backend': backend.describe(), 'max_frames': max_frames}, sort_keys=True)
+        return hashlib.sha256(f"{self.digest(path)}\n{config}".encode()).hexdigest()[:32]
+
+    def get(self, key):
+        """The cached arrays (memory-mapped) for key, or None."""
+        entry = os.path.join(self.directory, key)
+        try:
+            result = {name: np.load(os.path.join(entry, name + '.npy'), mmap_mode='r') for name in ARRAYS}
+            os.utime(entry)
+        except (OSError, ValueError):
+            return None
+        return result
+
+    def put(self, key, result, metadata=None):
+        """Store the arrays of an extract_landmarks() result under key."""
+        os.makedirs(self.directory, exist_ok=True)
+        entry = os.path.join(self.directory, key)
+        staging = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex[:8]}")
+        os.makedirs(staging)
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(staging, name + '.npy'), np.ascontiguousarray(result[name]))
+            with open(os.path.join(staging, 'meta.json'), 'w') as f:
+                json.dump({**(metadata or {}), 'frames': len(result['timestamps']), 'created': time.time()}, f)
+            os.rename(staging, entry)
+        except OSError:
+            # Another process stored the same entry first, or the disk is full
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep=key)
+
+    def extract(self, path, backend, max_frames=None):
+        """extract_landmarks() through the cache: inference only runs on a miss."""
+        from offline_analysis import extract_landmarks
+
+        key = self.key(path, backend, max_frames)
+        result = self.get(key)
+        with self.lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if result is not None:
+            return result
+        result = extract_landmarks(path, backend, max_frames)
+        self.put(key, result, {'source': os.path.basename(path), 'backend': backend.describe()})
+        return result
+
+    def entries(self):
+        """(last used, bytes, path) of every entry, least recently used first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            entry = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, file)) for file in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                # Evicted by another process meanwhile
+                continue
+        return sorted(entries)
+
+    def evict(self, keep=None):
+        """Delete least recently used entries until the cache fits max_bytes; returns how many."""
+        # Staging directories left behind by a process that died while writing
+        for name in os.listdir(self.directory):
+            staging = os.path.join(self.directory, name)
+            try:
+                if name.startswith('.') and time.time() - os.path.getmtime(staging) > STALE_STAGING_SECONDS:
+                    shutil.rmtree(staging, ignore_errors=True)
+            except OSError:
+                continue
+
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(entry) == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            evicted += 1
+        if evicted:
+            logger.info("Evicted %d landmark cache entries, %.1f MB left", evicted, total / 1e6)
+        return evicted
+
+    def clear(self):
+        for _, _, entry in self.entries():
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def stats(self):
+        """Return the cache counters as a dict."""
+        entries = self.entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
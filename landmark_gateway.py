@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Landmark ingestion gateway for devices that estimate the pose themselves.
+
+Each WebSocket connection is one session. Clients send landmark frames, as
+binary FRAME_DTYPE records or as the JSON batches of the browser component
+(client_pose.encode_batch), and get the session's state and rep counts back
+after every message. Frames arriving from all sessions within a short window
+are analyzed together: features and states for the whole (B, 33, 4) batch in
+one numpy pass, rep counting with one BatchRepCounter update per frame slot
+(or a PeakRepCounter for exercises that count signal peaks by default).
+
+    python landmark_gateway.py --port 8765 --window-ms 10
+
+    ws://host:8765/?exercise=squat      one session, analyzing squats
+    {"exercise": "lunge"}               text message switching the exercise
+    GET http://host:8765/stats          gateway counters as JSON
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from client_pose import decode_batch
+from exercise_registry import REGISTRY
+from exercise_utils import EXERCISES, STATES, FrameFeatures, batch_features, batch_states
+from pose_backends import NUM_LANDMARKS
+from rep_counter import BatchRepCounter, create_rep_counter, default_rep_counter, rep_signal
+
+try:
+    from websockets.asyncio.server import serve
+except ImportError:
+    serve = None
+
+logger = logging.getLogger(__name__)
+
+# One landmark frame on the wire: presentation time in seconds, then 33 x (x, y, z, visibility)
+FRAME_DTYPE = np.dtype([('timestamp', '<f8'), ('landmarks', '<f4', (NUM_LANDMARKS, 4))])
+
+# Row of each built-in exercise in batch_states()
+BATCH_ROWS = {exercise: row for row, exercise in enumerate(EXERCISES)}
+
+def encode_frames(timestamps, landmarks):
+    """Pack (N,) timestamps and (N, 33, 4) landmarks into a binary message."""
+    frames = np.empty(len(timestamps), dtype=FRAME_DTYPE)
+    frames['timestamp'] = timestamps
+    frames['landmarks'] = landmarks
+    return frames.tobytes()
+
+def decode_frames(message):
+    """Unpack a binary message or a JSON batch (text or parsed) into (timestamps (N,), landmarks (N, 33, 4)).
+
+    Raises ValueError for malformed messages and for messages without frames.
+    """
+    if isinstance(message, str):
+        message = json.loads(message)
+    if isinstance(message, dict):
+        timestamps, landmarks = decode_batch(message)
+    else:
+        frames = np.frombuffer(message, dtype=FRAME_DTYPE)
+        timestamps, landmarks = frames['timestamp'], frames['landmarks']
+    if not len(timestamps):
+        raise ValueError("Message contains no landmark frames")
+    return timestamps, landmarks
+
+class BatchAnalyzer:
+    """Exercise analysis for many landmark sessions in one vectorized pass.
+
+    States come from batch_states(), which mirrors the threshold rules of the
+    analyze_* functions; exercises without a batch rule (plugins) fall back
+    to their analyzer frame by frame. Exercises that count signal peaks by
+    default (DEFAULT_REP_COUNTERS) get a PeakRepCounter per session, fed
+    frame by frame with the batch's signal, so they count like LandmarkSession
+    and offline_analysis. Form score and feedback need the full analyzer, so
+    they are only computed, on the newest frame of each message, for sessions
+    opened with feedback=True.
+    """
+
+    def __init__(self, capacity=1024, min_rep_interval=0.4):
+        self.counter = BatchRepCounter(capacity, min_rep_interval)
+        self.exercises = {}
+        self.feedback = {}
+        self.peak_counters = {}
+        self.features = FrameFeatures()
+
+    def open(self, exercise='pushup', feedback=False):
+        """Start a session; returns its id."""
+        session = self.counter.add()
+        self.feedback[session] = feedback
+        self.switch_exercise(session, exercise)
+        return session
+
+    def close(self, session):
+        self.exercises.pop(session, None)
+        self.feedback.pop(session, None)
+        self.peak_counters.pop(session, None)
+        self.counter.remove(session)
+
+    def switch_exercise(self, session, exercise):
+        """Change a session's exercise and restart its rep state machine, keeping the rep totals."""
+        self.exercises[session] = REGISTRY[exercise]
+        previous = self.peak_counters.pop(session, None)
+        if previous is not None:
+            self.counter.rep_count[session] = previous.rep_count
+            self.counter.total_reps[session] = previous.total_reps
+        self.counter.reset(session)
+        if default_rep_counter(exercise) == 'peaks' and rep_signal(exercise)[0] is not None:
+            counter = create_rep_counter(exercise, 'peaks')
+            counter.rep_count = int(self.counter.rep_count[session])
+            counter.total_reps = int(self.counter.total_reps[session])
+            self.peak_counters[session] = counter
+
+    def process(self, items):
+        """Analyze a list of (session, timestamps, landmarks) and return one result dict per item."""
+        if not items:
+            return []
+        sessions = [session for session, _, _ in items]
+        exercises = [self.exercises[session] for session in sessions]
+        sizes = np.array([len(timestamps) for _, timestamps, _ in items])
+        rows = np.repeat(np.array(sessions), sizes)
+        times = np.concatenate([timestamps for _, timestamps, _ in items]).astype(np.float64)
+        frames = np.concatenate([landmarks for _, _, landmarks in items]).reshape(-1, NUM_LANDMARKS, 4)
+        valid = ~np.isnan(frames).any(axis=(1, 2))
+
+        # Every state of every exercise for the whole batch, then each frame's own exercise
+        batch_row = np.repeat(np.array([BATCH_ROWS.get(exercise.key, -1) for exercise in exercises]), sizes)
+        updown = np.repeat(np.array([exercise.updown for exercise in exercises], dtype=bool), sizes)
+        peaks = np.repeat(np.array([session in self.peak_counters for session in sessions], dtype=bool), sizes)
+        with np.errstate(invalid='ignore'):
+            features = batch_features(frames)
+            all_states = batch_states(frames, features)
+        states = all_states[np.maximum(batch_row, 0), np.arange(len(frames))]
+        for i in np.flatnonzero((batch_row < 0) & valid):
+            state, _, _ = self.exercises[rows[i]].analyze(self.features.update(frames[i]))
+            states[i] = STATES.index(state)
+
+        # The k-th frame of every session goes into the k-th counter update
+        order = np.argsort(rows, kind='stable')
+        group_start = np.r_[0, np.flatnonzero(np.diff(rows[order])) + 1]
+        rank = np.empty(len(rows), dtype=np.int64)
+        rank[order] = np.arange(len(rows)) - np.repeat(group_start, np.diff(np.r_[group_start, len(rows)]))
+        counted = np.zeros(len(rows), dtype=bool)
+        for k in range(rank.max(initial=-1) + 1):
+            step = np.flatnonzero((rank == k) & valid & ~peaks)
+            counted[step] = self.counter.update(rows[step], states[step], times[step], updown[step])
+
+        # Peak counters follow their signal one frame at a time, in message order
+        for i in np.flatnonzero(peaks & valid):
+            counter = self.peak_counters[rows[i]]
+            counted[i] = counter.update(STATES[states[i]], times[i], updown=updown[i],
+                                        features={counter.signal: features[counter.signal][i]})
+
+        counted_per_session = np.bincount(rows, weights=counted, minlength=len(self.counter.rep_count))
+        results = []
+        end = 0
+        for session, exercise, size in zip(sessions, exercises, sizes):
+            end += size
+            peak_counter = self.peak_counters.get(session)
+            if peak_counter is None:
+                result = {
+                    'exercise': exercise.key,
+                    'state': STATES[self.counter.exercise_state[session]],
+                    'reps': int(self.counter.rep_count[session]),
+                    'total_reps': int(self.counter.total_reps[session]),
+                    'counted': int(counted_per_session[session]),
+                    'confidence': float(self.counter.state_confidence(session))
+                }
+            else:
+                result = {
+                    'exercise': exercise.key,
+                    'state': peak_counter.exercise_state,
+                    'reps': peak_counter.rep_count,
+                    'total_reps': peak_counter.total_reps,
+                    'counted': int(counted_per_session[session]),
+                    'confidence': float(peak_counter.state_confidence)
+                }
+            if self.feedback[session]:
+                newest = np.flatnonzero(valid[end - size:end])
+                if len(newest):
+                    _, form_score, feedback = exercise.analyze(
+                        self.features.update(frames[end - size + newest[-1]]))
+                    result['form_score'] = form_score
+                    result['feedback'] = feedback
+            results.append(result)
+        return results
+
+class LandmarkGateway:
+    """Collects landmark messages from many sessions into micro-batches.
+
+    submit() queues a message and waits for its result. The batching loop
+    (run) waits for the first message, gives other sessions window seconds
+    to join, or less once max_batch_frames are queued, and analyzes them all
+    with one BatchAnalyzer.process call.
+    """
+
+    def __init__(self, analyzer=None, window=0.01, max_batch_frames=16384):
+        self.analyzer = analyzer or BatchAnalyzer()
+        self.window = window
+        self.max_batch_frames = max_batch_frames
+        self.pending = []
+        self.pending_frames = 0
+        self.sessions = 0
+        self.batches = 0
+        self.messages = 0
+        self.frames = 0
+        self.errors = 0
+        self.process_time = 0.0
+        self._arrived = None
+        self._full = None
+
+    async def submit(self, session, message):
+        """Queue one message of a session and return its result.
+
+        Malformed and empty messages raise ValueError here, before they can join a batch.
+        """
+        timestamps, landmarks = decode_frames(message)
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((session, timestamps, landmarks, future))
+        self.pending_frames += len(timestamps)
+        self._arrived.set()
+        if self.pending_frames >= self.max_batch_frames:
+            self._full.set()
+        return await future
+
+    async def run(self):
+        """The batching loop; runs until cancelled."""
+        self._arrived = asyncio.Event()
+        self._full = asyncio.Event()
+        while True:
+            await self._arrived.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.window)
+            except asyncio.TimeoutError:
+                pass
+            batch, self.pending = self.pending, []
+            self.pending_frames = 0
+            self._arrived.clear()
+            self._full.clear()
+
+            start = time.perf_counter()
+            items = [(session, timestamps, landmarks) for session, timestamps, landmarks, _ in batch]
+            try:
+                results = self.analyzer.process(items)
+            except Exception as e:
+                logger.exception("Failed to analyze a batch of %d messages", len(batch))
+                self.errors += 1
+                results = [{'error': str(e)}] * len(batch)
+            self.process_time += time.perf_counter() - start
+            self.batches += 1
+            self.messages += len(batch)
+            self.frames += sum(len(item[1]) for item in items)
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def handle(self, connection):
+        """Serve one WebSocket session."""
+        query = parse_qs(urlsplit(connection.request.path).query)
+        exercise = query.get('exercise', ['pushup'])[0]
+        if exercise not in REGISTRY:
+            await connection.close(1008, f"Unknown exercise: {exercise}")
+            return
+        session = self.analyzer.open(exercise, feedback=query.get('feedback', ['0'])[0] == '1')
+        self.sessions += 1
+        try:
+            async for message in connection:
+                try:
+                    if isinstance(message, str):
+                        message = json.loads(message)
+                        if 'landmarks' not in message:
+                            # Control message, e.g. {"exercise": "lunge"}
+                            if message.get('exercise') not in REGISTRY:
+                                raise ValueError(f"Unknown exercise: {message.get('exercise')}")
+                            self.analyzer.switch_exercise(session, message['exercise'])
+                            continue
+                    result = await self.submit(session, message)
+                except ValueError as e:
+                    result = {'error': str(e)}
+                await connection.send(json.dumps(result))
+        finally:
+            self.sessions -= 1
+            self.analyzer.close(session)
+
+    def stats(self):
+        """Return the gateway counters as a dict."""
+        cpu = os.times()
+        return {
+            'sessions': self.sessions,
+            'batches': self.batches,
+            'messages': self.messages,
+            'frames': self.frames,
+            'errors': self.errors,
+            'mean_batch_frames': self.frames / self.batches if self.batches else 0.0,
+            'process_seconds': self.process_time,
+            'cpu_seconds': cpu.user + cpu.system
+        }
+
+    def process_request(self, connection, request):
+        """Answer plain HTTP requests: /stats, or let WebSocket handshakes through."""
+        if urlsplit(request.path).path == '/stats':
+            return connection.respond(HTTPStatus.OK, json.dumps(self.stats()) + "\n")
+        return None
+
+    async def serve(self, host='0.0.0.0', port=8765, ready=None):
+        """Run the WebSocket server and the batching loop until cancelled."""
+        if serve is None:
+            raise ImportError('websockets is required to run the landmark gateway: pip install -e ".[gateway]"')
+        batcher = asyncio.create_task(self.run())
+        try:
+            # Landmarks barely compress, so skip per-message deflate
+            async with serve(self.handle, host, port, compression=None, max_queue=4,
+                             process_request=self.process_request) as server:
+                if ready:
+                    ready(server)
+                await asyncio.Future()
+        finally:
+            batcher.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--window-ms", type=float, default=10.0, help="How long a batch waits for more sessions")
+    parser.add_argument("--max-batch-frames", type=int, default=16384, help="Frames that close a batch early")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    gateway = LandmarkGateway(window=args.window_ms / 1000, max_batch_frames=args.max_batch_frames)
+    ready = lambda server: print(f"Listening on {', '.join(str(s.getsockname()) for s in server.sockets)}", flush=True)
+    try:
+        asyncio.run(gateway.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import numpy as np
+
+from pose_backends import NUM_LANDMARKS
+
+class LandmarkPredictor:
+    """Constant-acceleration Kalman filter over every landmark coordinate.
+
+    Each x, y and z of the (33, 4) array is tracked as position, velocity and
+    acceleration with its own 3x3 covariance, all updated as whole arrays, so
+    a frame costs a few dozen numpy operations regardless of the pose.
+    update() feeds a measured pose; predict() extrapolates the last one to
+    another time, e.g. the timestamp of a frame inference skipped.
+    Measurements are trusted less the lower a landmark's visibility.
+
+    Extrapolating every coordinate on its own amplifies the measurement noise,
+    but during a set the whole body moves along one path: over the last
+    motion_time seconds almost all of the pose's motion lies in a few
+    directions of its 99 coordinates. Predictions are projected onto the
+    largest modes of that motion, which keeps the movement and drops most of
+    the noise, including that of landmarks which stay still.
+
+    Extrapolation is capped at max_horizon seconds past the last measurement.
+    Nothing is predicted after a frame without a person until the next
+    measurement, which continues the track if it comes within max_gap
+    seconds; the motion modes are kept across such gaps.
+    """
+
+    def __init__(self, jerk=20.0, measurement_noise=0.004, modes=3, motion_time=3.0, max_horizon=0.25,
+                 max_gap=0.5):
+        self.jerk = jerk
+        self.measurement_noise = measurement_noise
+        self.motion_time = motion_time
+        self.max_horizon = max_horizon
+        self.max_gap = max_gap
+        # Position, velocity and acceleration, and their covariance, per coordinate
+        self.state = np.zeros((3, NUM_LANDMARKS, 3))
+        self.covariance = np.zeros((3, 3, NUM_LANDMARKS, 3))
+        self.visibility = np.zeros(NUM_LANDMARKS, dtype=np.float32)
+        # Exponentially weighted mean and covariance of the pose, and the top modes of the latter
+        size = NUM_LANDMARKS * 3
+        self.mean = np.zeros(size)
+        self.spread = np.zeros((size, size))
+        self.initial_modes = np.linalg.qr(np.random.default_rng(0).standard_normal((size, modes)))[0]
+        self.output = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forget the track and the motion modes."""
+        self.timestamp = None
+        self.lost = False
+        self.modes = None
+
+    @property
+    def tracking(self):
+        return self.timestamp is not None and not self.lost
+
+    def update(self, landmarks, timestamp):
+        """Correct the track with a measured (33, 4) pose; None (nobody detected) pauses it."""
+        if landmarks is None or np.isnan(landmarks).any():
+            self.lost = True
+            return
+        measured = landmarks[:, :3]
+        visibility = landmarks[:, 3]
+        continued = self.timestamp is not None and timestamp - self.timestamp <= self.max_gap
+        if not continued:
+            self.state[0] = measured
+            self.state[1:] = 0.0
+            self.covariance[:] = 0.0
+            self.covariance[0, 0] = self.measurement_noise ** 2
+            self.covariance[1, 1] = 1.0
+            self.covariance[2, 2] = 100.0
+        else:
+            dt = max(timestamp - self.timestamp, 0.0)
+            # Predict: x = F x, P = F P F' + Q for a jerk that is constant between measurements
+            transition = np.array([[1.0, dt, dt * dt / 2], [0.0, 1.0, dt], [0.0, 0.0, 1.0]])
+            jerk_gain = np.array([dt ** 3 / 6, dt * dt / 2, dt])
+            self.state = np.einsum('ij,jlk->ilk', transition, self.state)
+            self.covariance = np.einsum('ij,jmlk,nm->inlk', transition, self.covariance, transition)
+            self.covariance += (self.jerk ** 2 * np.outer(jerk_gain, jerk_gain))[:, :, np.newaxis, np.newaxis]
+            # Correct with the measurement, noisier for barely visible landmarks
+            r = (self.measurement_noise ** 2 / np.maximum(visibility, 0.05))[:, np.newaxis]
+            gain = self.covariance[:, 0] / (self.covariance[0, 0] + r)
+            self.state += gain * (measured - self.state[0])
+            self.covariance -= gain[:, np.newaxis] * self.covariance[0][np.newaxis]
+        self.update_modes(timestamp, continued)
+        self.visibility[:] = visibility
+        self.timestamp = timestamp
+        self.lost = False
+
+    def update_modes(self, timestamp, continued):
+        """Follow the pose's mean, covariance and top modes over about motion_time seconds."""
+        pose = self.state[0].ravel()
+        if self.modes is None:
+            self.mean[:] = pose
+            self.spread[:] = 0.0
+            self.modes = self.initial_modes
+            return
+        if not continued:
+            return
+        weight = 1.0 - np.exp(-(timestamp - self.timestamp) / self.motion_time)
+        deviation = pose - self.mean
+        self.mean += weight * deviation
+        self.spread *= 1.0 - weight
+        self.spread += (1.0 - weight) * weight * np.outer(deviation, deviation)
+        # One step of orthogonal iteration per frame tracks the modes as they change
+        self.modes = np.linalg.qr(self.spread @ self.modes)[0]
+
+    def predict(self, timestamp, out=None):
+        """The pose extrapolated to timestamp, or None without a recent measurement.
+
+        Written into out when given; otherwise the returned array is reused by
+        the next call, so copy it to keep it.
+        """
+        if not self.tracking:
+            return None
+        ahead = timestamp - self.timestamp
+        if ahead > self.max_gap:
+            return None
+        ahead = min(max(ahead, 0.0), self.max_horizon)
+        position, velocity, acceleration = self.state
+        deviation = (position + velocity * ahead + acceleration * (ahead * ahead / 2)).ravel() - self.mean
+        output = self.output if out is None else out
+        output[:, :3] = (self.mean + self.modes @ (self.modes.T @ deviation)).reshape(NUM_LANDMARKS, 3)
+        output[:, 3] = self.visibility
+        return output
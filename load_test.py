@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Local load generator that simulates concurrent camera sessions.
+
+Spins up K sessions, each feeding a recorded or synthetic video at a target
+FPS into its own PoseTransformer (no browser, no WebRTC), and reports
+achieved FPS, latency percentiles, dropped frames, the process CPU and memory
+divided by K, and the CPU of the busiest session's frame thread as K ramps
+up. The capacity curve is written as JSON so runs can be compared between
+releases:
+
+    python load_test.py --video clip.mp4 --ramp 1 2 4 8 --output capacity.json
+    python load_test.py --ramp 1 2 4 8 --baseline capacity.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import threading
+import time
+from fractions import Fraction
+
+import av
+import numpy as np
+
+from memory_budget import rss_bytes
+from offline_analysis import iter_video_frames
+from pose_backends import backend_from_spec
+from thread_budget import ThreadBudgetManager
+
+TIME_BASE = Fraction(1, 90000)
+
+def load_images(video=None, max_frames=300, width=640, height=480):
+    """Decode a clip into memory, or make a synthetic one, as a list of BGR images."""
+    if video:
+        return [frame.to_ndarray(format="bgr24") for frame in iter_video_frames(video, max_frames)]
+
+    # A bright moving block on noise, enough to keep the detector busy
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+    images = []
+    for i in range(min(max_frames, 90)):
+        image = background.copy()
+        x = int((np.sin(i / 90 * 2 * np.pi) + 1) / 2 * (width - 100))
+        image[height // 4:height * 3 // 4, x:x + 100] = 220
+        images.append(image)
+    return images
+
+class SimulatedSession:
+    """One camera session: frames arrive on a fixed schedule and queue while the processor is busy."""
+
+    def __init__(self, processor, images, fps, seconds):
+        self.processor = processor
+        self.images = images
+        self.fps = fps
+        self.seconds = seconds
+        self.latencies = []
+        self.processed = 0
+        self.received = 0
+        self.thread_cpu = 0.0
+
+    def make_frame(self, index):
+        frame = av.VideoFrame.from_ndarray(self.images[index % len(self.images)], format="bgr24")
+        frame.pts = int(index / self.fps / TIME_BASE)
+        frame.time_base = TIME_BASE
+        return frame
+
+    def record(self, arrival):
+        self.latencies.append(time.perf_counter() - arrival)
+        self.processed += 1
+
+    def run(self, start_barrier):
+        start_barrier.wait()
+        start = time.perf_counter()
+        cpu_start = time.thread_time()
+        total = int(self.fps * self.seconds)
+        next_index = 0
+
+        while next_index < total:
+            now = time.perf_counter()
+            due = min(int((now - start) * self.fps) + 1, total)
+            if due <= next_index:
+                time.sleep(start + next_index / self.fps - now)
+                continue
+
+            # Everything that arrived while we were busy is queued, like async_processing
+            indices = range(next_index, due)
+            frames = [self.make_frame(i) for i in indices]
+            arrivals = {id(frame): start + i / self.fps for frame, i in zip(frames, indices)}
+            next_index = due
+            self.received += len(frames)
+
+            # Like recv_queued: every selected frame is analyzed, only the newest one is drawn
+            policy = self.processor.frame_policy
+            selected = policy.select(frames)
+            for frame in selected[:-1]:
+                self.processor.process(frame, draw=False)
+                self.record(arrivals[id(frame)])
+            self.processor.process(selected[-1], infer=policy.newest_due)
+            if policy.newest_due:
+                self.record(arrivals[id(selected[-1])])
+
+        self.elapsed = time.perf_counter() - start
+        # CPU of this session's frame thread only; pose backends may add threads of their own
+        self.thread_cpu = time.thread_time() - cpu_start
+
+def run_step(sessions, args, images, manager):
+    """Run K sessions at once and summarize them."""
+    from app import PoseTransformer
+
+    rss_start = rss_bytes()
+    processors = []
+    for _ in range(sessions):
+        backend = backend_from_spec(args.backend) if args.backend else None
+        processors.append(PoseTransformer(backend=backend, thread_budget=manager))
+    simulated = [SimulatedSession(processor, images, args.fps, args.seconds) for processor in processors]
+
+    barrier = threading.Barrier(sessions + 1)
+    threads = [threading.Thread(target=session.run, args=(barrier,)) for session in simulated]
+    for thread in threads:
+        thread.start()
+    rss_before = rss_bytes()
+    cpu_before = os.times()
+    barrier.wait()
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    cpu_after = os.times()
+    rss_after = rss_bytes()
+
+    for processor in processors:
+        processor.on_ended()
+
+    latencies = np.concatenate([np.array(session.latencies) for session in simulated])
+    received = sum(session.received for session in simulated)
+    processed = sum(session.processed for session in simulated)
+    cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    return {
+        'sessions': sessions,
+        'target_fps': args.fps,
+        'achieved_fps': float(np.mean([s.processed / s.elapsed for s in simulated])),
+        'latency_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'latency_p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'latency_p99_ms': float(np.percentile(latencies, 99) * 1000),
+        'drop_rate': 1 - processed / received if received else 0.0,
+        'cpu_percent_mean_per_session': cpu / wall / sessions * 100,
+        'frame_thread_cpu_percent_max': max(s.thread_cpu / s.elapsed for s in simulated) * 100,
+        'rss_mb_mean_per_session': (rss_after - rss_start) / sessions / 1e6,
+        'rss_growth_mb': (rss_after - rss_before) / 1e6
+    }
+
+def print_step(result, baseline=None):
+    line = (f"{result['sessions']:>8}{result['achieved_fps']:>9.1f}{result['latency_p50_ms']:>9.1f}"
+            f"{result['latency_p95_ms']:>9.1f}{result['latency_p99_ms']:>9.1f}{result['drop_rate']:>8.1%}"
+            f"{result['cpu_percent_mean_per_session']:>9.0f}{result['frame_thread_cpu_percent_max']:>9.0f}"
+            f"{result['rss_mb_mean_per_session']:>9.0f}")
+    if baseline:
+        line += f"{result['achieved_fps'] - baseline['achieved_fps']:>+10.1f}"
+        line += f"{result['latency_p99_ms'] - baseline['latency_p99_ms']:>+10.1f}"
+    print(line)
+
+def find_capacity(ramp, step, target_fps, collapse=0.8, on_step=None):
+    """Run step(sessions) for each count in ramp until FPS collapses; return (capacity, steps).
+
+    The capacity is the largest session count that still achieved collapse *
+    target_fps; the first step below it is included in steps and ends the ramp.
+    """
+    steps = []
+    capacity = 0
+    for sessions in ramp:
+        result = step(sessions)
+        steps.append(result)
+        if on_step:
+            on_step(result)
+        if result['achieved_fps'] < collapse * target_fps:
+            break
+        capacity = sessions
+    return capacity, steps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Clip to feed every session (default: synthetic video)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Target frame rate per session")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each ramp step")
+    parser.add_argument("--ramp", type=int, nargs="+", default=[1, 2, 4, 8], help="Session counts to try")
+    parser.add_argument("--collapse", type=float, default=0.8,
+                        help="Stop once achieved FPS falls below this fraction of the target")
+    parser.add_argument("--backend", help="Pose backend spec, e.g. mediapipe:model_complexity=0")
+    parser.add_argument("--thread-budget", action="store_true", help="Run sessions under the ThreadBudgetManager")
+    parser.add_argument("--output", help="Write the capacity curve to this JSON file")
+    parser.add_argument("--baseline", help="Capacity curve JSON from a previous release to compare against")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    images = load_images(args.video)
+    manager = ThreadBudgetManager() if args.thread_budget else None
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {step['sessions']: step for step in json.load(f)['steps']}
+
+    # cpu % and rss MB are process totals divided by the session count
+    print(f"{'sessions':>8}{'fps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'drops':>8}{'cpu %':>9}"
+          f"{'max thr%':>9}{'rss MB':>9}" + (f"{'Δfps':>10}{'Δp99 ms':>10}" if baseline else ""))
+    capacity, steps = find_capacity(
+        args.ramp, lambda sessions: run_step(sessions, args, images, manager), args.fps, args.collapse,
+        on_step=lambda result: print_step(result, baseline.get(result['sessions']))
+    )
+
+    print(f"\nCapacity: {capacity} session(s) at {args.fps:g} fps on {os.cpu_count()} core(s)")
+    if args.output:
+        report = {
+            'host': platform.node(),
+            'cores': os.cpu_count(),
+            'video': args.video or 'synthetic',
+            'backend': args.backend or 'mediapipe',
+            'thread_budget': args.thread_budget,
+            'capacity': capacity,
+            'steps': steps
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
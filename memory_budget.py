@@ -0,0 +1,187 @@
+import gc
+import logging
+import os
+import resource
+import threading
+import tracemalloc
+import weakref
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# RSS growth of one MediaPipe Pose graph (model_complexity=1), measured on Linux;
+# native model memory that no Python object reports
+BACKEND_BYTES = 80 * MB
+
+def rss_bytes():
+    """Resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def memory_limit_bytes():
+    """Memory available to this process: the cgroup limit if there is one, else physical memory."""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != 'max' and int(value) < 1 << 60:
+                return int(value)
+        except (OSError, ValueError):
+            pass
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError):
+        return None
+
+class MemoryLease:
+    """One session's memory account, handed out by MemoryBudgetManager."""
+
+    def __init__(self, manager, session, admitted):
+        self.manager = manager
+        self.session = weakref.ref(session)
+        self.admitted = admitted
+        self.degraded = False
+        self.usage = 0
+
+    def check(self):
+        """Measure the session and return True if it should run degraded."""
+        return self.manager.check(self)
+
+    def release(self):
+        self.manager.release(self)
+
+class MemoryBudgetManager:
+    """Memory accounting and budgets for the sessions of one process.
+
+    Sessions report the bytes of their buffers (memory_usage()) and are
+    charged backend_bytes for their pose model, which lives in native memory.
+    A new session is refused when the process RSS plus its expected cost
+    would exceed global_budget. A running session is degraded (keyframes and
+    recording switched off) while its own usage exceeds session_budget or
+    the process is above degrade_fraction of the global budget.
+
+    Objects registered with track() are counted through weak references.
+    After a session ends, anything still alive from it on the next check is
+    logged as a leak suspect together with what refers to it. tracemalloc
+    snapshots can be taken on demand to see where Python memory grows.
+    """
+
+    def __init__(self, session_budget=256 * MB, global_budget=None, degrade_fraction=0.9,
+                 backend_bytes=BACKEND_BYTES):
+        if global_budget is None:
+            limit = memory_limit_bytes()
+            global_budget = int(limit * 0.8) if limit else None
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.degrade_fraction = degrade_fraction
+        self.backend_bytes = backend_bytes
+        self.lock = threading.Lock()
+        self.leases = []
+        self.refused = 0
+        self.live = {}
+        self.ended = []
+        self.leak_suspects = 0
+        self.last_snapshot = None
+
+    def acquire(self, session):
+        """Account for a new session; the lease says whether it was admitted."""
+        self.check_leaks()
+        with self.lock:
+            admitted = (self.global_budget is None
+                        or rss_bytes() + self.backend_bytes <= self.global_budget)
+            lease = MemoryLease(self, session, admitted)
+            if admitted:
+                self.leases.append(lease)
+            else:
+                self.refused += 1
+                logger.warning("Refusing session: RSS %.0f MB is at the %.0f MB budget",
+                               rss_bytes() / MB, self.global_budget / MB)
+        return lease
+
+    def release(self, lease):
+        """End a session; it is checked for leaks on the next acquire() or check_leaks()."""
+        with self.lock:
+            if lease in self.leases:
+                self.leases.remove(lease)
+            self.ended.append(lease.session)
+
+    def check(self, lease):
+        session = lease.session()
+        lease.usage = (session.memory_usage() if session else 0) + self.backend_bytes
+        over_session = self.session_budget is not None and lease.usage > self.session_budget
+        over_global = (self.global_budget is not None
+                       and rss_bytes() > self.degrade_fraction * self.global_budget)
+        degraded = over_session or over_global
+        if degraded and not lease.degraded:
+            logger.warning("Degrading session: %.0f MB used (budget %.0f MB), RSS %.0f MB",
+                           lease.usage / MB, (self.session_budget or 0) / MB, rss_bytes() / MB)
+        lease.degraded = degraded
+        return degraded
+
+    def track(self, kind, obj):
+        """Count obj under kind for as long as it is alive."""
+        with self.lock:
+            self.live.setdefault(kind, weakref.WeakSet()).add(obj)
+        return obj
+
+    def counts(self):
+        """Live tracked objects per kind."""
+        with self.lock:
+            return {kind: len(objects) for kind, objects in self.live.items()}
+
+    def check_leaks(self):
+        """Collect garbage and log ended sessions that are still alive; returns how many."""
+        with self.lock:
+            ended, self.ended = self.ended, []
+        if not ended:
+            return 0
+        gc.collect()
+        suspects = [ref() for ref in ended if ref() is not None]
+        for session in suspects:
+            referrers = sorted({type(referrer).__name__ for referrer in gc.get_referrers(session)} - {'list'})
+            logger.warning("Leak suspect: ended %s still alive, referred to by %s",
+                           type(session).__name__, ', '.join(referrers) or 'a reference gc cannot see, e.g. a running function')
+        self.leak_suspects += len(suspects)
+        return len(suspects)
+
+    def snapshot(self, limit=10):
+        """Take a tracemalloc snapshot; returns the lines that grew most since the previous one.
+
+        Tracing starts with the first call, so the first result is always empty.
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.last_snapshot = tracemalloc.take_snapshot()
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__)
+        ])
+        previous, self.last_snapshot = self.last_snapshot, snapshot
+        growth = [stat for stat in snapshot.compare_to(previous, 'lineno') if stat.size_diff > 0][:limit]
+        for stat in growth:
+            logger.info("Memory growth: %s", stat)
+        return growth
+
+    def stop_tracing(self):
+        tracemalloc.stop()
+        self.last_snapshot = None
+
+    def stats(self):
+        """Return the memory counters as a dict."""
+        with self.lock:
+            usage = [lease.usage for lease in self.leases]
+            degraded = sum(lease.degraded for lease in self.leases)
+        return {
+            'rss_mb': rss_bytes() / MB,
+            'global_budget_mb': self.global_budget / MB if self.global_budget else None,
+            'sessions': len(usage),
+            'degraded': degraded,
+            'refused': self.refused,
+            'session_mb': max(usage, default=0) / MB,
+            'leak_suspects': self.leak_suspects,
+            'live': self.counts()
+        }
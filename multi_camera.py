@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Multi-camera pose fusion for one athlete.
+
+Two or more local video sources (camera indices or video files) watch the
+same person. Every camera runs pose estimation on its own thread with its
+own backend, so the cameras are processed side by side rather than one
+after the other. Results are paired by timestamp with the first camera's
+frames, mapped into its image coordinates and fused landmark by landmark,
+weighted by visibility and detection confidence. The fused landmarks feed
+the usual exercise analysis (client_pose.LandmarkSession):
+
+    python multi_camera.py --source 0 --source 1 --exercise row
+    python multi_camera.py --source front.mp4 --source side.mp4 --offset 0 --offset 0.12
+"""
+
+import argparse
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from client_pose import LandmarkSession
+from offline_analysis import iter_video_frames
+from pose_backends import NUM_LANDMARKS, MediaPipeBackend, draw_skeleton
+from rep_counter import FrameClock
+
+logger = logging.getLogger(__name__)
+
+# Pose estimate of one camera frame; landmarks is None when nobody was detected
+CameraResult = namedtuple('CameraResult', ['camera', 'timestamp', 'landmarks', 'confidence', 'image', 'latency'])
+
+# Fused estimate at the time of a reference camera frame; views has one CameraResult
+# (or None when a camera had no frame close enough) per camera
+FusedFrame = namedtuple('FusedFrame', ['timestamp', 'landmarks', 'confidence', 'views'])
+
+def allowed_sources(spec=None):
+    """Sources the web app may open, from a comma-separated list such as FITNESS_TRAINER_CAMERA_SOURCES.
+
+    Users of the app can only choose among these, so browsers never get to name
+    arbitrary devices or files on the server. Empty when nothing is configured.
+    """
+    if spec is None:
+        spec = os.environ.get('FITNESS_TRAINER_CAMERA_SOURCES', '')
+    return [source.strip() for source in spec.split(',') if source.strip()]
+
+def is_device(source):
+    """Camera indices (0, '1') are live devices, anything else is a video file."""
+    return isinstance(source, int) or (isinstance(source, str) and source.isdigit())
+
+def read_frames(source):
+    """Yield (timestamp, BGR image) from a camera index or a video file.
+
+    Devices are stamped with the monotonic clock when a frame is read, so all
+    live cameras share one clock; files use their presentation timestamps.
+    """
+    if is_device(source):
+        capture = cv2.VideoCapture(int(source))
+        if not capture.isOpened():
+            raise IOError(f"Cannot open camera {source}")
+        # Always read the newest frame rather than one queued in the driver
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        try:
+            while True:
+                ok, image = capture.read()
+                if not ok:
+                    return
+                yield time.monotonic(), image
+        finally:
+            capture.release()
+    else:
+        clock = FrameClock()
+        for frame in iter_video_frames(source):
+            yield clock(frame), frame.to_ndarray(format="bgr24")
+
+def fuse_landmarks(views, min_visibility=0.1):
+    """Fuse (landmarks, confidence) pairs in one coordinate system into a (33, 4) array.
+
+    Each landmark is the mean of the cameras that see it, weighted by their
+    visibility times the camera's detection confidence, so a joint occluded
+    in one view comes from the others. Landmarks that no camera sees well
+    are averaged plainly to keep the skeleton complete. Visibility is the
+    best camera's. Returns (None, 0.0) when no camera detected anybody.
+    """
+    views = [(landmarks, confidence) for landmarks, confidence in views if landmarks is not None]
+    if not views:
+        return None, 0.0
+    stacked = np.stack([landmarks for landmarks, _ in views])
+    visibility = stacked[:, :, 3]
+    weights = np.where(visibility >= min_visibility,
+                       visibility * np.array([confidence for _, confidence in views])[:, None], 0.0)
+    total = weights.sum(axis=0)
+    fused = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    fused[:, :3] = (stacked[:, :, :3] * weights[:, :, None]).sum(axis=0) / np.maximum(total, 1e-9)[:, None]
+    unseen = total <= 0
+    fused[unseen, :3] = stacked[:, unseen, :3].mean(axis=0)
+    fused[:, 3] = visibility.max(axis=0)
+    return fused, float(fused[:, 3].mean())
+
+class AffineAligner:
+    """Running estimate of the 2D affine map from one camera's image to the reference camera's.
+
+    Landmarks that both cameras see well are accumulated into least squares
+    normal equations that decay by decay per frame, so the map follows a
+    camera that is moved. A small pull towards the identity keeps it defined
+    before enough points have been seen. An affine map fits cameras that see
+    the athlete from similar directions (e.g. front-left and front-right);
+    views at right angles share too little of their image geometry for it.
+    """
+
+    def __init__(self, decay=0.98, min_visibility=0.8, regularization=1e-3):
+        self.decay = decay
+        self.min_visibility = min_visibility
+        self.regularization = regularization
+        self.ata = np.zeros((3, 3))
+        self.atb = np.zeros((3, 2))
+        self.matrix = np.eye(3, 2)
+
+    def update(self, reference, landmarks):
+        """Add a frame where both cameras detected the athlete and refit the map."""
+        both = (reference[:, 3] >= self.min_visibility) & (landmarks[:, 3] >= self.min_visibility)
+        a = np.c_[landmarks[both, :2], np.ones(both.sum())]
+        self.ata = self.decay * self.ata + a.T @ a
+        self.atb = self.decay * self.atb + a.T @ reference[both, :2]
+        identity = np.eye(3, 2)
+        self.matrix = np.linalg.solve(self.ata + self.regularization * np.eye(3),
+                                      self.atb + self.regularization * identity)
+        return self.matrix
+
+    def apply(self, landmarks):
+        """Map landmarks into the reference camera's coordinates (z scales with the map)."""
+        mapped = landmarks.copy()
+        mapped[:, :2] = np.c_[landmarks[:, :2], np.ones(len(landmarks))] @ self.matrix
+        mapped[:, 2] *= np.sqrt(abs(np.linalg.det(self.matrix[:2])))
+        return mapped
+
+class CameraWorker:
+    """Reads one source and runs its own pose backend on a dedicated thread.
+
+    Results wait in a short buffer until the fusion loop pairs them. Live
+    cameras drop their oldest result when the buffer is full; video files
+    wait instead, so no frame of a recording is skipped.
+    """
+
+    def __init__(self, camera, source, backend, condition, offset=0.0, buffer=8, thread_lease=None):
+        self.camera = camera
+        self.source = source
+        self.backend = backend
+        self.condition = condition
+        self.offset = offset
+        self.buffer = buffer
+        self.live = is_device(source)
+        self.thread_lease = thread_lease
+        self.results = deque(maxlen=buffer if self.live else None)
+        self.finished = False
+        self.stopped = False
+        self.error = None
+        self.processed = 0
+        self.detected = 0
+        self.process_time = 0.0
+        self.thread = threading.Thread(target=self.run, name=f'camera-{camera}', daemon=True)
+
+    def run(self):
+        if self.thread_lease:
+            self.thread_lease.bind_current_thread()
+        try:
+            for timestamp, image in read_frames(self.source):
+                if self.stopped:
+                    break
+                start = time.perf_counter()
+                landmarks, confidence = self.backend.process(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+                latency = time.perf_counter() - start
+                result = CameraResult(self.camera, timestamp + self.offset,
+                                      None if landmarks is None else landmarks.copy(),
+                                      confidence, image, latency)
+                with self.condition:
+                    while not self.live and len(self.results) >= self.buffer and not self.stopped:
+                        self.condition.wait()
+                    self.results.append(result)
+                    self.processed += 1
+                    self.detected += landmarks is not None
+                    self.process_time += latency
+                    self.condition.notify_all()
+        except Exception as e:
+            logger.exception("Camera %s failed", self.source)
+            self.error = e
+        finally:
+            with self.condition:
+                self.finished = True
+                self.condition.notify_all()
+
+    def prune(self, timestamp):
+        """Drop results that can no longer be the nearest to timestamp or a later one."""
+        while len(self.results) >= 2 and self.results[1].timestamp <= timestamp:
+            self.results.popleft()
+
+    def ready(self, timestamp):
+        """True once the result nearest to timestamp is known."""
+        return self.finished or bool(self.results and self.results[-1].timestamp >= timestamp)
+
+    def take(self, timestamp, tolerance):
+        """The result nearest to timestamp if it is within tolerance, else None."""
+        self.prune(timestamp)
+        candidates = list(self.results)[:2]
+        if not candidates:
+            return None
+        nearest = min(candidates, key=lambda result: abs(result.timestamp - timestamp))
+        return nearest if abs(nearest.timestamp - timestamp) <= tolerance else None
+
+class MultiCameraFusion:
+    """Parallel pose estimation on several cameras, fused into one landmark stream.
+
+    The first source is the reference: every one of its frames yields a
+    FusedFrame from the other cameras' results nearest in time (within
+    tolerance seconds, waiting at most max_wait for a slower camera).
+    offsets shift each camera's timestamps, e.g. to line up recordings that
+    did not start together. With a thread_budget each camera gets its own
+    lease, like a camera session of the app.
+
+    run() (or start() for a background thread) feeds the fused stream into
+    session, a LandmarkSession, and keeps the newest annotated image in
+    latest_image: the reference view with the fused skeleton. With an
+    idle_timeout the fusion stops itself, cameras and models included, when
+    touch() has not been called for that many seconds, e.g. because the
+    browser session that started it is gone.
+    """
+
+    def __init__(self, sources, backend_factory=MediaPipeBackend, tolerance=0.05, max_wait=0.5,
+                 offsets=None, align=True, session=None, thread_budget=None, idle_timeout=None):
+        if len(sources) < 1:
+            raise ValueError("At least one camera source is required")
+        self.tolerance = tolerance
+        self.max_wait = max_wait
+        self.session = session if session is not None else LandmarkSession()
+        self.condition = threading.Condition()
+        self.aligners = [AffineAligner() if align else None for _ in sources[1:]]
+        offsets = offsets or [0.0] * len(sources)
+        self.workers = []
+        for camera, (source, offset) in enumerate(zip(sources, offsets)):
+            lease = thread_budget.acquire() if thread_budget else None
+            backend = lease.create(backend_factory) if lease else backend_factory()
+            self.workers.append(CameraWorker(camera, source, backend, self.condition, offset, thread_lease=lease))
+        self.latest = None
+        self.latest_image = None
+        self.fused = 0
+        self.missing_views = 0
+        self.parallel_time = 0.0
+        self.serial_time = 0.0
+        self.idle_timeout = idle_timeout
+        self.last_touch = time.monotonic()
+        self._stopped = False
+        self._closed = False
+        self._thread = None
+
+    @property
+    def running(self):
+        return any(not worker.finished for worker in self.workers) and not self._stopped
+
+    @property
+    def stopped(self):
+        """True once stop() was called, by the caller or because the fusion was idle."""
+        return self._stopped
+
+    def touch(self):
+        """Keep the fusion running for another idle_timeout seconds."""
+        self.last_touch = time.monotonic()
+
+    def idle(self):
+        return self.idle_timeout is not None and time.monotonic() - self.last_touch > self.idle_timeout
+
+    def frames(self):
+        """Start the cameras and yield a FusedFrame per reference frame until a source ends."""
+        for worker in self.workers:
+            if not worker.thread.is_alive() and not worker.finished:
+                worker.thread.start()
+        reference_worker, others = self.workers[0], self.workers[1:]
+        while True:
+            with self.condition:
+                while (not reference_worker.results and not reference_worker.finished and not self._stopped
+                       and not self.idle()):
+                    self.condition.wait(1.0)
+                if self._stopped or self.idle() or not reference_worker.results:
+                    return
+                reference = reference_worker.results.popleft()
+                deadline = time.monotonic() + self.max_wait
+                views = [reference]
+                for worker in others:
+                    worker.prune(reference.timestamp)
+                    while not worker.ready(reference.timestamp) and not self._stopped:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self.condition.wait(remaining)
+                        worker.prune(reference.timestamp)
+                    views.append(worker.take(reference.timestamp, self.tolerance))
+                self.condition.notify_all()
+            yield self.fuse(views)
+
+    def fuse(self, views):
+        """Map every view into the reference camera's coordinates and fuse them."""
+        reference = views[0]
+        mapped = [(reference.landmarks, reference.confidence)]
+        for aligner, view in zip(self.aligners, views[1:]):
+            if view is None:
+                self.missing_views += 1
+                continue
+            landmarks = view.landmarks
+            if aligner and landmarks is not None:
+                if reference.landmarks is not None:
+                    aligner.update(reference.landmarks, landmarks)
+                landmarks = aligner.apply(landmarks)
+            mapped.append((landmarks, view.confidence))
+        landmarks, confidence = fuse_landmarks(mapped)
+
+        latencies = [view.latency for view in views if view is not None]
+        self.parallel_time += max(latencies)
+        self.serial_time += sum(latencies)
+        self.fused += 1
+        return FusedFrame(reference.timestamp, landmarks, confidence, views)
+
+    def run(self):
+        """Analyze the fused stream with session until a source ends or stop() is called."""
+        missing = np.full((1, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+        try:
+            for fused in self.frames():
+                landmarks = missing if fused.landmarks is None else fused.landmarks[np.newaxis]
+                self.session.process([fused.timestamp], landmarks)
+                image = fused.views[0].image
+                if fused.landmarks is not None:
+                    draw_skeleton(image, fused.landmarks)
+                self.latest = fused
+                self.latest_image = image
+        finally:
+            if self.idle():
+                logger.info("Stopping idle camera fusion of %s", [worker.source for worker in self.workers])
+                self.stop()
+
+    def start(self):
+        """Run the fusion loop on a background thread."""
+        self._thread = threading.Thread(target=self.run, name='camera-fusion', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the cameras and the fusion loop and close the backends; safe to call more than once."""
+        with self.condition:
+            self._stopped = True
+            closed, self._closed = self._closed, True
+            for worker in self.workers:
+                worker.stopped = True
+            self.condition.notify_all()
+        if not closed:
+            for worker in self.workers:
+                if worker.thread.ident is not None:
+                    worker.thread.join()
+                worker.backend.close()
+                if worker.thread_lease:
+                    worker.thread_lease.release()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def stats(self):
+        """Return the per-camera and fusion counters as a dict.
+
+        parallel_ms is the mean inference time on the critical path (the
+        slowest camera of each fused frame); serial_ms is what running the
+        cameras one after another would have cost.
+        """
+        fused = max(self.fused, 1)
+        return {
+            'cameras': [
+                {
+                    'source': str(worker.source),
+                    'processed': worker.processed,
+                    'detected': worker.detected,
+                    'inference_ms': worker.process_time / max(worker.processed, 1) * 1000,
+                    'error': str(worker.error) if worker.error else None
+                }
+                for worker in self.workers
+            ],
+            'fused': self.fused,
+            'missing_views': self.missing_views,
+            'parallel_ms': self.parallel_time / fused * 1000,
+            'serial_ms': self.serial_time / fused * 1000
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", action="append", required=True,
+                        help="Camera index or video file; repeat for each camera, the first is the reference")
+    parser.add_argument("--offset", type=float, action="append", help="Seconds added to each source's timestamps")
+    parser.add_argument("--exercise", default="squat", help="Exercise to analyze")
+    parser.add_argument("--tolerance-ms", type=float, default=50.0, help="Largest time difference of paired frames")
+    parser.add_argument("--no-align", action="store_true", help="Fuse raw coordinates without mapping them")
+    parser.add_argument("--show", action="store_true", help="Show the fused skeleton on the reference view")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.offset and len(args.offset) != len(args.source):
+        parser.error("Give one --offset per --source")
+    fusion = MultiCameraFusion(args.source, tolerance=args.tolerance_ms / 1000, offsets=args.offset,
+                               align=not args.no_align, session=LandmarkSession(args.exercise))
+    reps = 0
+    try:
+        for fused in fusion.frames():
+            landmarks = fused.landmarks if fused.landmarks is not None else np.full((NUM_LANDMARKS, 4), np.nan)
+            fusion.session.process([fused.timestamp], landmarks[np.newaxis])
+            result = fusion.session.result()
+            if result['reps'] != reps:
+                reps = result['reps']
+                print(f"{fused.timestamp:8.2f}s  rep {reps}  form {result['form_score']}%  {result['feedback']}")
+            if args.show:
+                image = fused.views[0].image
+                if fused.landmarks is not None:
+                    draw_skeleton(image, fused.landmarks)
+                cv2.imshow("Fused pose", image)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fusion.stop()
+
+    stats = fusion.stats()
+    for camera in stats['cameras']:
+        print(f"{camera['source']}: {camera['processed']} frames, {camera['detected']} detected, "
+              f"{camera['inference_ms']:.1f} ms inference")
+    print(f"{stats['fused']} fused frames, {stats['missing_views']} views without a close frame; "
+          f"inference {stats['parallel_ms']:.1f} ms in parallel vs {stats['serial_ms']:.1f} ms one after another")
+
+if __name__ == "__main__":
+    main()
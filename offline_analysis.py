@@ -0,0 +1,99 @@
+import time
+
+import av
+import numpy as np
+
+from exercise_registry import REGISTRY
+from exercise_utils import FrameFeatures
+from landmark_predictor import LandmarkPredictor
+from pose_backends import NUM_LANDMARKS
+from rep_counter import FrameClock, create_rep_counter
+
+def iter_video_frames(path, max_frames=None):
+    """Decode the first video stream of a file, yielding av.VideoFrame objects."""
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        for i, frame in enumerate(container.decode(stream)):
+            if max_frames is not None and i >= max_frames:
+                break
+            yield frame
+
+def extract_landmarks(path, backend, max_frames=None):
+    """Run a pose backend over every frame of a video file.
+
+    Returns a dict with 'landmarks' (T, 33, 4, NaN where nobody was detected),
+    'confidences' (T,), 'timestamps' (T,) in seconds from the frame clock and
+    'latencies' (T,) of the backend call in seconds.
+    """
+    clock = FrameClock()
+    landmarks = []
+    confidences = []
+    timestamps = []
+    latencies = []
+    missing = np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+
+    for frame in iter_video_frames(path, max_frames):
+        timestamps.append(clock(frame))
+        img_rgb = frame.to_ndarray(format="rgb24")
+        start = time.perf_counter()
+        frame_landmarks, confidence = backend.process(img_rgb)
+        latencies.append(time.perf_counter() - start)
+        landmarks.append(missing if frame_landmarks is None else frame_landmarks.copy())
+        confidences.append(confidence)
+
+    return {
+        'landmarks': np.array(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 4),
+        'confidences': np.array(confidences, dtype=np.float32),
+        'timestamps': np.array(timestamps, dtype=np.float64),
+        'latencies': np.array(latencies, dtype=np.float64)
+    }
+
+def analyze_landmarks(landmarks, timestamps, exercise, counter=None, method=None, state_lead=0.0):
+    """Run an exercise analyzer and the rep counter over a (T, 33, 4) landmark sequence.
+
+    Without a counter, one is created for the exercise with the given method
+    from REP_COUNTERS (default: the exercise's own). With a state_lead, each
+    frame is analyzed as extrapolated that many seconds ahead by a
+    LandmarkPredictor, like PoseTransformer.state_lead.
+    Frames containing NaN (nobody detected) are skipped, like PoseTransformer does.
+    Returns a dict with per-frame 'states' and 'form_scores' (None when skipped),
+    the 'rep_times' at which reps were counted, the final 'rep_count' and the
+    per-frame analysis 'latencies' in seconds.
+    """
+    counter = counter or create_rep_counter(exercise, method)
+    exercise = REGISTRY[exercise]
+    features = FrameFeatures()
+    predictor = LandmarkPredictor() if state_lead else None
+    states = []
+    form_scores = []
+    rep_times = []
+    latencies = []
+
+    for frame_landmarks, current_time in zip(landmarks, timestamps):
+        if np.isnan(frame_landmarks).any():
+            if predictor:
+                predictor.update(None, current_time)
+            states.append(None)
+            form_scores.append(None)
+            continue
+        start = time.perf_counter()
+        if predictor:
+            predictor.update(frame_landmarks, current_time)
+            frame_landmarks = predictor.predict(current_time + state_lead)
+        frame_features = features.update(frame_landmarks)
+        state, form_score, _ = exercise.analyze(frame_features)
+        counted = counter.update(state, current_time, updown=exercise.updown, features=frame_features)
+        latencies.append(time.perf_counter() - start)
+        if counted:
+            rep_times.append(float(current_time))
+        states.append(state)
+        form_scores.append(form_score)
+
+    return {
+        'states': states,
+        'form_scores': form_scores,
+        'rep_times': rep_times,
+        'rep_count': counter.rep_count,
+        'latencies': np.array(latencies, dtype=np.float64)
+    }
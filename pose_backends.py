@@ -0,0 +1,261 @@
+import ast
+
+import cv2
+import numpy as np
+
+from exercise_utils import landmarks_to_array
+from landmark_cache import file_digest
+
+NUM_LANDMARKS = 33
+
+# Skeleton edges between the 33 BlazePose landmarks (same as mp.solutions.pose.POSE_CONNECTIONS)
+POSE_CONNECTIONS = (
+    (0, 1), (0, 4), (1, 2), (2, 3), (3, 7), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (11, 23), (12, 14), (12, 24), (13, 15), (14, 16),
+    (15, 17), (15, 19), (15, 21), (16, 18), (16, 20), (16, 22), (17, 19),
+    (18, 20), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28), (27, 29),
+    (27, 31), (28, 30), (28, 32), (29, 31), (30, 32)
+)
+
+class PoseBackend:
+    """Interface for pose estimators used by PoseTransformer.
+
+    process() takes an RGB image and returns a (33, 4) float32 array of
+    normalized x, y, z and visibility per landmark plus an overall confidence
+    in 0..1, or (None, 0.0) when no person was found. The returned array may
+    be reused by the next call, so copy it to keep it.
+    """
+
+    name = 'base'
+
+    def process(self, image_rgb):
+        raise NotImplementedError()
+
+    def close(self):
+        """Release models and native resources; safe to call more than once."""
+
+    def describe(self):
+        """Configuration that identifies this backend's output, e.g. for caching."""
+        return {'backend': self.name}
+
+class MediaPipeBackend(PoseBackend):
+    """MediaPipe Pose (BlazePose) running through mp.solutions."""
+
+    name = 'mediapipe'
+
+    def __init__(self, model_complexity=1, min_detection_confidence=0.5,
+                 min_tracking_confidence=0.5, static_image_mode=False):
+        import mediapipe as mp
+
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.static_image_mode = static_image_mode
+        self.pose = mp.solutions.pose.Pose(
+            static_image_mode=static_image_mode,
+            model_complexity=model_complexity,
+            min_detection_confidence=min_detection_confidence,
+            min_tracking_confidence=min_tracking_confidence
+        )
+        self.landmarks = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+
+    def process(self, image_rgb):
+        results = self.pose.process(image_rgb)
+        if not results.pose_landmarks:
+            return None, 0.0
+        landmarks = landmarks_to_array(results.pose_landmarks.landmark, out=self.landmarks)
+        return landmarks, float(landmarks[:, 3].mean())
+
+    def close(self):
+        # The graph's native memory is only freed by close(), never by garbage collection
+        if self.pose is not None:
+            self.pose.close()
+            self.pose = None
+
+    def describe(self):
+        return {
+            'backend': self.name,
+            'model_complexity': self.model_complexity,
+            'min_detection_confidence': self.min_detection_confidence,
+            'min_tracking_confidence': self.min_tracking_confidence,
+            'static_image_mode': self.static_image_mode
+        }
+
+class ReplayBackend(PoseBackend):
+    """Deterministic backend that plays back recorded landmarks, ignoring the image.
+
+    Useful for tests and benchmarks that need the full pipeline without a model.
+    Frames where nothing was detected can be stored as NaN rows.
+    """
+
+    name = 'replay'
+
+    def __init__(self, landmarks, confidences=None, loop=False):
+        self.landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 4)
+        if confidences is None:
+            confidences = np.nan_to_num(self.landmarks[:, :, 3]).mean(axis=1)
+        self.confidences = np.asarray(confidences, dtype=np.float32)
+        self.loop = loop
+        self.index = 0
+
+    @classmethod
+    def from_file(cls, path, loop=False):
+        """Load landmarks from a .npy array or a .npz with 'landmarks' (and optional 'confidences')."""
+        data = np.load(path)
+        if isinstance(data, np.ndarray):
+            return cls(data, loop=loop)
+        return cls(data['landmarks'], data['confidences'] if 'confidences' in data else None, loop=loop)
+
+    def process(self, image_rgb=None):
+        if self.index >= len(self.landmarks):
+            if not self.loop:
+                return None, 0.0
+            self.index = 0
+        landmarks = self.landmarks[self.index]
+        confidence = float(self.confidences[self.index])
+        self.index += 1
+        if np.isnan(landmarks).any():
+            return None, 0.0
+        return landmarks, confidence
+
+    def describe(self):
+        return {'backend': self.name, 'frames': len(self.landmarks)}
+
+def decode_blazepose(output, input_width, input_height):
+    """Decode a BlazePose landmark model output (x, y, z, visibility, presence per point, in pixels)."""
+    points = np.asarray(output, dtype=np.float32).reshape(-1, 5)[:NUM_LANDMARKS]
+    landmarks = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    landmarks[:, 0] = points[:, 0] / input_width
+    landmarks[:, 1] = points[:, 1] / input_height
+    landmarks[:, 2] = points[:, 2] / input_width
+    landmarks[:, 3] = 1.0 / (1.0 + np.exp(-points[:, 3]))
+    return landmarks
+
+class ModelFileBackend(PoseBackend):
+    """Base for single-person landmark models loaded from a local file.
+
+    The whole image is resized to the model input; decode(output, width, height)
+    turns the raw model output into a (33, 4) landmark array.
+    """
+
+    def __init__(self, model_path, input_size=(256, 256), decode=decode_blazepose,
+                 scale=1.0 / 255.0, min_confidence=0.5):
+        self.model_path = model_path
+        self.input_size = input_size
+        self.decode = decode
+        self.scale = scale
+        self.min_confidence = min_confidence
+        self._model_digest = None
+
+    @property
+    def model_digest(self):
+        """SHA-256 of the model file, so a model replaced under the same path is told apart."""
+        if self._model_digest is None:
+            self._model_digest = file_digest(self.model_path)
+        return self._model_digest
+
+    def _preprocess(self, image_rgb):
+        resized = cv2.resize(image_rgb, self.input_size, interpolation=cv2.INTER_LINEAR)
+        return (resized.astype(np.float32) * self.scale)[np.newaxis]
+
+    def _postprocess(self, output):
+        landmarks = self.decode(output, *self.input_size)
+        confidence = float(landmarks[:, 3].mean())
+        if confidence < self.min_confidence:
+            return None, confidence
+        return landmarks, confidence
+
+    def describe(self):
+        return {
+            'backend': self.name,
+            'model_path': self.model_path,
+            'model_digest': self.model_digest,
+            'input_size': list(self.input_size),
+            'min_confidence': self.min_confidence
+        }
+
+class OpenCVDnnBackend(ModelFileBackend):
+    """Landmark model (ONNX, TFLite-converted, ...) run with cv2.dnn."""
+
+    name = 'opencv_dnn'
+
+    def __init__(self, model_path, **kwargs):
+        super().__init__(model_path, **kwargs)
+        self.net = cv2.dnn.readNet(model_path)
+
+    def process(self, image_rgb):
+        # NHWC input as exported from the BlazePose models
+        self.net.setInput(self._preprocess(image_rgb))
+        return self._postprocess(self.net.forward())
+
+class OnnxRuntimeBackend(ModelFileBackend):
+    """Landmark model run with onnxruntime (optional dependency)."""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, threads=None, **kwargs):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("OnnxRuntimeBackend requires onnxruntime: pip install onnxruntime") from e
+
+        super().__init__(model_path, **kwargs)
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def process(self, image_rgb):
+        outputs = self.session.run(None, {self.input_name: self._preprocess(image_rgb)})
+        return self._postprocess(outputs[0])
+
+# Backends by name, for settings and benchmarks
+BACKENDS = {
+    'mediapipe': MediaPipeBackend,
+    'opencv_dnn': OpenCVDnnBackend,
+    'onnxruntime': OnnxRuntimeBackend,
+    'replay': ReplayBackend
+}
+
+def create_backend(name, **kwargs):
+    """Instantiate a backend from BACKENDS by name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown pose backend: {name}")
+    if name == 'replay' and 'path' in kwargs:
+        return ReplayBackend.from_file(**kwargs)
+    return BACKENDS[name](**kwargs)
+
+def backend_from_spec(spec):
+    """Create a backend from a 'name:key=value,key=value' string, e.g. 'mediapipe:model_complexity=0'."""
+    name, _, options = spec.partition(':')
+    kwargs = {}
+    for option in filter(None, options.split(',')):
+        key, _, value = option.partition('=')
+        try:
+            kwargs[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            # Plain strings such as model paths
+            kwargs[key] = value
+    return create_backend(name, **kwargs)
+
+def draw_skeleton(image, landmarks, landmark_color=(0, 255, 0), connection_color=(0, 0, 255),
+                  thickness=2, radius=2, min_visibility=0.5):
+    """Draw a (33, 4) landmark array onto a BGR image in place."""
+    height, width = image.shape[:2]
+    visible = ((landmarks[:, 3] >= min_visibility)
+               & (landmarks[:, 0] >= 0) & (landmarks[:, 0] <= 1)
+               & (landmarks[:, 1] >= 0) & (landmarks[:, 1] <= 1))
+    points = np.empty((NUM_LANDMARKS, 2), dtype=np.int32)
+    points[:, 0] = np.minimum(landmarks[:, 0] * width, width - 1)
+    points[:, 1] = np.minimum(landmarks[:, 1] * height, height - 1)
+    points = [tuple(point) for point in points.tolist()]
+    visible = visible.tolist()
+
+    for start, end in POSE_CONNECTIONS:
+        if visible[start] and visible[end]:
+            cv2.line(image, points[start], points[end], connection_color, thickness)
+    for i in range(NUM_LANDMARKS):
+        if visible[i]:
+            cv2.circle(image, points[i], radius, landmark_color, thickness)
+    return image
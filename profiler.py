@@ -0,0 +1,122 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+# Where profiles are written unless another directory is given
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), 'fitness_trainer_profiles')
+
+def frame_name(code):
+    """Readable name of a code object, e.g. 'PoseTransformer.recv (app.py:101)'."""
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """Statistical profiler for one thread, started on demand.
+
+    A background thread looks at the target thread's Python stack every
+    interval seconds (sys._current_frames) and counts each distinct stack.
+    Nothing is hooked into the profiled code, so there is no cost until a
+    profile is started. While it runs, each sample is a ~1 us stack walk plus
+    a GIL hand-off to the sampling thread, which slows the profiled thread by
+    1-3% at the default 200 Hz.
+
+    When duration has passed, or on stop(), it writes to output_dir:
+    - <tag>.collapsed: one 'root;...;leaf count' line per stack, the input
+      of flamegraph.pl, speedscope and similar tools
+    - <tag>.json: sample counts and self/total percentages per function
+    """
+
+    def __init__(self, thread_id, duration=10.0, interval=0.005, output_dir=PROFILE_DIR, tag='profile',
+                 metadata=None):
+        self.thread_id = thread_id
+        self.duration = duration
+        self.interval = interval
+        self.output_dir = output_dir
+        self.tag = tag
+        self.metadata = metadata or {}
+        self.stacks = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self.paths = None
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling early; returns the written paths once they exist."""
+        self._stop.set()
+        if self._thread.ident is not None:
+            self._thread.join()
+        return self.paths
+
+    def _run(self):
+        start = time.perf_counter()
+        end = start + self.duration
+        current_frames = sys._current_frames
+        while not self._stop.wait(self.interval) and time.perf_counter() < end:
+            frame = current_frames().get(self.thread_id)
+            if frame is None:
+                # The profiled thread has exited
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+        self.elapsed = time.perf_counter() - start
+        try:
+            self.paths = self.write()
+        except OSError as e:
+            self.error = e
+
+    def function_stats(self):
+        """Per-function sample counts, most expensive (self time) first."""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[0]] += count
+            for code in set(stack):
+                total[code] += count
+        samples = max(self.samples, 1)
+        return [
+            {
+                'function': frame_name(code),
+                'self_samples': own[code],
+                'total_samples': total[code],
+                'self_percent': own[code] / samples * 100,
+                'total_percent': total[code] / samples * 100
+            }
+            for code in sorted(total, key=lambda code: (own[code], total[code]), reverse=True)
+        ]
+
+    def write(self):
+        """Write the collapsed stacks and function stats; returns their paths."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.tag)
+        with open(base + '.collapsed', 'w') as f:
+            for stack, count in self.stacks.most_common():
+                names = (frame_name(code).replace(';', ':') for code in reversed(stack))
+                f.write(f"{';'.join(names)} {count}\n")
+        with open(base + '.json', 'w') as f:
+            json.dump({
+                **self.metadata,
+                'tag': self.tag,
+                'seconds': self.elapsed,
+                'interval': self.interval,
+                'samples': self.samples,
+                'functions': self.function_stats()
+            }, f, indent=2)
+        return {'collapsed': base + '.collapsed', 'stats': base + '.json'}
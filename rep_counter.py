@@ -0,0 +1,360 @@
+import time
+
+import numpy as np
+
+from exercise_registry import BUILTIN_EXERCISES
+from exercise_utils import BATCH_STATE_RULES, STATE_CODES
+
+# Built-in exercises counted by the down -> up rep state machine
+UPDOWN_EXERCISES = frozenset(spec.key for spec in BUILTIN_EXERCISES if spec.rep_mode == 'updown')
+
+class FrameClock:
+    """Timestamps frames from their presentation time (pts * time_base).
+
+    Falls back to the wall clock for frames without timestamps, continuing from
+    the last known frame time so the two sources never jump against each other.
+    Time never runs backwards, even if the stream restarts its timestamps.
+    """
+
+    def __init__(self, wall_clock=time.monotonic):
+        self.wall_clock = wall_clock
+        self.offset = 0.0
+        self.last_time = None
+        self.last_wall = None
+
+    def __call__(self, frame=None):
+        """Return the time in seconds at which the frame should be presented."""
+        wall = self.wall_clock()
+        pts = getattr(frame, 'pts', None)
+        time_base = getattr(frame, 'time_base', None)
+
+        if pts is not None and time_base:
+            now = float(pts * time_base) + self.offset
+            if self.last_time is not None and now < self.last_time:
+                # Timestamps restarted: shift them to continue from the last frame
+                self.offset += self.last_time - now
+                now = self.last_time
+        elif self.last_time is not None:
+            now = self.last_time + (wall - self.last_wall)
+        else:
+            now = wall
+
+        self.last_time = now
+        self.last_wall = wall
+        return now
+
+class RepCounter:
+    """Rep state machine driven by analyzer states and frame timestamps."""
+
+    def __init__(self, min_rep_interval=0.4):
+        self.min_rep_interval = min_rep_interval
+        self.rep_count = 0
+        self.total_reps = 0
+        self.reset()
+
+    def reset(self):
+        """Restart the state machine without touching the rep totals."""
+        self.exercise_state = 'ready'
+        self.rep_phase = 'waiting_down'  # waiting_down or waiting_up
+        self.last_state = 'ready'
+        self.state_stable_frames = 0
+        self.state_confidence = 0.0
+        self.last_rep_time = None
+        self.last_state_change_time = None
+
+    def observe(self, new_state, current_time):
+        """Track how long the analyzer state has been stable; returns the frames it needs to count."""
+        if new_state == self.last_state:
+            self.state_stable_frames += 1
+        else:
+            self.state_stable_frames = 0
+            self.last_state = new_state
+            self.last_state_change_time = current_time
+        self.state_confidence = min(self.state_stable_frames / 3.0, 1.0)
+        return 1 if new_state in ['up', 'down'] else 2
+
+    def update(self, new_state, current_time, updown=True, features=None):
+        """Feed one analyzer state; returns True when a rep was counted.
+
+        features (the frame's FrameFeatures) is only read by counters that
+        follow a signal, such as PeakRepCounter.
+        """
+        counted = False
+
+        # Improved state detection logic
+        min_stable_frames = self.observe(new_state, current_time)
+
+        # Rep state machine for up/down exercises
+        if updown:
+            # Wait for a stable "down" before allowing a rep
+            if self.rep_phase == 'waiting_down':
+                if new_state == 'down' and self.state_stable_frames >= min_stable_frames:
+                    self.rep_phase = 'waiting_up'
+            # Wait for a stable "up" to count a rep
+            elif self.rep_phase == 'waiting_up':
+                if new_state == 'up' and self.state_stable_frames >= min_stable_frames:
+                    if (self.last_rep_time is None
+                            or current_time - self.last_rep_time > self.min_rep_interval):
+                        self.rep_count += 1
+                        self.total_reps += 1
+                        self.last_rep_time = current_time
+                        counted = True
+                    self.rep_phase = 'waiting_down'
+            # Always update the visible state
+            self.exercise_state = new_state
+        else:
+            # For non-up/down exercises, just update state as before
+            if self.state_stable_frames >= min_stable_frames:
+                self.exercise_state = new_state
+
+        return counted
+
+class PeakRepCounter(RepCounter):
+    """Counts reps from the turning points of a joint angle instead of state thresholds.
+
+    The exercise's primary signal (e.g. avg_leg_angle) is smoothed and
+    followed with an online zigzag: a peak or valley is confirmed once the
+    signal has moved back from it by prominence, so jitter smaller than that
+    never makes a turning point, however close to 90 or 160 degrees it
+    hovers. With bottom='valley' a rep is a dip: it counts once the signal,
+    after a confirmed valley, has climbed completion of the way back to the
+    peak before it, and at least min_rep_duration after that peak. The depth
+    comes from the athlete's own movement, so partial-range reps count too.
+    bottom='peak' mirrors this for exercises whose 'down' end is the high
+    angle. Only the latest peak and valley are kept, so each frame is O(1).
+
+    The displayed state and its confidence still follow the analyzer
+    states, exactly like RepCounter.
+    """
+
+    def __init__(self, signal, bottom='valley', prominence=45.0, completion=0.7, min_rep_duration=0.5,
+                 smoothing=0.3, min_rep_interval=0.4):
+        if bottom not in ('valley', 'peak'):
+            raise ValueError(f"Unknown rep bottom: {bottom}")
+        self.signal = signal
+        self.bottom = bottom
+        self.prominence = prominence
+        self.completion = completion
+        self.min_rep_duration = min_rep_duration
+        self.smoothing = smoothing
+        super().__init__(min_rep_interval)
+
+    def reset(self):
+        super().reset()
+        self.smoothed = None
+        # Direction of the current leg: None until the first turning point
+        self.rising = None
+        self.extreme = None
+        self.extreme_time = None
+        # Range seen before the first turning point
+        self.low = None
+        self.low_time = None
+        self.high = None
+        self.high_time = None
+        # Latest confirmed peak and valley, and whether that valley's rep is still open
+        self.peak = None
+        self.peak_time = None
+        self.valley = None
+        self.valley_time = None
+        self.armed = False
+
+    def update(self, new_state, current_time, updown=True, features=None):
+        min_stable_frames = self.observe(new_state, current_time)
+        if not updown:
+            if self.state_stable_frames >= min_stable_frames:
+                self.exercise_state = new_state
+            return False
+        self.exercise_state = new_state
+
+        value = features.get(self.signal) if features is not None else None
+        if value is None or np.isnan(value):
+            return False
+        # Work on a signal whose rep bottom is always a valley
+        value = value if self.bottom == 'valley' else -value
+        if self.smoothed is not None:
+            value = self.smoothing * self.smoothed + (1 - self.smoothing) * value
+        self.smoothed = value
+        return self._follow(value, current_time)
+
+    def _follow(self, value, current_time):
+        counted = False
+        if self.rising is None:
+            if self.low is None or value < self.low:
+                self.low, self.low_time = value, current_time
+            if self.high is None or value > self.high:
+                self.high, self.high_time = value, current_time
+            if value <= self.high - self.prominence:
+                self._confirm_peak(self.high, self.high_time)
+                self.rising, self.extreme, self.extreme_time = False, value, current_time
+            elif value >= self.low + self.prominence:
+                self._confirm_valley(self.low, self.low_time)
+                self.rising, self.extreme, self.extreme_time = True, value, current_time
+        elif self.rising:
+            if value > self.extreme:
+                self.extreme, self.extreme_time = value, current_time
+            if (self.armed and self.peak is not None
+                    and value >= self.valley + self.completion * (self.peak - self.valley)):
+                counted = self._count(current_time, current_time - self.peak_time)
+            if value <= self.extreme - self.prominence:
+                # A rep that started at the bottom has no earlier peak: it ends at this one
+                if self.armed:
+                    counted = self._count(current_time, self.extreme_time - self.valley_time)
+                self._confirm_peak(self.extreme, self.extreme_time)
+                self.rising, self.extreme, self.extreme_time = False, value, current_time
+        else:
+            if value < self.extreme:
+                self.extreme, self.extreme_time = value, current_time
+            if value >= self.extreme + self.prominence:
+                self._confirm_valley(self.extreme, self.extreme_time)
+                self.rising, self.extreme, self.extreme_time = True, value, current_time
+                if self.peak is not None and value >= self.valley + self.completion * (self.peak - self.valley):
+                    counted = self._count(current_time, current_time - self.peak_time)
+        return counted
+
+    def _confirm_peak(self, value, peak_time):
+        self.peak, self.peak_time = value, peak_time
+
+    def _confirm_valley(self, value, valley_time):
+        self.valley, self.valley_time = value, valley_time
+        self.armed = True
+
+    def _count(self, current_time, duration):
+        """Close the open rep; it counts if it lasted long enough and is not a bounce of the last one."""
+        self.armed = False
+        if duration < self.min_rep_duration:
+            return False
+        if self.last_rep_time is not None and current_time - self.last_rep_time <= self.min_rep_interval:
+            return False
+        self.rep_count += 1
+        self.total_reps += 1
+        self.last_rep_time = current_time
+        return True
+
+# Rep counting methods an exercise can use
+REP_COUNTERS = {
+    'threshold': 'Threshold states',
+    'peaks': 'Signal peaks'
+}
+
+# Exercises whose state thresholds miss full-range reps count signal peaks by default
+DEFAULT_REP_COUNTERS = {
+    'pullup': 'peaks',
+    'deadlift': 'peaks'
+}
+
+def default_rep_counter(exercise):
+    return DEFAULT_REP_COUNTERS.get(exercise, 'threshold')
+
+def rep_signal(exercise):
+    """(signal, bottom) that PeakRepCounter follows for an exercise, or (None, None) without a state rule."""
+    rule = BATCH_STATE_RULES.get(exercise)
+    if rule is None:
+        return None, None
+    signal, _, low_state, _, _ = rule
+    return signal, 'valley' if low_state == 'down' else 'peak'
+
+def create_rep_counter(exercise, method=None, previous=None):
+    """A rep counter for an exercise with the given method, continuing previous's rep totals.
+
+    method defaults to the exercise's entry in DEFAULT_REP_COUNTERS. Exercises
+    without a state rule (plugins) always get the threshold counter.
+    """
+    method = method or default_rep_counter(exercise)
+    signal, bottom = rep_signal(exercise)
+    if method == 'peaks' and signal is not None:
+        counter = PeakRepCounter(signal, bottom)
+    elif method in REP_COUNTERS:
+        counter = RepCounter()
+    else:
+        raise ValueError(f"Unknown rep counter: {method}")
+    if previous is not None:
+        counter.rep_count = previous.rep_count
+        counter.total_reps = previous.total_reps
+    return counter
+
+class BatchRepCounter:
+    """RepCounter for many sessions at once, one row of arrays per session.
+
+    update() applies one analyzer state to each of the given rows with a few
+    numpy operations, following exactly the rules of RepCounter.update. States
+    are STATE_CODES. Rows are handed out by add() and recycled by remove();
+    the arrays grow by doubling when every row is taken.
+    """
+
+    WAITING_DOWN = 0
+    WAITING_UP = 1
+
+    def __init__(self, capacity=1024, min_rep_interval=0.4):
+        self.min_rep_interval = min_rep_interval
+        self.exercise_state = np.zeros(0, dtype=np.int8)
+        self.rep_phase = np.zeros(0, dtype=np.int8)
+        self.last_state = np.zeros(0, dtype=np.int8)
+        self.state_stable_frames = np.zeros(0, dtype=np.int32)
+        self.last_rep_time = np.zeros(0, dtype=np.float64)
+        self.rep_count = np.zeros(0, dtype=np.int32)
+        self.total_reps = np.zeros(0, dtype=np.int32)
+        self.free = []
+        self._grow(capacity)
+
+    def add(self):
+        """Take a row for a new session, with zero reps."""
+        if not self.free:
+            self._grow(len(self.rep_count))
+        row = self.free.pop()
+        self.rep_count[row] = 0
+        self.total_reps[row] = 0
+        self.reset(row)
+        return row
+
+    def remove(self, row):
+        """Give a session's row back."""
+        self.free.append(row)
+
+    def reset(self, rows):
+        """Restart the state machine of rows without touching their rep totals."""
+        self.exercise_state[rows] = STATE_CODES['ready']
+        self.rep_phase[rows] = self.WAITING_DOWN
+        self.last_state[rows] = STATE_CODES['ready']
+        self.state_stable_frames[rows] = 0
+        self.last_rep_time[rows] = -np.inf
+
+    def state_confidence(self, rows):
+        return np.minimum(self.state_stable_frames[rows] / 3.0, 1.0)
+
+    def update(self, rows, states, times, updown, min_rep_interval=None):
+        """Feed one state per row (rows must be unique); returns a bool array of counted reps.
+
+        min_rep_interval, e.g. one value per row, replaces the counter's own for this update.
+        """
+        down = STATE_CODES['down']
+        up = STATE_CODES['up']
+
+        same = states == self.last_state[rows]
+        stable = np.where(same, self.state_stable_frames[rows] + 1, 0)
+        self.last_state[rows] = states
+        self.state_stable_frames[rows] = stable
+        steady = stable >= np.where((states == up) | (states == down), 1, 2)
+
+        phase = self.rep_phase[rows]
+        to_up = updown & (phase == self.WAITING_DOWN) & (states == down) & steady
+        finished = updown & (phase == self.WAITING_UP) & (states == up) & steady
+        interval = self.min_rep_interval if min_rep_interval is None else min_rep_interval
+        counted = finished & (times - self.last_rep_time[rows] > interval)
+        self.rep_phase[rows] = np.where(to_up, self.WAITING_UP, np.where(finished, self.WAITING_DOWN, phase))
+
+        counted_rows = rows[counted]
+        self.rep_count[counted_rows] += 1
+        self.total_reps[counted_rows] += 1
+        self.last_rep_time[counted_rows] = times[counted]
+
+        # Up/down exercises always show the latest state, others only once it is stable
+        self.exercise_state[rows] = np.where(updown | steady, states, self.exercise_state[rows])
+        return counted
+
+    def _grow(self, extra):
+        size = len(self.rep_count)
+        for name in ('exercise_state', 'rep_phase', 'last_state', 'state_stable_frames',
+                     'last_rep_time', 'rep_count', 'total_reps'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, dtype=array.dtype)]))
+        self.free.extend(range(size + extra - 1, size - 1, -1))
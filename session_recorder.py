@@ -0,0 +1,184 @@
+import os
+import queue
+import tempfile
+import threading
+import weakref
+from fractions import Fraction
+
+import av
+import cv2
+import numpy as np
+
+# Output resolutions offered for recordings, by width
+RECORDING_WIDTHS = {
+    320: '320p (smallest)',
+    480: '480p',
+    640: '640p',
+    960: '960p',
+    1280: '1280p (largest)'
+}
+
+TIME_BASE = Fraction(1, 1000)
+
+# Niceness of the encoder thread, so live frames win when cores are contended
+ENCODER_NICENESS = 10
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class RecordingFile:
+    """A private temporary file for one recording, deleted along with this object.
+
+    Keep it in the browser session's state: the file goes away when the user
+    discards it, when the session ends and the state is collected, or when
+    the server exits, so finished recordings do not pile up on disk.
+    """
+
+    def __init__(self, directory=None):
+        descriptor, self.path = tempfile.mkstemp(prefix="workout_", suffix=".mp4", dir=directory)
+        os.close(descriptor)
+        self._finalizer = weakref.finalize(self, remove_file, self.path)
+
+    @property
+    def exists(self):
+        return self._finalizer.alive and os.path.exists(self.path)
+
+    def delete(self):
+        self._finalizer()
+
+class SessionRecorder:
+    """Encode annotated frames to a video file on a background thread.
+
+    submit() is called from the live processing path and never blocks: the
+    frame is scaled into one of max_queue preallocated slots and handed to the
+    encoder thread. When every slot is still waiting to be encoded the frame
+    is dropped from the recording only. Frames arriving faster than fps are
+    skipped, and width, bitrate and encoder threads cap the CPU spent encoding.
+    """
+
+    def __init__(self, path, width=640, fps=15.0, bitrate=1000000, codec='libx264',
+                 max_queue=8, threads=1):
+        self.path = path
+        self.width = width
+        self.fps = fps
+        self.bitrate = bitrate
+        self.codec = codec
+        self.threads = threads
+        self.max_queue = max_queue
+        self.size = None
+        self.slots = queue.Queue()
+        self.pending = queue.Queue()
+        self.recorded = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.error = None
+        self._last_time = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='session-recorder', daemon=True)
+        self._thread.start()
+
+    def submit(self, image, timestamp):
+        """Queue a BGR image shown at timestamp (seconds) for recording; returns False if left out."""
+        if self._closed or self.error:
+            return False
+        if self._last_time is not None and timestamp - self._last_time < 0.95 / self.fps:
+            self.skipped += 1
+            return False
+
+        if self.size is None:
+            # Even dimensions for yuv420p, keeping the aspect ratio of the first frame
+            height, width = image.shape[:2]
+            out_width = min(self.width, width) // 2 * 2
+            out_height = max(round(height * out_width / width) // 2 * 2, 2)
+            self.size = (out_width, out_height)
+            for _ in range(self.max_queue):
+                self.slots.put(np.empty((out_height, out_width, 3), dtype=np.uint8))
+
+        try:
+            slot = self.slots.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        if image.shape[1::-1] == self.size:
+            np.copyto(slot, image)
+        else:
+            cv2.resize(image, self.size, dst=slot, interpolation=cv2.INTER_AREA)
+        self._last_time = timestamp
+        self.pending.put((slot, timestamp))
+        return True
+
+    def stats(self):
+        """Return the recording counters as a dict."""
+        return {
+            'recorded': self.recorded,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'queued': self.pending.qsize()
+        }
+
+    def nbytes(self):
+        """Bytes held by the preallocated frame slots."""
+        if self.size is None:
+            return 0
+        return self.max_queue * self.size[0] * self.size[1] * 3
+
+    def close(self):
+        """Finish encoding the queued frames, close the file and return its path."""
+        if not self._closed:
+            self._closed = True
+            self.pending.put(None)
+            self._thread.join()
+        return self.path
+
+    def _run(self):
+        try:
+            # On Linux the priority of a single thread can be lowered by its native id
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), ENCODER_NICENESS)
+        except (AttributeError, OSError):
+            pass
+
+        container = None
+        stream = None
+        start_time = None
+        last_pts = -1
+        try:
+            while True:
+                item = self.pending.get()
+                if item is None:
+                    break
+                slot, timestamp = item
+                if container is None:
+                    container = av.open(self.path, mode='w')
+                    stream = container.add_stream(self.codec, rate=Fraction(self.fps).limit_denominator(1000))
+                    stream.width, stream.height = self.size
+                    stream.pix_fmt = 'yuv420p'
+                    stream.bit_rate = self.bitrate
+                    stream.time_base = TIME_BASE
+                    stream.codec_context.thread_count = self.threads
+                    start_time = timestamp
+
+                frame = av.VideoFrame.from_ndarray(slot, format='bgr24')
+                # The slot's pixels now live in the frame, so it can take the next image
+                self.slots.put(slot)
+                pts = int(round((timestamp - start_time) / TIME_BASE))
+                if pts <= last_pts:
+                    continue
+                last_pts = pts
+                frame.pts = pts
+                frame.time_base = TIME_BASE
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+                self.recorded += 1
+        except Exception as e:
+            # Stop recording but never take the live session down with it
+            self.error = e
+        finally:
+            if container is not None:
+                try:
+                    for packet in stream.encode():
+                        container.mux(packet)
+                finally:
+                    container.close()
@@ -10,8 +10,13 @@ setup(
         "streamlit",
         "streamlit-webrtc", 
         "numpy",
+        "pandas",
         "opencv-python",
         "mediapipe",
         "av"
     ],
+    extras_require={
+        # The landmark gateway (landmark_gateway.py) and its benchmark
+        "gateway": ["websockets>=13"],
+    },
 ) 
\ No newline at end of file
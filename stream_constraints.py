@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+
+from thread_budget import available_cores
+
+# Capture profiles from best to cheapest: width, height, frame rate
+CAPTURE_PROFILES = (
+    (1280, 720, 30),
+    (960, 540, 30),
+    (640, 360, 30),
+    (480, 270, 20),
+    (320, 180, 15)
+)
+
+# Input side of MediaPipe Pose's landmark model; frames are resized to it anyway
+MEDIAPIPE_INPUT_WIDTH = 256
+
+# Capture width as a multiple of the inference input: enough for the person
+# detector to find someone standing back, without decoding pixels the model never sees
+INFERENCE_HEADROOM = 2.5
+
+def inference_width(backend):
+    """Input width the backend's model actually runs at."""
+    input_size = getattr(backend, 'input_size', None)
+    return input_size[0] if input_size else MEDIAPIPE_INPUT_WIDTH
+
+def load_average_per_core():
+    """1-minute load average per usable core, or 0.0 where the OS does not report one."""
+    try:
+        return os.getloadavg()[0] / max(len(available_cores()), 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+class StreamConstraintPlanner:
+    """Choose the camera resolution and frame rate that sessions should send.
+
+    The ceiling is what the pipeline can use: INFERENCE_HEADROOM times the
+    model's input width, or the recording width when recording. Below it,
+    the profile steps one rung down CAPTURE_PROFILES whenever the load goes
+    above high_load and back up when it falls below low_load, at most once
+    per hold_seconds so browsers are not renegotiating all the time. The load
+    is the larger of the host's load average and the share of the cores the
+    sessions spent processing frames (reported through report()), measured
+    over windows of at least window_seconds.
+    """
+
+    def __init__(self, inference_width=MEDIAPIPE_INPUT_WIDTH, cores=None, high_load=0.85, low_load=0.5,
+                 hold_seconds=10.0, window_seconds=2.0, wall_clock=time.monotonic,
+                 load_average=load_average_per_core):
+        self.inference_width = inference_width
+        self.cores = cores or len(available_cores())
+        self.high_load = high_load
+        self.low_load = low_load
+        self.hold_seconds = hold_seconds
+        self.window_seconds = window_seconds
+        self.wall_clock = wall_clock
+        self.load_average = load_average
+        self.lock = threading.Lock()
+        # Rungs below the ceiling profile
+        self.step = 0
+        self.changes = 0
+        self.busy = 0.0
+        self.load = 0.0
+        self.window_start = wall_clock()
+        self.last_change = self.window_start
+
+    def report(self, busy_seconds):
+        """Add processing time spent by a session; cheap enough to call every frame."""
+        with self.lock:
+            self.busy += busy_seconds
+
+    def profiles(self, recording_width=None):
+        """Capture profiles from the ceiling down to the cheapest one."""
+        ceiling = max(self.inference_width * INFERENCE_HEADROOM, recording_width or 0)
+        usable = [profile for profile in CAPTURE_PROFILES if profile[0] <= ceiling]
+        return usable or CAPTURE_PROFILES[-1:]
+
+    def update(self, recording_width=None):
+        """Measure the load since the last update and step the profile down or up.
+
+        recording_width sets the ceiling like in profile(), so the step never
+        goes below the cheapest profile the caller is then given.
+        """
+        with self.lock:
+            now = self.wall_clock()
+            elapsed = now - self.window_start
+            if elapsed < self.window_seconds:
+                return self.step
+            busy_share = self.busy / (elapsed * self.cores)
+            self.busy = 0.0
+            self.window_start = now
+            self.load = max(busy_share, self.load_average())
+            if now - self.last_change < self.hold_seconds:
+                return self.step
+            if self.load > self.high_load and self.step < len(self.profiles(recording_width)) - 1:
+                self.step += 1
+            elif self.load < self.low_load and self.step > 0:
+                self.step -= 1
+            else:
+                return self.step
+            self.last_change = now
+            self.changes += 1
+            return self.step
+
+    def profile(self, recording_width=None):
+        """(width, height, frame rate) sessions should send right now."""
+        profiles = self.profiles(recording_width)
+        return profiles[min(self.step, len(profiles) - 1)]
+
+    def constraints(self, recording_width=None):
+        """getUserMedia constraints for webrtc_streamer's media_stream_constraints."""
+        width, height, fps = self.profile(recording_width)
+        return {
+            "video": {
+                "width": {"ideal": width, "max": width},
+                "height": {"ideal": height, "max": height},
+                "frameRate": {"ideal": fps, "max": fps}
+            },
+            "audio": False
+        }
+
+    def stats(self):
+        """Return the planner state as a dict."""
+        width, height, fps = self.profile()
+        return {
+            'load': self.load,
+            'step': self.step,
+            'width': width,
+            'height': height,
+            'fps': fps,
+            'changes': self.changes
+        }
@@ -0,0 +1,272 @@
+import numpy as np
+
+from exercise_utils import EXERCISES
+from rep_counter import UPDOWN_EXERCISES
+
+# Segment lengths of the stick figure in body units (standing height ~1.75)
+SHANK = 0.43
+THIGH = 0.45
+TORSO = 0.52
+NECK = 0.22
+UPPER_ARM = 0.30
+FOREARM = 0.27
+HAND = 0.08
+SHOULDER_HALF_WIDTH = 0.19
+HIP_HALF_WIDTH = 0.12
+
+# Body units to normalized image coordinates
+BODY_SCALE = 0.45
+
+# Distinct noise frames drawn per sequence (see generate_sequence)
+NOISE_BANK_FRAMES = 4096
+
+# Joint angles in degrees, standing with arms hanging.
+# thigh / shank: limb direction from straight down, forward positive (shank = thigh - knee)
+# torso: lean from straight up, forward positive
+# upper / fore: (flexion forward from straight down, abduction out to the side)
+NEUTRAL_POSE = {
+    'thigh_l': 0.0, 'thigh_r': 0.0,
+    'knee_l': 0.0, 'knee_r': 0.0,
+    'torso': 0.0,
+    'upper_l': (0.0, 8.0), 'upper_r': (0.0, 8.0),
+    'fore_l': (0.0, 8.0), 'fore_r': (0.0, 8.0)
+}
+
+# Per exercise: start pose (phase 0), far end of the rep (phase 1), what stays
+# fixed in the image ('feet' or 'hands'), where it sits and the default camera
+# yaw (0 = facing the camera, 90 = side view).
+EXERCISE_MOTIONS = {
+    'pushup': {
+        'start': {'torso': 70, 'thigh_l': -70, 'thigh_r': -70, 'upper_l': (0, 0), 'upper_r': (0, 0),
+                  'fore_l': (0, 0), 'fore_r': (0, 0)},
+        'end': {'torso': 82, 'thigh_l': -82, 'thigh_r': -82, 'upper_l': (-110, 0), 'upper_r': (-110, 0)},
+        'anchor': ('feet', 0.2, 0.85), 'camera': 90
+    },
+    'squat': {
+        'start': {},
+        'end': {'thigh_l': 95, 'thigh_r': 95, 'knee_l': 115, 'knee_r': 115, 'torso': 40,
+                'upper_l': (70, 0), 'upper_r': (70, 0), 'fore_l': (70, 0), 'fore_r': (70, 0)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'curl': {
+        'start': {'upper_l': (0, 5), 'upper_r': (0, 5), 'fore_l': (0, 5), 'fore_r': (0, 5)},
+        'end': {'fore_l': (145, 5), 'fore_r': (145, 5)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'plank': {
+        'start': {'torso': 78, 'thigh_l': -78, 'thigh_r': -78, 'upper_l': (0, 0), 'upper_r': (0, 0),
+                  'fore_l': (90, 0), 'fore_r': (90, 0)},
+        'end': {},
+        'anchor': ('feet', 0.2, 0.85), 'camera': 90
+    },
+    'pullup': {
+        'start': {'upper_l': (180, 15), 'upper_r': (180, 15), 'fore_l': (180, 12), 'fore_r': (180, 12)},
+        'end': {'upper_l': (0, 30), 'upper_r': (0, 30), 'fore_l': (180, -5), 'fore_r': (180, -5),
+                'knee_l': 30, 'knee_r': 30},
+        'anchor': ('hands', 0.5, 0.08), 'camera': 0
+    },
+    'lunge': {
+        'start': {},
+        'end': {'thigh_l': 85, 'knee_l': 95, 'thigh_r': -20, 'knee_r': 100, 'torso': 5},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'press': {
+        'start': {'upper_l': (0, 90), 'upper_r': (0, 90), 'fore_l': (180, -20), 'fore_r': (180, -20)},
+        'end': {'upper_l': (0, 170), 'upper_r': (0, 170), 'fore_l': (0, 175), 'fore_r': (0, 175)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 0
+    },
+    'row': {
+        'start': {'torso': 60, 'thigh_l': 20, 'thigh_r': 20, 'knee_l': 30, 'knee_r': 30,
+                  'upper_l': (0, 5), 'upper_r': (0, 5), 'fore_l': (0, 5), 'fore_r': (0, 5)},
+        'end': {'upper_l': (-70, 5), 'upper_r': (-70, 5), 'fore_l': (60, 5), 'fore_r': (60, 5)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'goblet_squat': {
+        'start': {'upper_l': (20, 10), 'upper_r': (20, 10), 'fore_l': (170, 0), 'fore_r': (170, 0)},
+        'end': {'thigh_l': 95, 'thigh_r': 95, 'knee_l': 115, 'knee_r': 115, 'torso': 25},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'lateral_raise': {
+        'start': {'upper_l': (0, 10), 'upper_r': (0, 10), 'fore_l': (0, 12), 'fore_r': (0, 12)},
+        'end': {'upper_l': (0, 90), 'upper_r': (0, 90), 'fore_l': (0, 95), 'fore_r': (0, 95)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 0
+    },
+    'tricep_extension': {
+        'start': {'upper_l': (170, 10), 'upper_r': (170, 10), 'fore_l': (175, 10), 'fore_r': (175, 10)},
+        'end': {'fore_l': (330, 10), 'fore_r': (330, 10)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'front_raise': {
+        'start': {'upper_l': (0, 5), 'upper_r': (0, 5), 'fore_l': (0, 5), 'fore_r': (0, 5)},
+        'end': {'upper_l': (90, 5), 'upper_r': (90, 5), 'fore_l': (95, 5), 'fore_r': (95, 5)},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'deadlift': {
+        'start': {},
+        'end': {'thigh_l': 70, 'thigh_r': 70, 'knee_l': 95, 'knee_r': 95, 'torso': 60},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    },
+    'overhead_squat': {
+        'start': {'upper_l': (170, 15), 'upper_r': (170, 15), 'fore_l': (175, 15), 'fore_r': (175, 15)},
+        'end': {'thigh_l': 95, 'thigh_r': 95, 'knee_l': 115, 'knee_r': 115, 'torso': 30},
+        'anchor': ('feet', 0.5, 0.92), 'camera': 90
+    }
+}
+
+def _limb_direction(flexion, abduction, side):
+    """Unit vectors (x forward, y up, z to the left) for limbs rotated out from straight down."""
+    flexion = np.radians(flexion)
+    abduction = np.radians(abduction)
+    cos_abd = np.cos(abduction)
+    return np.stack(np.broadcast_arrays(cos_abd * np.sin(flexion), -cos_abd * np.cos(flexion),
+                                        side * np.sin(abduction)))
+
+def _cycle_phases(rep_frames, rest_frames, lag=0.0):
+    """Phase of one rep and its rest, 0 at the start pose and 1 at the far end, plus a resting frame."""
+    within = np.arange(rep_frames + rest_frames + 1) % (rep_frames + rest_frames)
+    u = np.clip((within / rep_frames - lag) / (1 - lag), 0.0, 1.0)
+    return np.where(within < rep_frames, (1 - np.cos(2 * np.pi * u)) / 2, 0.0)
+
+def _pose_frames(motion, phase_l, phase_r, yaw):
+    """Forward kinematics and camera projection for each frame's phase, as (N, 33, 4) landmarks."""
+    total = len(phase_l)
+
+    # Interpolate every joint angle between the start and end pose
+    start = dict(NEUTRAL_POSE, **motion['start'])
+    end = dict(start, **motion['end'])
+    pose = {}
+    for name in start:
+        phase = phase_r if name.endswith('_r') else phase_l
+        a = np.asarray(start[name], dtype=np.float64)
+        b = np.asarray(end[name], dtype=np.float64)
+        if a.ndim:
+            pose[name] = tuple(a[i] + (b[i] - a[i]) * phase for i in range(2))
+        else:
+            pose[name] = a + (b - a) * phase
+
+    points = np.zeros((33, 3, total), dtype=np.float64)
+
+    # Torso and head, hips centered on the origin
+    torso = np.radians(pose['torso'])
+    up = np.stack([np.sin(torso), np.cos(torso), np.zeros(total)])
+    forward = np.stack([np.cos(torso), -np.sin(torso), np.zeros(total)])
+    lateral = np.array([0.0, 0.0, 1.0])[:, np.newaxis]
+    shoulder_mid = up * TORSO
+    head = shoulder_mid + up * NECK
+    points[0] = head + forward * 0.10
+    for index, side, offset in ((1, 1, 0.02), (2, 1, 0.035), (3, 1, 0.05),
+                                (4, -1, 0.02), (5, -1, 0.035), (6, -1, 0.05)):
+        points[index] = head + forward * 0.08 + up * 0.04 + lateral * side * offset
+    points[7] = head + lateral * 0.075
+    points[8] = head - lateral * 0.075
+    points[9] = head + forward * 0.08 - up * 0.04 + lateral * 0.025
+    points[10] = head + forward * 0.08 - up * 0.04 - lateral * 0.025
+
+    for suffix, side, (shoulder, elbow, wrist, pinky, index, thumb, hip, knee, ankle, heel, toe) in (
+            ('_l', 1, (11, 13, 15, 17, 19, 21, 23, 25, 27, 29, 31)),
+            ('_r', -1, (12, 14, 16, 18, 20, 22, 24, 26, 28, 30, 32))):
+        # Arms
+        points[shoulder] = shoulder_mid + lateral * side * SHOULDER_HALF_WIDTH
+        upper = _limb_direction(*pose['upper' + suffix], side)
+        fore = _limb_direction(*pose['fore' + suffix], side)
+        points[elbow] = points[shoulder] + upper * UPPER_ARM
+        points[wrist] = points[elbow] + fore * FOREARM
+        points[pinky] = points[wrist] + fore * HAND + lateral * side * 0.02
+        points[index] = points[wrist] + fore * HAND - lateral * side * 0.01
+        points[thumb] = points[wrist] + fore * (HAND * 0.6) - lateral * side * 0.03
+
+        # Legs
+        points[hip] = lateral * side * HIP_HALF_WIDTH + np.zeros((3, total))
+        thigh = pose['thigh' + suffix]
+        points[knee] = points[hip] + _limb_direction(thigh, 0.0, side) * THIGH
+        points[ankle] = points[knee] + _limb_direction(thigh - pose['knee' + suffix], 0.0, side) * SHANK
+        points[heel] = points[ankle] + np.array([-0.05, -0.04, 0.0])[:, np.newaxis]
+        points[toe] = points[ankle] + np.array([0.15, -0.06, 0.0])[:, np.newaxis]
+
+    # Keep the feet (or the hands on the bar) fixed in the image
+    anchor, anchor_x, anchor_y = motion['anchor']
+    if anchor == 'hands':
+        origin = (points[15] + points[16]) / 2
+    else:
+        origin = (points[27] + points[28]) / 2
+    points -= origin
+
+    # Project for the camera yaw: x forward, y up, z to the person's left
+    image_x = points[:, 0] * np.sin(yaw) - points[:, 2] * np.cos(yaw)
+    depth = points[:, 0] * np.cos(yaw) + points[:, 2] * np.sin(yaw)
+
+    landmarks = np.empty((total, 33, 4), dtype=np.float32)
+    landmarks[:, :, 0] = (anchor_x + BODY_SCALE * image_x).T
+    landmarks[:, :, 1] = (anchor_y - BODY_SCALE * points[:, 1]).T
+    landmarks[:, :, 2] = (BODY_SCALE * (depth - depth[23:25].mean(axis=0))).T
+
+    # The far side of the body is less visible from the side
+    visibility = np.full(33, 0.98, dtype=np.float32)
+    far_side = [1, 2, 3, 7, 9, 11, 13, 15, 17, 19, 21, 23, 25, 27, 29, 31]
+    visibility[far_side] -= 0.35 * abs(np.sin(yaw))
+    landmarks[:, :, 3] = visibility
+    return landmarks
+
+def generate_sequence(exercise, reps=10, tempo=2.0, fps=30.0, range_of_motion=1.0, asymmetry=0.0,
+                      camera_angle=None, noise=0.0, occlusion=0.0, dropout=0.0, rest=0.5, seed=None):
+    """Generate a (T, 33, 4) landmark sequence of an exercise with ground-truth reps.
+
+    tempo is seconds per rep, range_of_motion scales how far each rep goes
+    (1.0 = full rep), asymmetry (0..1) makes the right side lag and move less,
+    camera_angle is the yaw in degrees (0 = facing the camera, 90 = side view,
+    default per exercise), noise is the std of landmark jitter in normalized
+    coordinates, occlusion the chance a landmark drops to low visibility and
+    dropout the chance a whole frame is missing (NaN), as when nobody is detected.
+
+    Returns a dict with 'landmarks', 'timestamps' (seconds), 'rep_starts',
+    'rep_bottoms' and 'rep_ends' (frame indices) and 'rep_count'. Exercises that
+    are held rather than repeated (plank) have no reps.
+    """
+    motion = EXERCISE_MOTIONS[exercise]
+    rng = np.random.default_rng(seed)
+    rep_frames = max(int(round(tempo * fps)), 2)
+    rest_frames = int(round(rest * fps))
+    lead_frames = max(rest_frames, 1)
+    period = rep_frames + rest_frames
+    total = lead_frames + reps * period
+
+    # Every rep is the same motion, so pose one rep and tile it; only the noise differs
+    phase_l = _cycle_phases(rep_frames, rest_frames) * range_of_motion
+    phase_r = (_cycle_phases(rep_frames, rest_frames, lag=0.15 * asymmetry)
+               * range_of_motion * (1 - 0.5 * asymmetry))
+    yaw = np.radians(motion['camera'] if camera_angle is None else camera_angle)
+    cycle = _pose_frames(motion, phase_l, phase_r, yaw)
+    frames = np.empty(total, dtype=np.intp)
+    frames[:lead_frames] = period
+    frames[lead_frames:] = np.arange(reps * period) % period
+    landmarks = cycle[frames]
+
+    if noise:
+        # Draw each frame's jitter from a bank of noise frames; far cheaper than
+        # fresh gaussians for millions of frames and indistinguishable downstream
+        bank = rng.standard_normal((min(total, NOISE_BANK_FRAMES), 33, 3), dtype=np.float32) * noise
+        landmarks[:, :, :3] += bank[rng.integers(0, len(bank), total)]
+    if occlusion:
+        occluded = rng.random((total, 33), dtype=np.float32) < occlusion
+        landmarks[:, :, 3][occluded] = rng.random(int(occluded.sum()), dtype=np.float32) * 0.3
+    if dropout:
+        landmarks[rng.random(total) < dropout] = np.nan
+    # Ground-truth rep boundaries
+    if exercise in UPDOWN_EXERCISES:
+        rep_starts = lead_frames + period * np.arange(reps)
+    else:
+        rep_starts = np.zeros(0, dtype=np.int64)
+    return {
+        'exercise': exercise,
+        'fps': fps,
+        'landmarks': landmarks,
+        'timestamps': np.arange(total) / fps,
+        'rep_starts': rep_starts,
+        'rep_bottoms': rep_starts + rep_frames // 2,
+        'rep_ends': rep_starts + rep_frames,
+        'rep_count': len(rep_starts)
+    }
+
+def generate_all(**kwargs):
+    """Generate one sequence for every exercise in EXERCISES."""
+    return {exercise: generate_sequence(exercise, **kwargs) for exercise in EXERCISES}
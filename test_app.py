@@ -13,7 +13,7 @@ def test_imports():
         return False
     
     try:
-        from streamlit_webrtc import webrtc_streamer, VideoTransformerBase, RTCConfiguration
+        from streamlit_webrtc import webrtc_streamer, VideoProcessorBase, RTCConfiguration
         print("✅ streamlit-webrtc imported successfully")
     except ImportError as e:
         print(f"❌ Failed to import streamlit-webrtc: {e}")
@@ -87,6 +87,1200 @@ def test_exercise_utils():
         print(f"❌ Failed to import exercise_utils: {e}")
         return False
 
+def test_exercise_recognition():
+    """Test that the batched evaluation matches the per-exercise analyzers and exercises are recognized"""
+    try:
+        import numpy as np
+        import exercise_utils
+        from exercise_utils import EXERCISES, STATE_CODES, batch_states
+        from exercise_recognition import ExerciseRecognizer, EXERCISE_KEYS
+        from synthetic_landmarks import generate_sequence
+        
+        class MockLandmark:
+            def __init__(self, x, y, z, visibility):
+                self.x = x
+                self.y = y
+                self.z = z
+                self.visibility = visibility
+        
+        frames = np.random.default_rng(0).random((50, 33, 4)).astype(np.float32)
+        states = batch_states(frames)
+        for i, frame in enumerate(frames):
+            landmarks = [MockLandmark(*row) for row in frame]
+            for row, exercise in enumerate(EXERCISES):
+                state = getattr(exercise_utils, f"analyze_{exercise}")(landmarks)[0]
+                if STATE_CODES[state] != states[row, i]:
+                    print(f"❌ Batched state for '{exercise}' differs from analyze_{exercise}")
+                    return False
+        print("✅ Batched states match the analyzers")
+        
+        recognizer = ExerciseRecognizer(window_size=20, min_frames=10, stride=1, switch_after=1, min_confidence=0)
+        for frame in frames:
+            recognizer.update(frame)
+        if recognizer.exercise not in EXERCISE_KEYS:
+            print(f"❌ Recognizer returned unknown exercise: {recognizer.exercise}")
+            return False
+        
+        # Every exercise is recognized, and no other exercise is ever reported on the way
+        for exercise in EXERCISE_KEYS:
+            sequence = generate_sequence(exercise, reps=6, noise=0.004, dropout=0.02, seed=1)
+            recognizer = ExerciseRecognizer()
+            labels = {recognizer.update(frame) for frame in sequence['landmarks'] if not np.isnan(frame).any()}
+            if recognizer.exercise != exercise or labels - {None, exercise}:
+                print(f"❌ Recognized {exercise} as {recognizer.exercise} (labels {labels - {None}})")
+                return False
+        print("✅ Exercise recognizer working correctly")
+        
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import exercise_recognition: {e}")
+        return False
+
+def test_rep_counter():
+    """Test that rep counting depends on frame timestamps, not processing speed"""
+    try:
+        from fractions import Fraction
+        from rep_counter import FrameClock, RepCounter
+        
+        class MockFrame:
+            def __init__(self, pts):
+                self.pts = pts
+                self.time_base = Fraction(1, 90000)
+        
+        # 5 reps at 30 fps: 10 frames down, 10 frames up
+        states = (['down'] * 10 + ['up'] * 10) * 5
+        clock = FrameClock()
+        counter = RepCounter()
+        for i, state in enumerate(states):
+            counter.update(state, clock(MockFrame(i * 3000)))
+        if counter.rep_count != 5:
+            print(f"❌ Rep counting failed: got {counter.rep_count}, expected 5")
+            return False
+        
+        # Reps closer together than the debounce interval are ignored
+        clock = FrameClock()
+        counter = RepCounter()
+        for i, state in enumerate(['down', 'down', 'up', 'up'] * 5):
+            counter.update(state, clock(MockFrame(i * 3000)))
+        if counter.rep_count != 2:
+            print(f"❌ Rep debounce failed: got {counter.rep_count}, expected 2")
+            return False
+        
+        print("✅ Rep counter working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import rep_counter: {e}")
+        return False
+
+def test_pose_backends():
+    """Test that the replay backend plays back landmarks deterministically"""
+    try:
+        import os
+        import tempfile
+        import numpy as np
+        from pose_backends import ModelFileBackend, ReplayBackend, draw_skeleton
+        
+        recorded = np.random.default_rng(0).random((3, 33, 4)).astype(np.float32)
+        recorded[1] = np.nan
+        backend = ReplayBackend(recorded)
+        image = np.zeros((48, 64, 3), dtype=np.uint8)
+        
+        landmarks, confidence = backend.process(image)
+        if landmarks is None or not np.array_equal(landmarks, recorded[0]):
+            print("❌ Replay backend returned the wrong landmarks")
+            return False
+        if backend.process(image)[0] is not None:
+            print("❌ Replay backend should report missed detections")
+            return False
+        backend.process(image)
+        if backend.process(image) != (None, 0.0):
+            print("❌ Replay backend should stop at the end of the recording")
+            return False
+        
+        draw_skeleton(image, landmarks)
+        
+        # A model replaced under the same path describes itself differently, so caches miss
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pose.onnx')
+            descriptions = []
+            for weights in (b'first', b'second'):
+                with open(path, 'wb') as f:
+                    f.write(weights)
+                descriptions.append(ModelFileBackend(path).describe())
+        if descriptions[0] == descriptions[1]:
+            print("❌ Model file backends ignore the model file's content")
+            return False
+        
+        print("✅ Pose backends working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import pose_backends: {e}")
+        return False
+
+def test_thread_budget():
+    """Test that cores are split evenly as sessions join and leave"""
+    try:
+        import cv2
+        from thread_budget import ThreadBudgetManager
+        
+        manager = ThreadBudgetManager(cores=range(8), pin_affinity=False)
+        leases = [manager.acquire() for _ in range(3)]
+        if [len(lease.cpus) for lease in leases] != [2, 2, 2]:
+            print(f"❌ Uneven CPU split: {[lease.cpus for lease in leases]}")
+            return False
+        leases[0].release()
+        if [lease.inference_threads for lease in leases[1:]] != [4, 4]:
+            print("❌ Budget was not rebalanced after a session left")
+            return False
+        # Backends that take a thread count are sized to the lease
+        if leases[1].create(lambda threads=None: threads) != 4 or leases[1].create(lambda: 'plain') != 'plain':
+            print("❌ Lease did not pass its inference thread count to the backend")
+            return False
+        for lease in leases[1:]:
+            lease.release()
+        if cv2.getNumThreads() != manager.default_opencv_threads:
+            print("❌ OpenCV thread count was not restored after the last session left")
+            return False
+        
+        print("✅ Thread budget manager working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import thread_budget: {e}")
+        return False
+
+def test_synthetic_landmarks():
+    """Test that synthetic sequences are counted like their ground truth"""
+    try:
+        from synthetic_landmarks import generate_sequence
+        from offline_analysis import analyze_landmarks
+        
+        sequence = generate_sequence('squat', reps=4, noise=0.003, dropout=0.02, seed=0)
+        if sequence['landmarks'].shape != (len(sequence['timestamps']), 33, 4):
+            print(f"❌ Unexpected landmark shape: {sequence['landmarks'].shape}")
+            return False
+        result = analyze_landmarks(sequence['landmarks'], sequence['timestamps'], 'squat')
+        if result['rep_count'] != sequence['rep_count']:
+            print(f"❌ Counted {result['rep_count']} reps, expected {sequence['rep_count']}")
+            return False
+        
+        print("✅ Synthetic landmarks working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import synthetic_landmarks: {e}")
+        return False
+
+def test_keyframes():
+    """Test that rep keyframes are captured and the gallery stays bounded"""
+    try:
+        import threading
+        import numpy as np
+        from keyframes import KeyframeCapture
+        
+        capture = KeyframeCapture(capacity=8, width=32, max_reps=2, max_sets=2)
+        image = np.zeros((48, 64, 3), dtype=np.uint8)
+        states = ['up', 'down', 'down', 'down', 'up'] * 4
+        for i, state in enumerate(states):
+            capture.push(image, None, 90, state, float(i))
+            if i % 5 == 4:
+                capture.on_rep(i // 5 + 1)
+        reps = capture.gallery()
+        if [entry['rep'] for entry in reps] != [3, 4] or reps[0]['bottom']['time'] != 12.0:
+            print(f"❌ Unexpected keyframes: {[(e['rep'], e['bottom']['time']) for e in reps]}")
+            return False
+        for _ in range(3):
+            capture.new_set()
+        if len(capture.sets) != 2 or reps[0]['top']['image'].shape != (24, 32, 3):
+            print("❌ Keyframe gallery is not bounded")
+            return False
+        
+        # The frame thread keeps pushing while the script thread resets and starts sets
+        errors = []
+        def frame_thread():
+            try:
+                for i, state in enumerate(states * 50):
+                    capture.push(image, None, 90, state, float(i))
+                    if i % 5 == 4:
+                        capture.on_rep(i // 5 + 1)
+            except Exception as e:
+                errors.append(e)
+        thread = threading.Thread(target=frame_thread)
+        thread.start()
+        while thread.is_alive():
+            capture.reset()
+            capture.new_set()
+            capture.gallery()
+        thread.join()
+        if errors or len(capture.sets) > 2:
+            print(f"❌ Concurrent reset broke keyframe capture: {errors}")
+            return False
+        
+        print("✅ Keyframe capture working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import keyframes: {e}")
+        return False
+
+def test_exercise_registry():
+    """Test that built-in and registered exercises resolve through the registry"""
+    try:
+        from exercise_registry import BUILTIN_EXERCISES, ExerciseRegistry, declare
+        from exercise_utils import ANALYZERS, analyze_squat
+        
+        registry = ExerciseRegistry(entry_point_group=None)
+        if len(registry) != 14 or 'plank' in registry.updown or registry['squat'].analyze is not analyze_squat:
+            print("❌ Built-in exercises did not resolve")
+            return False
+        if ANALYZERS != {spec.key: registry[spec.key].analyze for spec in BUILTIN_EXERCISES}:
+            print("❌ exercise_utils.ANALYZERS differs from the built-in declarations")
+            return False
+        
+        registry.register(declare('wall_sit', 'Wall Sit', 'Core', lambda features: ('hold', 100, 'Hold'),
+                                  rep_mode='hold'))
+        exercise = registry['wall_sit']
+        if exercise.updown or exercise.analyze(None)[0] != 'hold' or 'wall_sit' not in registry.categories['Core']:
+            print("❌ Registered exercise did not resolve")
+            return False
+        try:
+            registry.specs['wall_sit'] = None
+            print("❌ Registry lookups should be read-only")
+            return False
+        except TypeError:
+            pass
+        
+        print("✅ Exercise registry working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import exercise_registry: {e}")
+        return False
+
+def test_landmark_gateway():
+    """Test that batched rep counting across sessions matches the per-session counter"""
+    try:
+        import numpy as np
+        from exercise_utils import STATES
+        from rep_counter import RepCounter, BatchRepCounter
+        import asyncio
+        from landmark_gateway import BatchAnalyzer, LandmarkGateway, decode_frames, encode_frames
+        from offline_analysis import analyze_landmarks
+        from synthetic_landmarks import generate_sequence
+        
+        rng = np.random.default_rng(0)
+        states = np.repeat(rng.integers(0, 4, (20, 50)), 3, axis=1).astype(np.int8)
+        times = np.cumsum(rng.uniform(0.05, 0.2, states.shape), axis=1)
+        updown = np.arange(20) % 4 != 0
+        batch = BatchRepCounter(capacity=4)
+        rows = np.array([batch.add() for _ in range(20)])
+        counters = [RepCounter() for _ in range(20)]
+        for t in range(states.shape[1]):
+            batch.update(rows, states[:, t], times[:, t], updown)
+            for k, counter in enumerate(counters):
+                counter.update(STATES[states[k, t]], times[k, t], updown=bool(updown[k]))
+        if list(batch.rep_count[rows]) != [counter.rep_count for counter in counters]:
+            print("❌ Batched rep counts differ from RepCounter")
+            return False
+        
+        # Pull-ups count signal peaks by default, in the gateway as everywhere else
+        analyzer = BatchAnalyzer()
+        for exercise in ('squat', 'pullup'):
+            sequence = generate_sequence(exercise, reps=3, seed=0)
+            timestamps, landmarks = decode_frames(encode_frames(sequence['timestamps'], sequence['landmarks']))
+            expected = analyze_landmarks(sequence['landmarks'], sequence['timestamps'], exercise)['rep_count']
+            sessions = [analyzer.open(exercise), analyzer.open(exercise)]
+            for start in range(0, len(timestamps), 8):
+                results = analyzer.process([(session, timestamps[start:start + 8], landmarks[start:start + 8])
+                                            for session in sessions])
+            if [result['reps'] for result in results] != [expected, expected] or expected != 3:
+                print(f"❌ Gateway counted {[result['reps'] for result in results]} {exercise} reps, "
+                      f"offline {expected}, instead of 3")
+                return False
+        
+        # Switching exercises keeps the session's total across both kinds of counter
+        analyzer.switch_exercise(sessions[0], 'squat')
+        results = analyzer.process([(sessions[0], timestamps[:8], landmarks[:8])])
+        if results[0]['total_reps'] != 3 or results[0]['exercise'] != 'squat':
+            print(f"❌ Switching the exercise lost the rep total: {results[0]}")
+            return False
+        
+        # A session with no frames in the batch (here the newest one) must not break the others
+        empty = analyzer.open('squat')
+        results = analyzer.process([(sessions[1], timestamps[:8], landmarks[:8]),
+                                    (empty, timestamps[:0], landmarks[:0])])
+        if results[1]['counted'] != 0 or results[0]['exercise'] != 'pullup':
+            print(f"❌ Batch with an empty session analyzed wrongly: {results}")
+            return False
+        
+        # Empty messages are refused for their sender only; the batch they would have joined goes through
+        async def mixed_messages():
+            gateway = LandmarkGateway(BatchAnalyzer(), window=0.01)
+            loop = asyncio.create_task(gateway.run())
+            await asyncio.sleep(0)
+            first, second = gateway.analyzer.open('squat'), gateway.analyzer.open('squat')
+            outcomes = await asyncio.gather(
+                gateway.submit(first, encode_frames(timestamps[:8], landmarks[:8])),
+                gateway.submit(second, b''),
+                gateway.submit(second, '{"timestamps": [], "landmarks": ""}'),
+                return_exceptions=True
+            )
+            loop.cancel()
+            return outcomes, gateway.errors
+        outcomes, errors = asyncio.run(mixed_messages())
+        if (not isinstance(outcomes[0], dict) or 'error' in outcomes[0] or errors
+                or not all(isinstance(outcome, ValueError) for outcome in outcomes[1:])):
+            print(f"❌ Empty messages were not refused on their own: {outcomes}")
+            return False
+        
+        print("✅ Landmark gateway working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import landmark_gateway: {e}")
+        return False
+
+def test_memory_budget():
+    """Test session admission, degradation and leak detection of the memory budget"""
+    try:
+        from fractions import Fraction
+        import av
+        import numpy as np
+        from app import PoseTransformer
+        from memory_budget import MemoryBudgetManager
+        from pose_backends import ReplayBackend
+        from synthetic_landmarks import generate_sequence
+        
+        class ClosingBackend(ReplayBackend):
+            closed = False
+            def close(self):
+                self.closed = True
+        
+        landmarks = generate_sequence('squat', reps=1, seed=0)['landmarks']
+        frame = av.VideoFrame.from_ndarray(np.zeros((120, 160, 3), dtype=np.uint8), format="bgr24")
+        frame.pts = 0
+        frame.time_base = Fraction(1, 90000)
+        
+        refused = PoseTransformer(backend=ReplayBackend(landmarks), memory_budget=MemoryBudgetManager(global_budget=1))
+        refused.recv(frame)
+        if refused.admitted or refused.backend.index != 0:
+            print("❌ Session was admitted over the global memory budget")
+            return False
+        
+        manager = MemoryBudgetManager(session_budget=1, global_budget=None)
+        backend = ClosingBackend(landmarks)
+        processor = PoseTransformer(backend=backend, memory_budget=manager)
+        processor.recv(frame)
+        if not processor.degraded or manager.stats()['degraded'] != 1:
+            print("❌ Session over its memory budget was not degraded")
+            return False
+        
+        processor.on_ended()
+        if not backend.closed:
+            print("❌ Backend was not closed when the session ended")
+            return False
+        if manager.check_leaks() != 1:
+            print("❌ Ended session that is still referenced was not reported")
+            return False
+        del processor
+        if manager.check_leaks() != 0 or manager.counts().get('transformers') != 0:
+            print("❌ Released session is still counted")
+            return False
+        
+        print("✅ Memory budget working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import memory_budget: {e}")
+        return False
+
+def test_landmark_cache():
+    """Test that cached landmarks skip inference and old entries are evicted"""
+    try:
+        import tempfile
+        import av
+        import numpy as np
+        from landmark_cache import LandmarkCache
+        from pose_backends import ReplayBackend
+        from synthetic_landmarks import generate_sequence
+        
+        landmarks = generate_sequence('squat', reps=1, seed=0)['landmarks']
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/clip.mp4"
+            with av.open(path, 'w') as container:
+                stream = container.add_stream('mpeg4', rate=30)
+                stream.width, stream.height, stream.pix_fmt = 64, 48, 'yuv420p'
+                frame = av.VideoFrame.from_ndarray(np.zeros((48, 64, 3), dtype=np.uint8), format="bgr24")
+                for _ in range(20):
+                    for packet in stream.encode(frame):
+                        container.mux(packet)
+                for packet in stream.encode():
+                    container.mux(packet)
+            
+            cache = LandmarkCache(f"{directory}/cache")
+            first = cache.extract(path, ReplayBackend(landmarks))
+            backend = ReplayBackend(landmarks)
+            second = cache.extract(path, backend)
+            if backend.index != 0 or not isinstance(second['landmarks'], np.memmap):
+                print("❌ Cache hit ran inference or was not memory-mapped")
+                return False
+            if not np.array_equal(first['landmarks'], second['landmarks'], equal_nan=True):
+                print("❌ Cached landmarks differ from the extracted ones")
+                return False
+            
+            # Another backend configuration is another entry; the cache only fits one
+            cache.max_bytes = cache.stats()['bytes']
+            cache.extract(path, ReplayBackend(landmarks[:-1]))
+            stats = cache.stats()
+            if (stats['hits'], stats['misses'], stats['entries']) != (1, 2, 1):
+                print(f"❌ Unexpected cache counters: {stats}")
+                return False
+        
+        print("✅ Landmark cache working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import landmark_cache: {e}")
+        return False
+
+def test_peak_rep_counter():
+    """Test that the peak counter counts partial reps and ignores jitter around a threshold"""
+    try:
+        import numpy as np
+        from offline_analysis import analyze_landmarks
+        from rep_counter import PeakRepCounter, create_rep_counter
+        from synthetic_landmarks import generate_sequence
+        
+        # Squats that stop well above 90 degrees never reach the 'down' state
+        sequence = generate_sequence('squat', reps=5, range_of_motion=0.6, noise=0.004, seed=0)
+        counts = {method: analyze_landmarks(sequence['landmarks'], sequence['timestamps'], 'squat',
+                                            method=method)['rep_count']
+                  for method in ('threshold', 'peaks')}
+        if counts['peaks'] != 5 or counts['threshold'] >= 5:
+            print(f"❌ Partial reps miscounted: {counts}")
+            return False
+        
+        # Noise of +-10 degrees around the 'down' threshold is not a rep
+        class Angle:
+            def __init__(self, value):
+                self.value = value
+            
+            def get(self, name):
+                return self.value
+        
+        counter = PeakRepCounter('avg_leg_angle')
+        rng = np.random.default_rng(0)
+        for i in range(300):
+            counter.update('down', i / 30, features=Angle(90 + rng.uniform(-10, 10)))
+        if counter.rep_count != 0:
+            print(f"❌ Jitter counted as {counter.rep_count} reps")
+            return False
+        
+        # Switching method keeps the reps counted so far
+        counter.rep_count = counter.total_reps = 3
+        switched = create_rep_counter('squat', 'threshold', previous=counter)
+        if (switched.rep_count, switched.total_reps) != (3, 3):
+            print("❌ Switching the counting method lost the rep totals")
+            return False
+        
+        print("✅ Peak rep counter working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import rep_counter: {e}")
+        return False
+
+def test_landmark_predictor():
+    """Test that the predictor extrapolates moving landmarks and stops without a person"""
+    try:
+        import numpy as np
+        from landmark_predictor import LandmarkPredictor
+        
+        # A pose sliding right at 0.3 per second, measured at 30 fps
+        pose = np.full((33, 4), 0.5, dtype=np.float32)
+        pose[:, 3] = 1.0
+        predictor = LandmarkPredictor()
+        for i in range(30):
+            pose[:, 0] = 0.2 + 0.3 * i / 30
+            predictor.update(pose, i / 30)
+        predicted = predictor.predict(29 / 30 + 0.1)
+        expected = 0.2 + 0.3 * (29 / 30 + 0.1)
+        if abs(predicted[0, 0] - expected) > 0.005 or abs(predicted[0, 1] - 0.5) > 0.001:
+            print(f"❌ Predicted x {predicted[0, 0]:.3f}, expected {expected:.3f}")
+            return False
+        
+        # Nobody detected: nothing to extrapolate until the next measurement, which continues the track
+        predictor.update(None, 1.0)
+        if predictor.predict(1.05) is not None or predictor.tracking:
+            print("❌ Predictor kept a pose after the person was lost")
+            return False
+        pose[:, 0] = 0.2 + 0.3 * 1.1
+        predictor.update(pose, 1.1)
+        predicted = predictor.predict(1.2)
+        if predicted is None or abs(predicted[0, 0] - (0.2 + 0.3 * 1.2)) > 0.005:
+            print("❌ Predictor did not continue its track after a missed frame")
+            return False
+        
+        # Noisy measurements of a still pose are drawn closer to it than measured
+        rng = np.random.default_rng(0)
+        still = LandmarkPredictor()
+        errors, noise = [], []
+        for i in range(90):
+            measured = pose.copy()
+            measured[:, :3] += rng.normal(0, 0.005, (33, 3))
+            still.update(measured, i / 30)
+            errors.append(np.abs(still.predict(i / 30 + 0.1)[:, :2] - pose[:, :2]).mean())
+            noise.append(np.abs(measured[:, :2] - pose[:, :2]).mean())
+        if np.mean(errors[30:]) > np.mean(noise[30:]):
+            print(f"❌ Still pose predicted {np.mean(errors[30:]):.4f} off, measured {np.mean(noise[30:]):.4f} off")
+            return False
+        
+        print("✅ Landmark predictor working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import landmark_predictor: {e}")
+        return False
+
+def test_event_bus():
+    """Test that publishing events does not wait for slow subscribers"""
+    try:
+        import time
+        import threading
+        from event_bus import EventBus, RepCompleted
+        
+        bus = EventBus(max_queue=8, interval=0.01)
+        received = []
+        release = threading.Event()
+        bus.subscribe(received.extend, kinds=['rep_completed'], name='fast')
+        slow = bus.subscribe(lambda events: release.wait(5), name='slow')
+        
+        start = time.perf_counter()
+        for rep in range(1, 21):
+            bus.publish(RepCompleted('s1', 'squat', rep * 2.0, time.time(), rep, rep, 100))
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.05:
+            print(f"❌ Publishing 20 events took {elapsed * 1000:.1f} ms")
+            return False
+        
+        deadline = time.time() + 2
+        while len(received) < 8 and time.time() < deadline:
+            time.sleep(0.01)
+        if [event.rep for event in received][-1:] != [20]:
+            print(f"❌ Fast subscriber received {[event.rep for event in received]}")
+            return False
+        if slow.stats()['dropped'] == 0:
+            print("❌ Slow subscriber's bounded queue did not drop events")
+            return False
+        
+        release.set()
+        bus.close()
+        
+        # A close() that times out leaves the sink to the delivery thread, which closes it after its last batch
+        class SlowSink:
+            def __init__(self):
+                self.events = []
+                self.closed = False
+                self.late = False
+            def __call__(self, events):
+                time.sleep(0.2)
+                self.late |= self.closed
+                self.events.extend(events)
+            def close(self):
+                self.closed = True
+        sink = SlowSink()
+        subscription = EventBus(interval=0.01).subscribe(sink)
+        subscription.offer(RepCompleted('s1', 'squat', 2.0, time.time(), 1, 1, 100))
+        time.sleep(0.05)
+        subscription.offer(RepCompleted('s1', 'squat', 4.0, time.time(), 2, 2, 100))
+        subscription.close(timeout=0.01)
+        if sink.closed:
+            print("❌ Sink was closed while its delivery thread was still flushing")
+            return False
+        subscription.thread.join(2)
+        if not sink.closed or sink.late or len(sink.events) != 2:
+            print(f"❌ Sink closed {sink.closed}, late delivery {sink.late}, {len(sink.events)} events")
+            return False
+        print("✅ Event bus working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import event_bus: {e}")
+        return False
+
+def test_frame_pool():
+    """Test that pooled output frames are reused and written through their views"""
+    try:
+        import numpy as np
+        from frame_pool import FramePool
+        
+        pool = FramePool(size=4)
+        frames = [pool.acquire(64, 48)[0] for _ in range(8)]
+        if pool.allocations != 4 or frames[4] is not frames[0] or len({id(f) for f in frames}) != 4:
+            print(f"❌ Pool allocated {pool.allocations} frames for 8 acquires at one size")
+            return False
+        
+        # A new resolution replaces the whole pool
+        frame, view = pool.acquire(80, 60)
+        if pool.allocations != 8 or (frame.width, frame.height) != (80, 60) or view.shape != (60, 80, 3):
+            print("❌ Pool did not reallocate on a resolution change")
+            return False
+        
+        # Drawing into the view fills the frame itself
+        view[:] = 0
+        view[10:20, 30:40] = (255, 128, 0)
+        pixels = frame.to_ndarray(format="bgr24")
+        if not np.array_equal(pixels, view) or tuple(pixels[15, 35]) != (255, 128, 0):
+            print("❌ View writes did not land in the video frame")
+            return False
+        
+        print("✅ Frame pool working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import frame_pool: {e}")
+        return False
+
+def test_stream_constraint_planner():
+    """Test that the capture profile steps with the load, holds between steps and respects the ceiling"""
+    try:
+        from stream_constraints import StreamConstraintPlanner
+        
+        now = [0.0]
+        load = [0.0]
+        planner = StreamConstraintPlanner(inference_width=256, cores=1, hold_seconds=10.0, window_seconds=2.0,
+                                          wall_clock=lambda: now[0], load_average=lambda: load[0])
+        
+        def step_at(time, load_average, busy=0.0, recording_width=None):
+            now[0] = time
+            load[0] = load_average
+            planner.report(busy)
+            return planner.update(recording_width)
+        
+        # Without recording the ceiling is 2.5x the 256 px model input: 640x360
+        if planner.profile() != (640, 360, 30) or planner.profile(1280) != (1280, 720, 30):
+            print(f"❌ Wrong ceilings: {planner.profile()}, {planner.profile(1280)}")
+            return False
+        # Loaded, but neither a full window nor hold_seconds have passed
+        if step_at(1.0, 1.0) != 0 or step_at(3.0, 1.0) != 0:
+            print("❌ Planner stepped down before hold_seconds")
+            return False
+        # Frame processing alone (1.8 s busy in 2 s on one core) counts as load
+        if step_at(8.5, 0.0) != 0 or step_at(10.5, 0.0, busy=1.8) != 1 or planner.profile() != (480, 270, 20):
+            print(f"❌ Planner did not step down under load: {planner.stats()}")
+            return False
+        if step_at(12.5, 1.0) != 1 or step_at(21.0, 1.0) != 2 or step_at(31.0, 1.0) != 2:
+            print(f"❌ Planner should step once per hold and stop at the cheapest profile: {planner.stats()}")
+            return False
+        # A recording raises the ceiling, so the same load can take the step further
+        if step_at(33.0, 1.0, recording_width=1280) != 3 or planner.profile(1280) != (480, 270, 20):
+            print(f"❌ Recording ceiling not applied: {planner.stats()}")
+            return False
+        # Between low_load and high_load nothing changes; below low_load it steps back up
+        if step_at(45.0, 0.7, recording_width=1280) != 3 or step_at(47.0, 0.2, recording_width=1280) != 2:
+            print(f"❌ Planner hysteresis wrong: {planner.stats()}")
+            return False
+        if planner.profile(1280) != (640, 360, 30) or planner.stats()['changes'] != 4:
+            print(f"❌ Unexpected profile after stepping up: {planner.stats()}")
+            return False
+        
+        print("✅ Stream constraint planner working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import stream_constraints: {e}")
+        return False
+
+def test_frame_drop_policy():
+    """Test which queued frames each drop policy processes and how drops are counted"""
+    try:
+        from fractions import Fraction
+        from types import SimpleNamespace
+        from frame_policy import FrameDropPolicy
+        
+        def batch(first, count, fps=30):
+            return [SimpleNamespace(pts=i, time_base=Fraction(1, fps)) for i in range(first, first + count)]
+        
+        # Five frames arriving together: drop_oldest keeps the newest two
+        policy = FrameDropPolicy('drop_oldest', max_queue=2, wall_clock=lambda: 10.0)
+        frames = batch(0, 5)
+        if policy.select(frames) != frames[-2:] or policy.stats()['dropped'] != 3:
+            print("❌ drop_oldest did not keep the newest frames")
+            return False
+        
+        # drop_newest keeps arrival order but still ends on the newest frame
+        policy = FrameDropPolicy('drop_newest', max_queue=2, wall_clock=lambda: 10.0)
+        frames = batch(0, 5)
+        if policy.select(frames) != [frames[0], frames[-1]]:
+            print("❌ drop_newest did not keep the oldest frame and the newest one")
+            return False
+        
+        # Decimating 30 fps to 15 fps analyzes every other frame
+        now = [10.0]
+        policy = FrameDropPolicy('decimate', max_queue=8, target_fps=15, wall_clock=lambda: now[0])
+        frames = batch(0, 4)
+        if policy.select(frames) != [frames[0], frames[2], frames[3]] or policy.newest_due:
+            print("❌ decimate did not thin the batch to 15 fps")
+            return False
+        # A single frame that is not due is still returned for display, counted as dropped
+        now[0] += 1 / 30
+        frames = batch(4, 1)
+        if policy.select(frames) != frames or not policy.newest_due:
+            print("❌ decimate did not analyze a due frame")
+            return False
+        now[0] += 1 / 30
+        frames = batch(5, 1)
+        if policy.select(frames) != frames or policy.newest_due:
+            print("❌ decimate returned no frame to display")
+            return False
+        stats = policy.stats()
+        if (stats['received'], stats['dropped'], stats['late']) != (6, 3, 0):
+            print(f"❌ decimate counted {stats}")
+            return False
+        
+        # Frames queued more than max_latency behind the live stream are late
+        now = [0.0]
+        policy = FrameDropPolicy('drop_oldest', max_queue=8, max_latency=0.25, wall_clock=lambda: now[0])
+        policy.select(batch(0, 1))
+        now[0] = 1.0
+        frames = batch(15, 16)
+        kept = policy.select(frames)
+        stats = policy.stats()
+        if kept[-1] is not frames[-1] or stats['late'] != 8 or len(kept) != 8:
+            print(f"❌ Late frames were not dropped: kept {len(kept)}, {stats}")
+            return False
+        
+        print("✅ Frame drop policy working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import frame_policy: {e}")
+        return False
+
+def test_load_test_capacity():
+    """Test the load generator's capacity search on replayed landmarks"""
+    try:
+        import os
+        import tempfile
+        from types import SimpleNamespace
+        import numpy as np
+        from load_test import find_capacity, load_images, run_step
+        from synthetic_landmarks import generate_sequence
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'squat.npy')
+            np.save(path, generate_sequence('squat', reps=2)['landmarks'])
+            args = SimpleNamespace(backend=f'replay:path={path},loop=True', fps=20.0, seconds=0.5)
+            images = load_images(max_frames=10, width=160, height=120)
+            capacity, steps = find_capacity([1], lambda k: run_step(k, args, images, None), args.fps)
+        if capacity != 1 or steps[0]['achieved_fps'] < 0.8 * args.fps or steps[0]['drop_rate'] > 0.2:
+            print(f"❌ One replayed session did not keep up: {steps}")
+            return False
+        
+        # The ramp stops at the first step below the collapse threshold
+        fps = {1: 30.0, 2: 29.0, 4: 20.0, 8: 10.0}
+        ran = []
+        def step(sessions):
+            ran.append(sessions)
+            return {'sessions': sessions, 'achieved_fps': fps[sessions]}
+        capacity, steps = find_capacity([1, 2, 4, 8], step, 30.0, collapse=0.8)
+        if capacity != 2 or ran != [1, 2, 4] or len(steps) != 3:
+            print(f"❌ Capacity search found {capacity} after running {ran}")
+            return False
+        
+        print("✅ Load test capacity search working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import load_test: {e}")
+        return False
+
+def test_accuracy_metrics():
+    """Test rep matching and bottom latency of the accuracy harness on hand-built states"""
+    try:
+        import json
+        import os
+        import tempfile
+        import numpy as np
+        from benchmarks.bench_accuracy import bottom_latencies, find_items, load_item, match_reps
+        
+        # Two labeled reps; the first is counted late, the second early, a stray count before the first
+        errors = match_reps([0.5, 2.2, 3.8], starts=[1.0, 3.0], ends=[2.0, 4.0], tolerance=0.5)
+        if np.round(errors, 3).tolist() != [0.2, -0.2]:
+            print(f"❌ match_reps returned {errors}")
+            return False
+        # A count past the tolerance matches nothing
+        if match_reps([2.6], [1.0], [2.0], tolerance=0.5) != []:
+            print("❌ match_reps matched a count beyond the tolerance")
+            return False
+        
+        # Ten frames per second, one rep from 0.0 s to 0.9 s with its labeled bottom at 0.4 s
+        timestamps = np.arange(10) / 10
+        squat = ['up', 'up', 'ready', 'down', 'down', 'down', 'ready', 'up', 'up', 'up']
+        curl = ['down', 'down', 'ready', 'ready', 'ready', 'up', 'up', 'ready', 'down', 'down']
+        for states, expected in ((squat, -0.1), (curl, 0.1)):
+            latencies = bottom_latencies(states, timestamps, [0.0], [0.9], [0.4])
+            if len(latencies) != 1 or abs(latencies[0] - expected) > 1e-9:
+                print(f"❌ Bottom latency {latencies}, expected {expected}")
+                return False
+        # A rep that never reaches its bottom state has no latency
+        if bottom_latencies(['up'] * 10, timestamps, [0.0], [0.9], [0.4]) != []:
+            print("❌ Bottom latency reported for a rep without a bottom")
+            return False
+        
+        # The exercise comes from the label file, else from the recording itself
+        with tempfile.TemporaryDirectory() as directory:
+            landmarks = np.zeros((10, 33, 4), dtype=np.float32)
+            np.savez(os.path.join(directory, 'stored.npz'), landmarks=landmarks, exercise='curl')
+            np.savez(os.path.join(directory, 'labeled.npz'), landmarks=landmarks)
+            with open(os.path.join(directory, 'labeled.json'), 'w') as f:
+                json.dump({'exercise': 'squat', 'reps': [[0.0, 0.2]]}, f)
+            np.savez(os.path.join(directory, 'unknown.npz'), landmarks=landmarks)
+            items = {item['name']: item for item in find_items(directory)}
+            exercises = [load_item(items[name], 'replay')[2] for name in ('stored.npz', 'labeled.npz')]
+            if exercises != ['curl', 'squat']:
+                print(f"❌ Recordings loaded as {exercises}")
+                return False
+            try:
+                load_item(items['unknown.npz'], 'replay')
+                print("❌ A recording without an exercise should be refused")
+                return False
+            except ValueError as e:
+                if 'unknown.npz' not in str(e):
+                    print(f"❌ Error does not name the recording: {e}")
+                    return False
+        
+        print("✅ Accuracy metrics working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import bench_accuracy: {e}")
+        return False
+
+def test_threshold_tuner():
+    """Test that the threshold tuner scores candidates with the current configuration first"""
+    try:
+        from benchmarks.bench_accuracy import synthetic_items
+        from benchmarks.tune_thresholds import (
+            evaluate_chunk,
+            grid_candidates,
+            pareto_front,
+            prepare_item,
+            summarize_candidates
+        )
+        from exercise_utils import BATCH_STATE_RULES
+        from rep_counter import RepCounter
+        
+        item = prepare_item(next(item for item in synthetic_items(1) if item['exercise'] == 'squat'))
+        candidates = grid_candidates('squat', step=15.0)
+        _, low, _, high, _ = BATCH_STATE_RULES['squat']
+        if candidates[0] != (low, high, RepCounter().min_rep_interval):
+            print(f"❌ Current configuration is not the first candidate: {candidates[0]}")
+            return False
+        
+        totals = evaluate_chunk(('squat', candidates, [item]))
+        results = summarize_candidates(candidates, totals, 1)
+        current = results[0]
+        if (current['low'], current['high']) != (low, high) or current['rep_mae'] > 1:
+            print(f"❌ Current configuration scored as {current}")
+            return False
+        
+        # Each step along the front trades rep-count accuracy for earlier rep boundaries
+        front = pareto_front(results)
+        rep_maes = [result['rep_mae'] for result in front]
+        boundaries = [result['boundary_mae_ms'] for result in front]
+        if (not front or rep_maes != sorted(rep_maes) or boundaries != sorted(boundaries, reverse=True)
+                or len(set(boundaries)) != len(boundaries)):
+            print(f"❌ Pareto front is not monotone: {list(zip(rep_maes, boundaries))}")
+            return False
+        scored = [{'rep_mae': mae, 'boundary_mae_ms': boundary}
+                  for mae, boundary in [(0.5, 250), (0.0, 300), (1.0, None), (0.0, 200), (2.0, 50), (1.0, 100)]]
+        front = [(result['rep_mae'], result['boundary_mae_ms']) for result in pareto_front(scored)]
+        if front != [(0.0, 200), (1.0, 100), (2.0, 50)]:
+            print(f"❌ Unexpected Pareto front: {front}")
+            return False
+        
+        print("✅ Threshold tuner working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import tune_thresholds: {e}")
+        return False
+
+def test_session_recorder():
+    """Test that recorded frames can be read back and the temporary file is cleaned up"""
+    try:
+        import gc
+        import os
+        import av
+        import numpy as np
+        from session_recorder import RecordingFile, SessionRecorder
+        
+        recording_file = RecordingFile()
+        recorder = SessionRecorder(recording_file.path, width=160, fps=10.0, max_queue=16)
+        image = np.zeros((120, 200, 3), dtype=np.uint8)
+        for i in range(10):
+            image[:] = i * 20
+            recorder.submit(image, i / 10)
+        path = recorder.close()
+        if recorder.error or recorder.stats()['recorded'] != 10:
+            print(f"❌ Recorder wrote {recorder.stats()} ({recorder.error})")
+            return False
+        
+        with av.open(path) as container:
+            frames = [frame.to_ndarray(format="bgr24") for frame in container.decode(video=0)]
+        if len(frames) != 10 or frames[0].shape != (96, 160, 3) or abs(int(frames[-1].mean()) - 180) > 8:
+            print(f"❌ Read back {len(frames)} frames of {frames[0].shape if frames else None}")
+            return False
+        
+        # The file goes away with its owner, e.g. when the browser session ends
+        del recording_file
+        gc.collect()
+        if os.path.exists(path):
+            print("❌ Recording file was not deleted with its session")
+            return False
+        
+        print("✅ Session recorder working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import session_recorder: {e}")
+        return False
+
+def test_downsampled_series():
+    """Test that downsampled series stay bounded, keep extremes and fetch incrementally"""
+    try:
+        from timeseries import DownsampledSeries, apply_updates, drawn_points
+        
+        series = DownsampledSeries(capacity=16)
+        drawn = {}
+        cursor = 0
+        redraws = 0
+        for i in range(1000):
+            # A sawtooth with one spike that must survive every merge
+            series.append(i / 30, 500.0 if i == 613 else float(i % 50))
+            if i % 7 == 0:
+                updates, cursor = series.new_points(cursor)
+                redraws += apply_updates(drawn, updates)
+        updates, cursor = series.new_points(cursor)
+        redraws += apply_updates(drawn, updates)
+        
+        if len(series.buckets) >= 16 or series.samples != 1000:
+            print(f"❌ Series kept {len(series.buckets)} buckets")
+            return False
+        values = [value for _, value in series.points()]
+        if max(values) != 500.0 or min(values) != 0.0:
+            print("❌ Downsampling lost the minimum or maximum")
+            return False
+        
+        # Fetching as the chart does ends with every closed bucket's points, merged ones replaced
+        closed = [point for bucket in series.buckets for point in series._bucket_points(bucket)]
+        if drawn_points(drawn) != closed or redraws == 0:
+            print(f"❌ Incremental fetches drew {len(drawn_points(drawn))} points, expected {len(closed)}")
+            return False
+        if series.new_points(cursor) != ([], cursor):
+            print("❌ Nothing new should be returned for the latest cursor")
+            return False
+        
+        print("✅ Downsampled series working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import timeseries: {e}")
+        return False
+
+def test_client_pose_protocol():
+    """Test the browser landmark uplink: encoding, validation and duplicate batches"""
+    try:
+        import base64
+        import numpy as np
+        from client_pose import LandmarkSession, decode_batch, encode_batch
+        from synthetic_landmarks import generate_sequence
+        
+        # Round trip, with a frame where nobody was detected and big-endian input
+        sequence = generate_sequence('squat', reps=2)
+        landmarks = sequence['landmarks'][:8].astype('>f4')
+        landmarks[3] = np.nan
+        message = encode_batch(sequence['timestamps'][:8], landmarks, seq=1, session='a')
+        raw = np.frombuffer(base64.b64decode(message['landmarks']), dtype='<f4')
+        timestamps, decoded = decode_batch(message)
+        if (raw.size != 8 * 33 * 4 or decoded.shape != (8, 33, 4) or decoded.dtype != np.float32
+                or not np.isnan(decoded[3]).all()
+                or not np.array_equal(np.delete(decoded, 3, 0), np.delete(landmarks, 3, 0).astype(np.float32))
+                or not np.allclose(timestamps, sequence['timestamps'][:8])):
+            print("❌ Landmark batch did not survive the round trip")
+            return False
+        
+        # A batch whose landmark bytes do not match its timestamps is rejected
+        truncated = dict(message, timestamps=message['timestamps'][:7])
+        try:
+            decode_batch(truncated)
+            print("❌ Batch with the wrong length was accepted")
+            return False
+        except ValueError:
+            pass
+        
+        # A batch delivered twice is analyzed once; a restarted component starts its numbering over
+        session = LandmarkSession('squat')
+        first = encode_batch(sequence['timestamps'][:30], sequence['landmarks'][:30], seq=1, session='a')
+        if session.receive(first) != 30 or session.receive(first) != 0 or session.stats()['frames'] != 30:
+            print(f"❌ Duplicate batch was analyzed again: {session.stats()}")
+            return False
+        restarted = encode_batch(sequence['timestamps'][30:40], sequence['landmarks'][30:40], seq=1, session='b')
+        if session.receive(restarted) != 10 or session.stats()['batches'] != 2:
+            print("❌ Batch from a restarted component was ignored")
+            return False
+        
+        print("✅ Browser landmark protocol working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import client_pose: {e}")
+        return False
+
+def test_sampling_profiler():
+    """Test that the sampling profiler finds the function a busy thread spends its time in"""
+    try:
+        import json
+        import tempfile
+        import threading
+        import time
+        from profiler import SamplingProfiler
+        
+        def spin_in_test_function(stop):
+            while not stop.is_set():
+                sum(i * i for i in range(1000))
+        
+        stop = threading.Event()
+        worker = threading.Thread(target=spin_in_test_function, args=(stop,))
+        worker.start()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                profiler = SamplingProfiler(worker.ident, duration=0.3, interval=0.005, output_dir=directory,
+                                            tag='busy', metadata={'session': 'test'}).start()
+                while profiler.running:
+                    time.sleep(0.01)
+                paths = profiler.paths
+                with open(paths['collapsed']) as f:
+                    lines = f.read().splitlines()
+                with open(paths['stats']) as f:
+                    stats = json.load(f)
+        finally:
+            stop.set()
+            worker.join()
+        
+        counts = [int(line.rsplit(' ', 1)[1]) for line in lines]
+        if not lines or sum(counts) != profiler.samples or profiler.samples < 10:
+            print(f"❌ Collapsed stacks hold {sum(counts)} of {profiler.samples} samples")
+            return False
+        if not all('spin_in_test_function' in line for line in lines):
+            print("❌ Collapsed stacks do not run through the busy function")
+            return False
+        busy = [entry for entry in stats['functions'] if 'spin_in_test_function' in entry['function']]
+        if (stats['session'] != 'test' or stats['samples'] != profiler.samples or not busy
+                or max(entry['total_percent'] for entry in busy) < 99):
+            print(f"❌ Profile stats are wrong: {busy}")
+            return False
+        
+        print("✅ Sampling profiler working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import profiler: {e}")
+        return False
+
+def test_multi_camera():
+    """Test landmark fusion, view alignment, frame pairing and a fused replay of two camera files"""
+    try:
+        import os
+        import tempfile
+        from collections import deque
+        import numpy as np
+        from multi_camera import (AffineAligner, CameraResult, CameraWorker, MultiCameraFusion,
+                                  allowed_sources, fuse_landmarks)
+        from pose_backends import ReplayBackend
+        from session_recorder import SessionRecorder
+        from synthetic_landmarks import generate_sequence
+        
+        if allowed_sources(" 0, /srv/left.mp4 ,, ") != ['0', '/srv/left.mp4'] or allowed_sources("") != []:
+            print("❌ Camera source allowlist parsed wrongly")
+            return False
+        
+        # Visibility-weighted mean; a landmark one camera cannot see comes from the other
+        front = np.zeros((33, 4), dtype=np.float32)
+        front[:, :3], front[:, 3] = 0.2, 1.0
+        side = front.copy()
+        side[:, :3] = 0.4
+        side[5, 3] = 0.0
+        fused, confidence = fuse_landmarks([(front, 1.0), (side, 1.0), (None, 0.0)])
+        if not (np.allclose(fused[0, :3], 0.3) and np.allclose(fused[5, :3], 0.2) and confidence == 1.0):
+            print(f"❌ Fused landmarks wrong: {fused[0]}, {fused[5]}")
+            return False
+        if fuse_landmarks([(None, 0.0), (None, 0.0)]) != (None, 0.0):
+            print("❌ Fusing views without detections should give nothing")
+            return False
+        
+        # Two synthetic views of the same squat, the second shifted and scaled in its image
+        landmarks = generate_sequence('squat', reps=2, noise=0.0, dropout=0.0, seed=0)['landmarks'][:40]
+        landmarks[:, :, 3] = 1.0
+        matrix = np.array([[0.8, 0.1], [-0.05, 0.9], [0.1, -0.05]])
+        other = landmarks.copy()
+        other[:, :, :2] = (np.c_[landmarks.reshape(-1, 4)[:, :2], np.ones(len(landmarks) * 33)]
+                           @ matrix).reshape(len(landmarks), 33, 2)
+        aligner = AffineAligner()
+        for reference, view in zip(landmarks, other):
+            aligner.update(reference, view)
+        error = np.abs(aligner.apply(other[-1])[:, :2] - landmarks[-1, :, :2]).max()
+        if error > 1e-3:
+            print(f"❌ Aligned view is {error:.4f} off the reference")
+            return False
+        
+        # The nearest result within the tolerance is paired; none beyond it
+        worker = CameraWorker(1, 'side.mp4', None, None)
+        worker.results = deque(CameraResult(1, t, None, 0.0, None, 0.0) for t in (0.0, 0.033, 0.066, 0.1))
+        paired = worker.take(0.04, 0.02)
+        if paired is None or paired.timestamp != 0.033 or worker.take(0.2, 0.05) is not None:
+            print(f"❌ Frame pairing wrong: {paired}")
+            return False
+        
+        with tempfile.TemporaryDirectory() as directory:
+            sources = []
+            for name in ('front', 'side'):
+                recorder = SessionRecorder(os.path.join(directory, f'{name}.mp4'), width=64, fps=30.0,
+                                           max_queue=64)
+                for i in range(len(landmarks)):
+                    recorder.submit(np.full((48, 64, 3), i, dtype=np.uint8), i / 30)
+                sources.append(recorder.close())
+            backends = iter([ReplayBackend(landmarks), ReplayBackend(other)])
+            fusion = MultiCameraFusion(sources, backend_factory=lambda: next(backends))
+            fusion.run()
+            stats = fusion.stats()
+            if stats['fused'] != len(landmarks) or stats['missing_views'] != 0:
+                print(f"❌ Fused {stats['fused']} of {len(landmarks)} frame pairs: {stats}")
+                return False
+            error = np.abs(fusion.latest.landmarks[:, :2] - landmarks[-1, :, :2]).max()
+            if error > 0.01:
+                print(f"❌ Fused skeleton is {error:.4f} off the reference view")
+                return False
+            fusion.stop()
+            
+            # Nobody touched the fusion within the idle timeout: it stops and closes its cameras
+            fusion = MultiCameraFusion(sources, backend_factory=lambda: ReplayBackend(landmarks), idle_timeout=0.0)
+            fusion.run()
+            if not fusion.stopped or any(worker.thread.is_alive() for worker in fusion.workers):
+                print("❌ Idle fusion kept its cameras running")
+                return False
+        
+        print("✅ Multi-camera fusion working correctly")
+        return True
+        
+    except ImportError as e:
+        print(f"❌ Failed to import multi_camera: {e}")
+        return False
+
 def test_mediapipe_pose():
     """Test that MediaPipe pose detection can be initialized"""
     try:
@@ -110,6 +1304,30 @@ def main():
     tests = [
         ("Package Imports", test_imports),
         ("Exercise Utilities", test_exercise_utils),
+        ("Exercise Recognition", test_exercise_recognition),
+        ("Rep Counter", test_rep_counter),
+        ("Pose Backends", test_pose_backends),
+        ("Thread Budget", test_thread_budget),
+        ("Synthetic Landmarks", test_synthetic_landmarks),
+        ("Keyframes", test_keyframes),
+        ("Exercise Registry", test_exercise_registry),
+        ("Landmark Gateway", test_landmark_gateway),
+        ("Memory Budget", test_memory_budget),
+        ("Landmark Cache", test_landmark_cache),
+        ("Peak Rep Counter", test_peak_rep_counter),
+        ("Landmark Predictor", test_landmark_predictor),
+        ("Event Bus", test_event_bus),
+        ("Frame Pool", test_frame_pool),
+        ("Stream Constraint Planner", test_stream_constraint_planner),
+        ("Frame Drop Policy", test_frame_drop_policy),
+        ("Load Test Capacity", test_load_test_capacity),
+        ("Accuracy Metrics", test_accuracy_metrics),
+        ("Threshold Tuner", test_threshold_tuner),
+        ("Session Recorder", test_session_recorder),
+        ("Downsampled Series", test_downsampled_series),
+        ("Browser Landmark Protocol", test_client_pose_protocol),
+        ("Sampling Profiler", test_sampling_profiler),
+        ("Multi-Camera Fusion", test_multi_camera),
         ("MediaPipe Pose", test_mediapipe_pose),
     ]
     
@@ -0,0 +1,180 @@
+import inspect
+import os
+import threading
+from functools import partial
+
+import cv2
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+# Held while a lease creates a backend: the new native threads are found by diffing
+# /proc/self/task, so no other lease of any manager may start threads meanwhile
+_creation_lock = threading.Lock()
+
+def available_cores():
+    """CPU ids this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def accepts_threads(factory):
+    """Whether factory takes a threads= argument, like OnnxRuntimeBackend."""
+    try:
+        return 'threads' in inspect.signature(factory).parameters
+    except (TypeError, ValueError):
+        return False
+
+def native_thread_ids():
+    """Kernel ids of all threads in this process (Linux only, empty elsewhere)."""
+    try:
+        return {int(tid) for tid in os.listdir('/proc/self/task')}
+    except OSError:
+        return set()
+
+class ThreadLease:
+    """One session's share of the host's cores, handed out by ThreadBudgetManager."""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.cpus = ()
+        self.inference_threads = 1
+        self.thread_ids = set()
+
+    def create(self, factory):
+        """Call factory() (e.g. a pose backend constructor) with this lease's budget applied.
+
+        Factories that take threads= (e.g. OnnxRuntimeBackend) are given the lease's
+        inference thread count. Native threads started by the factory inherit this
+        lease's CPU set and are re-pinned whenever the budget changes.
+        """
+        if accepts_threads(factory):
+            factory = partial(factory, threads=self.inference_threads)
+        with _creation_lock, self.manager.lock:
+            thread_id = threading.get_native_id()
+            previous = self.manager.get_affinity(thread_id)
+            before = native_thread_ids()
+            self.manager.set_affinity(thread_id, self.cpus)
+            try:
+                result = factory()
+            finally:
+                self.manager.set_affinity(thread_id, previous)
+            self.thread_ids |= native_thread_ids() - before
+        return result
+
+    def bind_current_thread(self):
+        """Pin the calling thread (e.g. the frame processing thread) to this lease's CPUs."""
+        thread_id = threading.get_native_id()
+        with self.manager.lock:
+            self.thread_ids.add(thread_id)
+            self.manager.set_affinity(thread_id, self.cpus)
+
+    def release(self):
+        """Return the cores to the manager so the remaining sessions can use them."""
+        self.manager.release(self)
+
+class ThreadBudgetManager:
+    """Split the host's cores between concurrent PoseTransformer sessions.
+
+    With many sessions per host, inference threads, OpenCV's thread pool and
+    BLAS threads oversubscribe the cores and tail latency explodes. Each
+    session gets a lease with an equal slice of the cores; its inference
+    threads are sized and (optionally) pinned to that slice, and the
+    process-wide OpenCV and BLAS pools are shrunk to match. Everything is
+    rebalanced whenever a session joins or leaves.
+    """
+
+    def __init__(self, cores=None, reserved_cores=0, pin_affinity=True):
+        self.cores = list(cores) if cores is not None else available_cores()
+        self.reserved_cores = reserved_cores
+        self.pin_affinity = pin_affinity and hasattr(os, 'sched_setaffinity')
+        self.lock = threading.RLock()
+        self.leases = []
+        # Process-wide settings to restore once the last session has left
+        self.default_opencv_threads = cv2.getNumThreads()
+        self.opencv_threads = self.default_opencv_threads
+        self._blas_limits = None
+
+    @property
+    def usable_cores(self):
+        return self.cores[self.reserved_cores:] or self.cores
+
+    def budget(self, sessions=None):
+        """Threads per session for a given number of active sessions."""
+        sessions = max(sessions if sessions is not None else len(self.leases), 1)
+        per_session = max(len(self.usable_cores) // sessions, 1)
+        return {
+            'sessions': sessions,
+            'inference_threads': per_session,
+            'opencv_threads': per_session,
+            'blas_threads': per_session
+        }
+
+    def acquire(self):
+        """Register a new session and return its lease."""
+        with self.lock:
+            lease = ThreadLease(self)
+            self.leases.append(lease)
+            self.rebalance()
+            return lease
+
+    def release(self, lease):
+        with self.lock:
+            if lease in self.leases:
+                self.leases.remove(lease)
+                self.rebalance()
+
+    def rebalance(self):
+        """Recompute every lease's CPU slice and apply the process-wide thread limits."""
+        with self.lock:
+            if not self.leases:
+                self.restore_defaults()
+                return
+            budget = self.budget()
+            cores = self.usable_cores
+            size = budget['inference_threads']
+            for i, lease in enumerate(self.leases):
+                start = (i * size) % len(cores)
+                lease.cpus = tuple(cores[(start + j) % len(cores)] for j in range(size))
+                lease.inference_threads = size
+                alive = native_thread_ids()
+                if alive:
+                    lease.thread_ids &= alive
+                for thread_id in lease.thread_ids:
+                    self.set_affinity(thread_id, lease.cpus)
+
+            # OpenCV's pool is process wide; a value of 1 disables its threading
+            self.opencv_threads = budget['opencv_threads']
+            cv2.setNumThreads(self.opencv_threads)
+            if threadpool_limits is not None:
+                if self._blas_limits is not None:
+                    self._blas_limits.restore_original_limits()
+                self._blas_limits = threadpool_limits(limits=budget['blas_threads'], user_api='blas')
+
+    def restore_defaults(self):
+        """Give OpenCV and BLAS back the thread counts they had before the first session."""
+        with self.lock:
+            self.opencv_threads = self.default_opencv_threads
+            cv2.setNumThreads(self.opencv_threads)
+            if self._blas_limits is not None:
+                self._blas_limits.restore_original_limits()
+                self._blas_limits = None
+
+    def get_affinity(self, thread_id):
+        if not self.pin_affinity:
+            return ()
+        try:
+            return tuple(os.sched_getaffinity(thread_id))
+        except OSError:
+            return ()
+
+    def set_affinity(self, thread_id, cpus):
+        if not self.pin_affinity or not cpus:
+            return
+        try:
+            os.sched_setaffinity(thread_id, cpus)
+        except OSError:
+            # The thread may have exited or the CPUs may be outside our cgroup
+            pass
@@ -0,0 +1,121 @@
+class DownsampledSeries:
+    """Bounded time series for live charts of hour-long sessions.
+
+    Values are aggregated into at most capacity min/max buckets covering the
+    whole session. When the buckets fill up, neighbouring pairs are merged and
+    every new bucket spans twice as many samples, so appends are O(1)
+    amortized and peaks are never averaged away.
+
+    Each closed bucket gets a sequence number so a chart can fetch only the
+    points it has not drawn yet with new_points(cursor).
+    """
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        """Drop every sample."""
+        self.buckets = []
+        self.current = None
+        self.span = 1
+        self.closed = 0
+        # Value of closed at the last merge
+        self.compacted = 0
+        self.samples = 0
+        self.start = None
+
+    def append(self, timestamp, value):
+        """Add one sample; None values are ignored."""
+        if value is None:
+            return
+        value = float(value)
+        if self.start is None:
+            self.start = timestamp
+        self.samples += 1
+
+        bucket = self.current
+        if bucket is None or bucket[2] >= self.span:
+            if bucket is not None:
+                self._close(bucket)
+            # [first seq, last seq, samples, min, time of min, max, time of max]
+            self.current = [self.closed, self.closed, 1, value, timestamp, value, timestamp]
+            return
+        bucket[2] += 1
+        if value < bucket[3]:
+            bucket[3] = value
+            bucket[4] = timestamp
+        if value > bucket[5]:
+            bucket[5] = value
+            bucket[6] = timestamp
+
+    def points(self):
+        """The whole session as (time, value) points, at most two per bucket."""
+        points = []
+        for bucket in self.buckets + ([self.current] if self.current else []):
+            points.extend(self._bucket_points(bucket))
+        return points
+
+    def new_points(self, cursor=0):
+        """Buckets closed since cursor as (sequence number, points) pairs, and the cursor to pass next time.
+
+        When buckets were merged since cursor, every bucket is returned again
+        from sequence number 0, so the caller replaces what it drew with the
+        merged buckets and no min or max is lost (see apply_updates).
+        """
+        if self.compacted > cursor:
+            cursor = 0
+        updates = []
+        for bucket in reversed(self.buckets):
+            if bucket[1] < cursor:
+                break
+            updates.append((bucket[0], self._bucket_points(bucket)))
+        updates.reverse()
+        return updates, self.closed
+
+    def _close(self, bucket):
+        self.buckets.append(bucket)
+        self.closed += 1
+        if len(self.buckets) >= self.capacity:
+            self._compact()
+
+    def _compact(self):
+        """Merge neighbouring buckets pairwise and double the span of new ones."""
+        merged = []
+        for i in range(0, len(self.buckets) - 1, 2):
+            a, b = self.buckets[i], self.buckets[i + 1]
+            low = a if a[3] <= b[3] else b
+            high = a if a[5] >= b[5] else b
+            merged.append([a[0], b[1], a[2] + b[2], low[3], low[4], high[5], high[6]])
+        if len(self.buckets) % 2:
+            merged.append(self.buckets[-1])
+        self.buckets = merged
+        self.span *= 2
+        self.compacted = self.closed
+
+    @staticmethod
+    def _bucket_points(bucket):
+        if bucket[4] == bucket[6]:
+            return [(bucket[4], bucket[3])]
+        if bucket[4] < bucket[6]:
+            return [(bucket[4], bucket[3]), (bucket[6], bucket[5])]
+        return [(bucket[6], bucket[5]), (bucket[4], bucket[3])]
+
+def apply_updates(drawn, updates):
+    """Merge new_points() updates into drawn, a {sequence number: points} dict of what a chart shows.
+
+    Returns True when points already drawn were replaced, i.e. the chart has to
+    be redrawn from drawn rather than extended with the new points.
+    """
+    if not updates:
+        return False
+    first = updates[0][0]
+    replaced = [number for number in drawn if number >= first]
+    for number in replaced:
+        del drawn[number]
+    drawn.update(updates)
+    return bool(replaced)
+
+def drawn_points(drawn):
+    """The points of a drawn dict in time order."""
+    return [point for number in sorted(drawn) for point in drawn[number]]